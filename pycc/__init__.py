@@ -1 +1,3 @@
 """A Python optimizing compiler and AST toolkit."""
+
+__version__ = '2.0.0'
@@ -0,0 +1,49 @@
+"""Utilities for copying AST nodes."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+
+def clone(node, substitute=None, location=None):
+    """Copy a tree of AST nodes without the references held by the nodes.
+
+    Unlike copy.deepcopy this does not follow the parent and sibling
+    references added by asttools.references, which would copy the whole
+    tree. The copy has no references of its own until they are added.
+
+    If 'substitute' is given it is called with each original node before it
+    is copied. A value other than None is used in place of the copy of that
+    node and its children.
+
+    Copies take the source location of the original node unless a 'location'
+    node is given in which case all copies take its location.
+    """
+    if substitute is not None:
+
+        replacement = substitute(node)
+        if replacement is not None:
+
+            return replacement
+
+    new = node.__class__()
+    for field, value in ast.iter_fields(node):
+
+        if isinstance(value, ast.AST):
+
+            value = clone(value, substitute, location)
+
+        elif isinstance(value, list):
+
+            value = [
+                clone(v, substitute, location)
+                if isinstance(v, ast.AST) else v
+                for v in value
+            ]
+
+        setattr(new, field, value)
+
+    return ast.copy_location(new, location if location is not None else node)
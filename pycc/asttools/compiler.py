@@ -6,92 +6,142 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import ast
-import io
-import time
+import marshal
+import os
+import struct
 
 from astkit.render import SourceCodeRenderer
 
+from .. import enum
 from .. import pycompat
 
 
-def _code_to_bytecode_py2(code):
-    """Get bytecode for PY2.
+def magic_number():
+    """Get the magic number used in bytecode files by this interpreter."""
+    if pycompat.PY3 and pycompat.VERSION.minor > 3:
 
-    This implementation borrows heavily from the standard lib implementation
-    in the py_compile.compile function.
-    """
-    # Importing in this function because it only contains useful data when
-    # loaded in a PY2 environment.
-    import py_compile
-    import marshal
-
-    bytecode = io.BytesIO()
-    # NOTE: Intentionally not using the BytesIO initializer to write the inital
-    # bytes. Initializing the objects with '\0\0\0\0' resulted in no bytes
-    # being written to the buffer. Instead, use the write method explicitly to
-    # write the placeholder for the magic number.
-    bytecode.write(str('\0\0\0\0'))
-    py_compile.wr_long(bytecode, pycompat.long(time.time()))
-    bytecode.write(marshal.dumps(code))
-    bytecode.seek(0, 0)
-    bytecode.write(py_compile.MAGIC)
-    return bytecode.getvalue()
-
-
-def _code_to_bytecode_py3(code):
-    """Get bytecode for PY3.
-
-    This implementation borrows heavily from the standard lib implementation
-    in the py_compile.compile function.
+        import importlib.util
+        return importlib.util.MAGIC_NUMBER
+
+    # Importing in this function because it is deprecated in PY34.
+    import imp
+    return imp.get_magic()
+
+
+# How the interpreter decides whether a bytecode file is out of date. See
+# PEP 552 for the hash based modes. Timestamp mode compares the modification
+# time and size of the source with those recorded in the bytecode. Checked
+# hash mode compares a hash of the source instead. Unchecked hash mode never
+# checks the source and relies on the bytecode being rebuilt when needed.
+INVALIDATION_MODE = enum.Enum(('TIMESTAMP', 'CHECKED_HASH', 'UNCHECKED_HASH'))
+
+
+def _pack(value):
+    """Get a value as the little endian, 32 bit word used in headers."""
+    return struct.pack(str('<I'), int(value) & 0xFFFFFFFF)
+
+
+def _stat(location):
+    """Get the modification time and size of a source file.
+
+    Both values are zero if the location is not a file.
     """
-    # Importing in this function because it only contains useful data when
-    # loaded in a PY# environment.
-    import py_compile
-    import marshal
-
-    bytecode = io.BytesIO()
-    bytecode.write(str('\0\0\0\0'))
-    py_compile.wr_long(bytecode, pycompat.long(time.time()))
-    py_compile.wr_long(bytecode, pycompat.long(0))
-    bytecode.write(marshal.dumps(code))
-    bytecode.seek(0, 0)
-    bytecode.write(py_compile.MAGIC)
-    return bytecode.getvalue()
-
-
-def _code_to_bytecode_py34(code):
-    """Get bytecode for PY34.
-
-    This implementation leverages the functions used by the new py_compile
-    found in the importlib._bootstrap module.
+    try:
+
+        stat = os.stat(location)
+
+    except (OSError, TypeError, ValueError):
+
+        return 0, 0
+
+    return stat.st_mtime, stat.st_size
+
+
+def _read(location):
+    """Get the bytes of a source file."""
+    with open(location, 'rb') as source_file:
+
+        return source_file.read()
+
+
+def _header(mode, location, source):
+    """Get the bytecode header for a module.
+
+    The layout matches the one expected by the running interpreter. Before
+    PY33 the header only records the modification time. PY33 added the source
+    size and PY37 added a flags word which selects between the timestamp and
+    hash based layouts.
     """
-    # Importing in this function because it only exsists in a PY34 environment.
-    import importlib._bootstrap
-    return importlib._bootstrap._code_to_bytecode(code, time.time())
+    magic = magic_number()
+    if mode is INVALIDATION_MODE.TIMESTAMP:
 
+        mtime, size = _stat(location)
+        if source is not None:
 
-def _code_to_bytecode(code):
-    """Get bytecode from a code object."""
-    if pycompat.PY2:
+            size = len(source)
+
+        if pycompat.PY2 or pycompat.VERSION.minor < 3:
+
+            return magic + _pack(mtime)
+
+        if pycompat.VERSION.minor < 7:
+
+            return magic + _pack(mtime) + _pack(size)
+
+        return magic + _pack(0) + _pack(mtime) + _pack(size)
+
+    if pycompat.PY2 or pycompat.VERSION.minor < 7:
+
+        raise ValueError('Hash based bytecode requires Python 3.7 or newer.')
+
+    # Importing in this function because it only exists in PY37 and newer.
+    import importlib.util
+
+    if source is None:
 
-        return _code_to_bytecode_py2(code)
+        source = _read(location)
 
-    if pycompat.PY3 and pycompat.VERSION.minor < 4:
+    flags = 0b01
+    if mode is INVALIDATION_MODE.CHECKED_HASH:
 
-        return _code_to_bytecode_py3
+        flags = flags | 0b10
 
-    return _code_to_bytecode_py34(code)
+    return magic + _pack(flags) + importlib.util.source_hash(source)
+
+
+def _code_to_bytecode(code, mode, location, source):
+    """Get bytecode from a code object."""
+    return _header(mode, location, source) + marshal.dumps(code)
 
 
 class ByteCodeCompiler(object):
 
-    """Compiler which generates Python bytecode."""
+    """Compiler which generates Python bytecode.
+
+    The output only depends on the AST, the source, and the invalidation
+    mode so compiling the same module twice produces identical bytes.
+    """
+
+    def __init__(self, mode=INVALIDATION_MODE.TIMESTAMP):
+        """Initialize the compiler with an INVALIDATION_MODE."""
+        if mode not in INVALIDATION_MODE:
+
+            raise ValueError('Unknown invalidation mode: {0}.'.format(mode))
+
+        self._mode = mode
+
+    def __call__(self, node, location='<AST>', source=None):
+        """Compile the AST into bytecode.
 
-    def __call__(self, node, location='<AST>'):
-        """Compile the AST into bytecode."""
+        In timestamp mode the header records the modification time and size
+        of the file at 'location' so that the interpreter accepts the bytecode
+        until the file changes. Both are zero if there is no such file. The
+        hash modes record a hash of the 'source' bytes which are read from
+        'location' if not given.
+        """
         ast.fix_missing_locations(node)
-        codeobject = compile(node, location, 'exec')
-        return _code_to_bytecode(codeobject)
+        codeobject = compile(node, location, 'exec', dont_inherit=True)
+        return _code_to_bytecode(codeobject, self._mode, location, source)
 
 
 class SourceCodeCompiler(object):
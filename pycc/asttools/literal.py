@@ -0,0 +1,211 @@
+"""Utilities for converting between literal AST nodes and Python values."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import math
+
+from .. import pycompat
+
+# Parsers from PY38 produce ast.Constant for every literal. Older versions
+# use a node type per value type.
+CONSTANT = pycompat.PY3 and pycompat.VERSION.minor >= 8
+
+SCALAR_NODES = tuple(
+    getattr(ast, name)
+    for name in (
+        ('Constant',) if CONSTANT else ('Num', 'Str', 'Bytes', 'NameConstant')
+    )
+    if hasattr(ast, name)
+)
+
+# Limits on the values which may be built. These match the limits of the
+# CPython AST optimizer so that a folded value never bloats the code object.
+MAX_INT_SIZE = 128
+MAX_COLLECTION_SIZE = 256
+MAX_STR_SIZE = 4096
+MAX_TOTAL_ITEMS = 1024
+
+
+def _scalar_value(node):
+    """Get the value of a scalar literal node."""
+    if CONSTANT:
+
+        return node.value
+
+    if isinstance(node, ast.Num):
+
+        return node.n
+
+    if isinstance(node, ast.Str) or node.__class__.__name__ == 'Bytes':
+
+        return node.s
+
+    return node.value
+
+
+def is_literal(node):
+    """Determine if a node is an expression with a known constant value.
+
+    Literals are the scalar constant nodes, negated numbers, and tuples
+    built only from other literals.
+    """
+    nodes = [node]
+    while len(nodes) > 0:
+
+        current = nodes.pop()
+        if isinstance(current, SCALAR_NODES):
+
+            if CONSTANT and current.value is Ellipsis:
+
+                return False
+
+            continue
+
+        if (
+            isinstance(current, ast.UnaryOp) and
+            isinstance(current.op, (ast.USub, ast.UAdd)) and
+            isinstance(current.operand, SCALAR_NODES) and
+            isinstance(
+                _scalar_value(current.operand),
+                (int, pycompat.long, float, complex),
+            ) and
+            not isinstance(_scalar_value(current.operand), bool)
+        ):
+
+            continue
+
+        if (
+            isinstance(current, ast.Tuple) and
+            isinstance(current.ctx, ast.Load)
+        ):
+
+            nodes.extend(current.elts)
+            continue
+
+        return False
+
+    return True
+
+
+def evaluate(node):
+    """Get the Python value of a literal node.
+
+    A ValueError is raised if the node is not a literal.
+    """
+    if not is_literal(node):
+
+        raise ValueError('The node is not a literal.')
+
+    if isinstance(node, ast.Tuple):
+
+        return tuple(evaluate(elt) for elt in node.elts)
+
+    if isinstance(node, ast.UnaryOp):
+
+        value = _scalar_value(node.operand)
+        return -value if isinstance(node.op, ast.USub) else +value
+
+    return _scalar_value(node)
+
+
+def _count(value):
+    """Get the number of items held by a value and any values inside it."""
+    if not isinstance(value, tuple):
+
+        return 0
+
+    return len(value) + sum(_count(item) for item in value)
+
+
+def is_buildable(value):
+    """Determine if a value may be built into literal nodes.
+
+    Values must be a string, bytes, number, bool, None, or a tuple of those
+    and must be within the size limits of this module. Numbers which are not
+    finite are rejected since they have no literal representation.
+    """
+    if value is None or isinstance(value, bool):
+
+        return True
+
+    if isinstance(value, (int, pycompat.long)):
+
+        return abs(value).bit_length() <= MAX_INT_SIZE
+
+    if isinstance(value, float):
+
+        return not (math.isinf(value) or math.isnan(value))
+
+    if isinstance(value, complex):
+
+        return is_buildable(value.real) and is_buildable(value.imag)
+
+    if isinstance(value, pycompat.string_types + (bytes,)):
+
+        return len(value) <= MAX_STR_SIZE
+
+    if isinstance(value, tuple):
+
+        return (
+            len(value) <= MAX_COLLECTION_SIZE and
+            _count(value) <= MAX_TOTAL_ITEMS and
+            all(is_buildable(item) for item in value)
+        )
+
+    return False
+
+
+def _scalar(value):
+    """Build the node for a scalar value."""
+    if CONSTANT:
+
+        return ast.Constant(value=value)
+
+    if value is None or isinstance(value, bool):
+
+        if hasattr(ast, 'NameConstant'):
+
+            return ast.NameConstant(value=value)
+
+        # PY2 has no literal node for these values.
+        return ast.Name(id=repr(value), ctx=ast.Load())
+
+    if isinstance(value, (int, pycompat.long, float, complex)):
+
+        return ast.Num(n=value)
+
+    if pycompat.PY3 and isinstance(value, bytes):
+
+        return ast.Bytes(s=value)
+
+    return ast.Str(s=value)
+
+
+def build(value):
+    """Build a new literal node for a Python value.
+
+    Negative numbers are built as a negated positive number which is how the
+    parser represents them. A ValueError is raised if the value is not
+    buildable.
+    """
+    if not is_buildable(value):
+
+        raise ValueError('The value cannot be built as a literal.')
+
+    if isinstance(value, tuple):
+
+        return ast.Tuple(elts=[build(item) for item in value], ctx=ast.Load())
+
+    if (
+        isinstance(value, (int, pycompat.long, float)) and
+        not isinstance(value, bool) and
+        (value < 0 or (value == 0 and math.copysign(1, value) < 0))
+    ):
+
+        return ast.UnaryOp(op=ast.USub(), operand=_scalar(-value))
+
+    return _scalar(value)
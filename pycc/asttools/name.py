@@ -6,12 +6,12 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import ast
-import itertools
 
 from .. import enum
 from .. import pycompat
 from . import references
 from . import scope
+from . import symbols
 
 
 NAME_SOURCE = enum.Enum(('DEFINED', 'ADOPTED', 'IMPORTED', 'BUILTIN'))
@@ -22,101 +22,38 @@ def declaration(node, start=None):
 
     The search begins in the same scope as the given ast.Name node. To search
     within a custom path pass in an AST node as the 'start' parameter.
+
+    If the tree was parsed with asttools.parse.parse the search is answered
+    from the SymbolTable attached to the tree. Otherwise the children of each
+    enclosing node are scanned.
     """
     if not isinstance(node, ast.Name):
 
         raise TypeError('The input must be an AST.Name node.')
 
-    scopes = [start or scope.parent_scope(node)]
-
-    while len(scopes) > 0:
-
-        current_scope = scopes.pop()
-        for child in ast.iter_child_nodes(current_scope):
+    current_scope = start or scope.parent_scope(node)
+    table = symbols.get_symbol_table(current_scope)
 
-            if (
-                isinstance(child, ast.Import) or
-                isinstance(child, ast.ImportFrom)
-            ):
+    while current_scope is not None:
 
-                for a in child.names:
+        if table is not None:
 
-                    # 'names' always contains ast.alias.
-                    if (
-                        (a.asname is not None and node.id == a.asname) or
-                        (a.asname is None and node.id == a.name)
-                    ):
+            declared = table.declaration(current_scope, node.id)
+            if declared is not None:
 
-                        return child
+                return declared
 
-            if isinstance(child, ast.Assign):
+        else:
 
-                target = child.targets[0]
+            for child in ast.iter_child_nodes(current_scope):
 
-                if isinstance(target, ast.Name) and target.id == node.id:
+                if node.id in symbols.declared_names(child):
 
                     return child
 
-                if isinstance(target, ast.Tuple):
-
-                    for elt in target.elts:
-
-                        if isinstance(elt, ast.Name) and elt.id == node.id:
-
-                            return child
-
-            if (
-                (
-                    isinstance(child, ast.FunctionDef) or
-                    isinstance(child, ast.ClassDef)
-                ) and child.name == node.id
-            ):
-
-                return child
-
-            if isinstance(child, ast.arguments):
-
-                args = ()
-                if pycompat.PY2:
-
-                    args = itertools.chain(
-                        (child.vararg, child.kwarg,),
-                        (c.id for c in child.args),
-                    )
-
-                if pycompat.PY3 and pycompat.VERSION.minor < 4:
-
-                    args = itertools.chain(
-                        (child.vararg, child.kwarg,),
-                        (c.arg for c in child.args),
-                        (c.arg for c in child.kwonlyargs),
-                    )
-
-                if pycompat.PY3 and pycompat.VERSION.minor > 3:
-
-                    args = itertools.chain(
-                        (
-                            child.vararg.arg
-                            if child.vararg is not None else None,
-
-                            child.kwarg.arg
-                            if child.kwarg is not None else None,
-                        ),
-                        (c.arg for c in child.args),
-                        (c.arg for c in child.kwonlyargs),
-                    )
-
-                for arg in args:
-
-                    if arg == node.id:
-
-                        return child
-
-        if current_scope.parent is None:
-
-            return None
+        current_scope = references.get_parent(current_scope)
 
-        scopes.append(current_scope.parent)
+    return None
 
 
 def name_source(node, declared=None):
@@ -7,17 +7,60 @@ from __future__ import unicode_literals
 
 import ast
 
+from . import pragma
 from . import references
+from . import symbols
 
 
-def parse(source, filename='<unknown>', mode='exec'):
+def annotate(node, side_table=False, lazy=False):
+    """Add the references and symbol table used by pycc to an AST.
+
+    Parent and sibling references are added to each node. If 'side_table' is
+    True they are instead stored in an asttools.references.ReferenceTable
+    which is attached to the given node as 'reference_table'. Other nodes
+    are left untouched. If 'lazy' is True a LazyReferenceTable is attached in
+    the same way, which only computes the references of nodes as they are
+    used. A SymbolTable for the tree is
+    attached to the given node as 'symbol_table'. If 'lazy' is True it is a
+    LazySymbolTable, which only computes declarations as they are used.
+    """
+    if lazy:
+
+        node.reference_table = references.LazyReferenceTable(node)
+
+    elif side_table:
+
+        node.reference_table = references.ReferenceTable(node)
+
+    else:
+
+        references.add_references(node)
+
+    node.symbol_table = (
+        symbols.LazySymbolTable(node) if lazy else symbols.SymbolTable(node)
+    )
+
+    return node
+
+
+def parse(
+        source,
+        filename='<unknown>',
+        mode='exec',
+        side_table=False,
+        lazy=False,
+):
     """An ast.parse extension.
 
     This function behaves identically to the standard ast.parse except that it
-    adds parent and sibling references to each node.
+    annotates the tree as described by the 'annotate' function, which is also
+    given 'side_table' and 'lazy'. The pycc comment markers of the source are
+    attached to the tree as 'pragmas'. See asttools.pragma for details.
     """
-    node = ast.parse(source, filename, mode)
-    references.add_parent_references(node)
-    references.add_sibling_references(node)
-
+    node = annotate(
+        ast.parse(source, filename, mode),
+        side_table,
+        lazy,
+    )
+    node.pragmas = pragma.scan(source)
     return node
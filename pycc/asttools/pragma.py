@@ -0,0 +1,110 @@
+"""Utilities for reading pycc comment markers from source."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import functools
+import re
+import tokenize
+
+from .. import pycompat
+from . import literal
+
+PRAGMA_PATTERN = re.compile(r'#\s*pycc:\s*(?P<names>[\w\-,\s]+)$')
+
+
+def scan(source):
+    """Get a mapping of line numbers to the pycc markers on each line.
+
+    Markers are comments of the form '# pycc: name' where several names may
+    be separated by commas. The values of the mapping are frozensets of the
+    names found on the line. Source which cannot be tokenized has no markers.
+    Source which does not contain 'pycc:' is not tokenized at all.
+    """
+    if (b'pycc:' if isinstance(source, bytes) else 'pycc:') not in source:
+
+        return {}
+
+    found = {}
+    try:
+
+        if not isinstance(source, pycompat.string_types):
+
+            # PY3 source given as bytes is decoded as the interpreter would.
+            encoding, _ = tokenize.detect_encoding(
+                iter(source.splitlines(True) + [b'']).__next__,
+            )
+            source = source.decode(encoding)
+
+        lines = iter(source.splitlines(True))
+        for token in tokenize.generate_tokens(functools.partial(
+            next,
+            lines,
+            '',
+        )):
+
+            if token[0] != tokenize.COMMENT:
+
+                continue
+
+            match = PRAGMA_PATTERN.search(token[1].strip())
+            if match is None:
+
+                continue
+
+            names = frozenset(
+                name.strip()
+                for name in match.group('names').split(',')
+                if name.strip()
+            )
+            lineno = token[2][0]
+            found[lineno] = found.get(lineno, frozenset()) | names
+
+    except (tokenize.TokenError, SyntaxError, ValueError):
+
+        return {}
+
+    return found
+
+
+def has_pragma(node, name, pragmas):
+    """Determine if a function or class is marked with a pycc marker.
+
+    The marker must appear on the line which begins the definition or on any
+    line before its first statement other than a docstring, such as a comment
+    on its own line at the top of the body. The 'pragmas' value is a mapping
+    produced by 'scan'.
+    """
+    if not pragmas:
+
+        return False
+
+    statement = node.body[0]
+    value = getattr(statement, 'value', None)
+    text = getattr(value, 'value' if literal.CONSTANT else 's', None)
+    if (
+        len(node.body) > 1 and
+        isinstance(statement, ast.Expr) and
+        isinstance(text, pycompat.string_types)
+    ):
+
+        statement = node.body[1]
+
+    first = node.lineno
+    last = max(first, statement.lineno - 1)
+    return any(
+        name in pragmas.get(lineno, ())
+        for lineno in range(first, last + 1)
+    )
+
+
+def get_pragmas(node):
+    """Get the markers attached to the top node of a tree.
+
+    Trees built by asttools.parse hold the markers of their source as
+    'pragmas'. Any other tree is treated as having none.
+    """
+    return getattr(node, 'pragmas', None) or {}
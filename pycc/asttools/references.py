@@ -5,7 +5,328 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import array
 import ast
+import collections
+import weakref
+
+# Weak references to the reference tables which currently exist.
+_TABLES = []
+
+# Slot value used by reference tables in place of a missing node.
+_EMPTY = -1
+
+
+class ReferenceTable(object):
+
+    """Parent and sibling references held apart from the nodes of a tree.
+
+    Each node is given a slot when it is added to the table. The slots are
+    held in a dictionary keyed by node identity and the slots of the parent
+    and siblings of each node are stored in arrays of integers indexed by
+    that slot. Nodes are never changed. The table holds every node it has
+    seen, including those which were later removed from the tree.
+
+    While a table exists the accessor functions of this module read and write
+    the references of its nodes through the table rather than the nodes.
+    """
+
+    def __init__(self, node):
+        """Add references for the given node and all of its descendants."""
+        self._slots = {}
+        self._nodes = []
+        self._parents = array.array('l')
+        self._previous = array.array('l')
+        self._next = array.array('l')
+
+        self._slot(node)
+        self._extend(node)
+        _TABLES.append(weakref.ref(self, _TABLES.remove))
+
+    def _expand(self, node):
+        """Add references for the direct children of a node in the table.
+
+        Returns the children of the node.
+        """
+        children = list(ast.iter_child_nodes(node))
+        parent = self._slots[node]
+        previous = _EMPTY
+        for child in children:
+
+            slot = self._slot(child)
+            self._parents[slot] = parent
+            self._previous[slot] = previous
+            self._next[slot] = _EMPTY
+            if previous != _EMPTY:
+
+                self._next[previous] = slot
+
+            previous = slot
+
+        return children
+
+    def _extend(self, node):
+        """Add references for all descendants of a node in the table."""
+        nodes = [node]
+        while len(nodes) > 0:
+
+            nodes.extend(self._expand(nodes.pop()))
+
+    def __contains__(self, node):
+        """Determine if the table holds references for a node."""
+        return node in self._slots
+
+    def __len__(self):
+        """Get the number of nodes given a slot so far."""
+        return len(self._nodes)
+
+    def _slot(self, node):
+        """Get the slot of a node, adding the node if it has none."""
+        slot = self._slots.get(node)
+        if slot is not None:
+
+            return slot
+
+        slot = len(self._nodes)
+        self._slots[node] = slot
+        self._nodes.append(node)
+        self._parents.append(_EMPTY)
+        self._previous.append(_EMPTY)
+        self._next.append(_EMPTY)
+        return slot
+
+    def _node(self, slot):
+        """Get the node in a slot or None for an empty slot."""
+        return None if slot == _EMPTY else self._nodes[slot]
+
+    def _link(self, node):
+        """Get the slot of an optional node."""
+        return _EMPTY if node is None else self._slot(node)
+
+    def parent(self, node):
+        """Get the parent of a node held by the table."""
+        return self._node(self._parents[self._slots[node]])
+
+    def previous(self, node):
+        """Get the previous sibling of a node held by the table."""
+        return self._node(self._previous[self._slots[node]])
+
+    def next(self, node):
+        """Get the next sibling of a node held by the table."""
+        return self._node(self._next[self._slots[node]])
+
+    def set(self, node, parent, previous, next_node):
+        """Set the parent and sibling references of a node."""
+        slot = self._slot(node)
+        self._parents[slot] = self._link(parent)
+        self._previous[slot] = self._link(previous)
+        self._next[slot] = self._link(next_node)
+
+
+class LazyReferenceTable(ReferenceTable):
+
+    """ReferenceTable which only adds the references of nodes as they are used.
+
+    Only the given node is added when the table is created. The children of
+    a node it holds are added when 'expand' is called for that node, which
+    the visitors of asttools.visitor do for each node whose children they
+    queue. Only about as many nodes are added as have been visited.
+
+    When the table is asked about a node it does not hold yet, the parts of
+    the tree it has not added are walked without adding them. If the node is
+    found only the nodes on the path to it, and their children, are added.
+    A node of another tree or a new node which was never linked is not found
+    and adds nothing to the table.
+    """
+
+    def __init__(self, node):
+        """Add references for the given node only."""
+        self._pending = collections.OrderedDict()
+        super(LazyReferenceTable, self).__init__(node)
+
+    def __contains__(self, node):
+        """Determine if the table holds references for a node.
+
+        The nodes on the path to a node which is not held yet are added.
+        """
+        return node in self._slots or self._find(node)
+
+    @property
+    def pending(self):
+        """Get the number of nodes whose children have not been added."""
+        return len(self._pending)
+
+    def _slot(self, node):
+        """Get the slot of a node, adding the node if it has none.
+
+        The children of a node which is added are added later.
+        """
+        if node not in self._slots:
+
+            self._pending[node] = None
+
+        return super(LazyReferenceTable, self)._slot(node)
+
+    def _expand(self, node):
+        """Add references for the direct children of a node in the table."""
+        self._pending.pop(node, None)
+        return super(LazyReferenceTable, self)._expand(node)
+
+    def _extend(self, node):
+        """Leave the descendants of a node to be added when needed."""
+
+    def expand(self, node):
+        """Add the children of a node held by the table if not added yet."""
+        if node in self._pending:
+
+            self._expand(node)
+
+    def _find(self, node):
+        """Add the nodes on the path to a node which is not held yet.
+
+        Only the nodes which have not been added are walked, starting from
+        those added most recently. Returns False if the node is not found.
+        """
+        for top in reversed(tuple(self._pending)):
+
+            parents = {}
+            nodes = [top]
+            while len(nodes) > 0:
+
+                current = nodes.pop()
+                for child in ast.iter_child_nodes(current):
+
+                    if child is node:
+
+                        path = [current]
+                        while path[-1] is not top:
+
+                            path.append(parents[path[-1]])
+
+                        for parent in reversed(path):
+
+                            self._expand(parent)
+
+                        return True
+
+                    if child not in self._slots:
+
+                        parents[child] = current
+                        nodes.append(child)
+
+        return False
+
+
+def get_table(node, search=True):
+    """Get the ReferenceTable which holds a node or None.
+
+    The node is looked up in each table which exists. Only nodes which no
+    table holds and which have no attribute references are searched for in
+    the LazyReferenceTables, unless 'search' is False. The search never adds
+    nodes of another tree to a table.
+    """
+    for ref in _TABLES:
+
+        table = ref()
+        if table is not None and node in table._slots:
+
+            return table
+
+    if not search or hasattr(node, 'parent'):
+
+        return None
+
+    for ref in _TABLES:
+
+        table = ref()
+        if isinstance(table, LazyReferenceTable) and table._find(node):
+
+            return table
+
+    return None
+
+
+def has_references(node):
+    """Determine if parent and sibling references were added to a node."""
+    return get_table(node) is not None or hasattr(node, 'parent')
+
+
+def get_parent(node):
+    """Get the parent of a node or None for the top level node."""
+    table = get_table(node)
+    if table is not None:
+
+        return table.parent(node)
+
+    return node.parent
+
+
+def get_previous(node):
+    """Get the sibling which comes before a node or None."""
+    table = get_table(node)
+    if table is not None:
+
+        return table.previous(node)
+
+    return node.previous
+
+
+def get_next(node):
+    """Get the sibling which comes after a node or None."""
+    table = get_table(node)
+    if table is not None:
+
+        return table.next(node)
+
+    return node.next
+
+
+def set_references(node, parent, previous=None, next_node=None):
+    """Set the parent and sibling references of a node.
+
+    The references are stored in the ReferenceTable which holds the parent,
+    or the node itself when there is no parent. Otherwise they are added to
+    the node. Nodes shared by several trees, such as the expression contexts
+    produced by ast.parse, are always stored with their current parent.
+    """
+    table = get_table(node if parent is None else parent)
+
+    if table is not None:
+
+        table.set(node, parent, previous, next_node)
+        return None
+
+    node.parent = parent
+    node.previous, node.next = previous, next_node
+
+
+def add_references(node):
+    """Add parent and sibling references to all nodes in one traversal.
+
+    This has the same result as calling both add_parent_references and
+    add_sibling_references.
+    """
+    nodes = [node]
+    node.parent = None
+
+    while len(nodes) > 0:
+
+        current_node = nodes.pop()
+        previous = None
+        for child in ast.iter_child_nodes(current_node):
+
+            nodes.append(child)
+            child.parent = current_node
+            child.previous = previous
+            if previous is not None:
+
+                previous.next = child
+
+            previous = child
+
+        if previous is not None:
+
+            previous.next = None
 
 
 def add_parent_references(node):
@@ -55,6 +376,65 @@ def add_sibling_references(node):
                 child.next = children[index + 1]
 
 
+def link_children(node):
+    """Recompute the sibling references of the direct children of a node.
+
+    This is useful after children have been inserted into or removed from
+    one of the lists held by the node.
+    """
+    children = list(ast.iter_child_nodes(node))
+    for index, child in enumerate(children):
+
+        set_references(
+            child,
+            node,
+            children[index - 1] if index > 0 else None,
+            children[index + 1] if index + 1 < len(children) else None,
+        )
+
+
+def link_siblings(parent, nodes, previous, next_node):
+    """Link a run of children of a node in place of a child which was removed.
+
+    The nodes are given 'parent' and linked to each other in order. The
+    'previous' and 'next_node' values are the children on either side of the
+    run, or None, and are linked to its ends. Unlike link_children the other
+    children of the parent are not visited.
+    """
+    chain = [previous] + list(nodes) + [next_node]
+    for index in range(1, len(chain) - 1):
+
+        set_references(
+            chain[index],
+            parent,
+            chain[index - 1],
+            chain[index + 1],
+        )
+
+    if previous is not None:
+
+        set_references(previous, parent, get_previous(previous), chain[1])
+
+    if next_node is not None:
+
+        set_references(next_node, parent, chain[-2], get_next(next_node))
+
+
+def add_child_references(node):
+    """Add parent and sibling references to all descendants of a node.
+
+    The references already held by the given node are left untouched. This is
+    useful when attaching a newly built subtree to an existing tree. The new
+    references are stored in the same place as those of the given node.
+    """
+    nodes = [node]
+    while len(nodes) > 0:
+
+        current_node = nodes.pop()
+        link_children(current_node)
+        nodes.extend(ast.iter_child_nodes(current_node))
+
+
 def copy_location(new_node, old_node):
     """An ast.copy_location extension.
 
@@ -62,8 +442,12 @@ def copy_location(new_node, old_node):
     that it also copies parent and sibling references.
     """
     new_node = ast.copy_location(new_node, old_node)
-    new_node.parent = old_node.parent
-    new_node.previous, new_node.next = old_node.previous, old_node.next
+    set_references(
+        new_node,
+        get_parent(old_node),
+        get_previous(old_node),
+        get_next(old_node),
+    )
 
     return new_node
 
@@ -71,8 +455,10 @@ def copy_location(new_node, old_node):
 def get_top_node(node):
     """Get the top level ast node by backtracking through the parent refs."""
     top = node
-    while top.parent is not None:
+    parent = get_parent(top)
+    while parent is not None:
 
-        top = top.parent
+        top = parent
+        parent = get_parent(top)
 
     return top
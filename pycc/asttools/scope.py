@@ -6,12 +6,32 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import ast
+import collections
 
 from .. import enum
+from .. import pycompat
+from . import references
 
 
 SCOPE_TYPE = enum.Enum(("MODULE", "FUNCTION", "CLASS"))
 
+# Nodes whose bodies are evaluated in a namespace of their own by the
+# interpreter. This is broader than the scopes tracked by this module. PY2
+# list comprehensions share the namespace of the enclosing scope.
+NAMESPACE_NODES = tuple(
+    getattr(ast, name)
+    for name in (
+        'FunctionDef',
+        'AsyncFunctionDef',
+        'ClassDef',
+        'Lambda',
+        'GeneratorExp',
+        'SetComp',
+        'DictComp',
+    ) + (('ListComp',) if pycompat.PY3 else ())
+    if hasattr(ast, name)
+)
+
 
 def is_scope(node):
     """True if the ast node is a scope else False."""
@@ -55,7 +75,11 @@ def parent_scope(node):
 
         raise TypeError("The input must be an AST node.")
 
-    node = node.parent if hasattr(node, "parent") else None
+    node = (
+        references.get_parent(node)
+        if references.has_references(node)
+        else None
+    )
 
     while node is not None:
 
@@ -67,7 +91,7 @@ def parent_scope(node):
 
             return node
 
-        node = node.parent
+        node = references.get_parent(node)
 
     raise ValueError("No valid scope found in node path.")
 
@@ -87,3 +111,21 @@ def child_scopes(node):
         if is_scope(child):
 
             yield child
+
+
+def walk(node):
+    """Generate the descendants of a node which share its namespace.
+
+    Nodes in NAMESPACE_NODES are produced but their children are not. Note
+    that some children of those nodes, such as default argument values and
+    decorators, are evaluated in the enclosing namespace and are also
+    skipped.
+    """
+    nodes = collections.deque(ast.iter_child_nodes(node))
+    while len(nodes) > 0:
+
+        current = nodes.popleft()
+        yield current
+        if not isinstance(current, NAMESPACE_NODES):
+
+            nodes.extend(ast.iter_child_nodes(current))
@@ -0,0 +1,387 @@
+"""Index of the names declared within an AST."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import itertools
+
+from .. import pycompat
+from . import references
+
+
+def declared_names(node):
+    """Generate the tokens of all names declared by an AST node.
+
+    Only the node itself is inspected. Declarations made by the children of
+    the node are not included.
+    """
+    if isinstance(node, ast.Import) or isinstance(node, ast.ImportFrom):
+
+        for a in node.names:
+
+            # 'names' always contains ast.alias.
+            yield a.asname if a.asname is not None else a.name
+
+        return
+
+    if isinstance(node, ast.Assign):
+
+        target = node.targets[0]
+
+        if isinstance(target, ast.Name):
+
+            yield target.id
+
+        if isinstance(target, ast.Tuple):
+
+            for elt in target.elts:
+
+                if isinstance(elt, ast.Name):
+
+                    yield elt.id
+
+        return
+
+    if isinstance(node, ast.FunctionDef) or isinstance(node, ast.ClassDef):
+
+        yield node.name
+        return
+
+    if isinstance(node, ast.arguments):
+
+        args = ()
+        if pycompat.PY2:
+
+            args = itertools.chain(
+                (node.vararg, node.kwarg,),
+                (c.id for c in node.args),
+            )
+
+        if pycompat.PY3 and pycompat.VERSION.minor < 4:
+
+            args = itertools.chain(
+                (node.vararg, node.kwarg,),
+                (c.arg for c in node.args),
+                (c.arg for c in node.kwonlyargs),
+            )
+
+        if pycompat.PY3 and pycompat.VERSION.minor > 3:
+
+            args = itertools.chain(
+                (
+                    node.vararg.arg
+                    if node.vararg is not None else None,
+
+                    node.kwarg.arg
+                    if node.kwarg is not None else None,
+                ),
+                (c.arg for c in node.args),
+                (c.arg for c in node.kwonlyargs),
+            )
+
+        for arg in args:
+
+            if arg is not None:
+
+                yield arg
+
+
+def bound_names(node):
+    """Generate the tokens of every name bound by an AST node.
+
+    Unlike 'declared_names' this covers every way in which a statement or
+    expression can bind or unbind a name, such as loop targets, augmented
+    assignment, deletion, exception handlers, and global statements. Only the
+    node itself is inspected.
+    """
+    if isinstance(node, ast.Name):
+
+        if not isinstance(node.ctx, ast.Load):
+
+            yield node.id
+
+        return
+
+    if isinstance(node, ast.alias):
+
+        # 'import a.b' binds the name 'a'.
+        yield node.asname if node.asname is not None else (
+            node.name.split('.')[0]
+        )
+        return
+
+    if isinstance(node, ast.Global) or node.__class__.__name__ == 'Nonlocal':
+
+        for token in node.names:
+
+            yield token
+
+        return
+
+    if isinstance(node, ast.arguments):
+
+        # PY2 and PY33 represent variable arguments as strings.
+        for token in (node.vararg, node.kwarg):
+
+            if isinstance(token, pycompat.string_types):
+
+                yield token
+
+        return
+
+    if node.__class__.__name__ == 'arg':
+
+        yield node.arg
+        return
+
+    # Definitions, exception handlers, and match captures hold a string name.
+    for field in ('name', 'rest'):
+
+        token = getattr(node, field, None)
+        if isinstance(token, pycompat.string_types):
+
+            yield token
+
+
+class SymbolTable(object):
+
+    """Index of the names declared by the direct children of each node.
+
+    The table maps each AST node to a dictionary of name tokens. Each token
+    maps to a list of the direct children of that node which declare the name
+    in the order in which they appear. This matches the search performed by
+    asttools.name.declaration without scanning the children of each enclosing
+    node on every lookup.
+
+    The table must be kept in sync with the tree it describes. Changes made
+    through asttools.visitor.NodeTransformer are applied automatically. Any
+    other modification of the tree must be followed by a call to 'replace' or
+    'refresh'.
+    """
+
+    def __init__(self, node):
+        """Build the table for the tree rooted at node."""
+        self._table = {}
+        self._listeners = []
+        self.add(node)
+
+    def _index(self, node):
+        """Compute the declarations made by the direct children of node."""
+        entry = {}
+        for child in ast.iter_child_nodes(node):
+
+            for token in declared_names(child):
+
+                entry.setdefault(token, []).append(child)
+
+        if entry:
+
+            self._table[node] = entry
+            return None
+
+        self._table.pop(node, None)
+
+    def add(self, node):
+        """Add the node and all of its descendants to the table."""
+        nodes = [node]
+        while len(nodes) > 0:
+
+            current = nodes.pop()
+            self._index(current)
+            nodes.extend(ast.iter_child_nodes(current))
+
+    def discard(self, node):
+        """Remove the node and all of its descendants from the table."""
+        nodes = [node]
+        while len(nodes) > 0:
+
+            current = nodes.pop()
+            self._table.pop(current, None)
+            nodes.extend(ast.iter_child_nodes(current))
+
+    def refresh(self, node):
+        """Recompute the declarations made by the direct children of node.
+
+        Returns True if the declarations changed.
+        """
+        original = self._table.get(node)
+        self._index(node)
+        return self._table.get(node) != original
+
+    def _update(self, old, new, parent):
+        """Update the declarations of parent after a child was replaced.
+
+        Only the tokens declared by the old and new children are updated.
+        Returns True if the declarations changed, False if they did not, or
+        None if another child declares one of the tokens and the order of
+        the declarations must be recomputed with 'refresh'.
+        """
+        entry = self._table.get(parent, {})
+        added = {}
+        for node in new:
+
+            for token in declared_names(node):
+
+                added.setdefault(token, []).append(node)
+
+        tokens = set(declared_names(old)) | set(added)
+        if any(
+            n is not old and n not in new
+            for token in tokens
+            for n in entry.get(token, ())
+        ):
+
+            return None
+
+        changed = False
+        for token in tokens:
+
+            changed = changed or entry.get(token) != added.get(token)
+            if token in added:
+
+                entry[token] = added[token]
+                continue
+
+            entry.pop(token, None)
+
+        if entry:
+
+            self._table[parent] = entry
+
+        else:
+
+            self._table.pop(parent, None)
+
+        return changed
+
+    def replace(self, old, new, parent):
+        """Update the table after old has been replaced by new in parent.
+
+        The new value may be None if the old node was removed or a list of
+        nodes if the old node was replaced by several others.
+        """
+        self.discard(old)
+        if new is None:
+
+            new = ()
+
+        if isinstance(new, ast.AST):
+
+            new = (new,)
+
+        for node in new:
+
+            self.add(node)
+
+        rebound = self._update(old, new, parent)
+        if rebound is None:
+
+            rebound = self.refresh(parent)
+
+        for listener in self._listeners:
+
+            listener(old, new, rebound)
+
+    def subscribe(self, listener):
+        """Register a callable to be notified when the table is updated.
+
+        The callable is given the removed node, an iterable of the nodes which
+        replaced it, and a boolean which is True if any declarations changed.
+        """
+        self._listeners.append(listener)
+
+    def _entry(self, node):
+        """Get the declarations made by the direct children of node or None."""
+        return self._table.get(node)
+
+    def declarations(self, node, token):
+        """Get all direct children of node which declare the given token."""
+        return tuple((self._entry(node) or {}).get(token, ()))
+
+    def declaration(self, node, token):
+        """Get the first direct child of node which declares the token."""
+        entry = self._entry(node)
+        if entry is None:
+
+            return None
+
+        declared = entry.get(token)
+        if declared is None:
+
+            return None
+
+        return declared[0]
+
+
+class LazySymbolTable(SymbolTable):
+
+    """SymbolTable which only indexes the children of nodes as they are used.
+
+    Nothing is indexed when the table is created. The declarations made by
+    the children of a node are computed the first time they are looked up.
+    Replacing a child of a node which was never looked up reports that the
+    declarations changed whenever the old or new children declare a name,
+    since the previous declarations were never computed.
+    """
+
+    def __init__(self, node):
+        """Create an empty table for the tree rooted at node."""
+        self._indexed = set()
+        super(LazySymbolTable, self).__init__(node)
+
+    def _entry(self, node):
+        """Get the declarations of node, computing them on first use."""
+        if node not in self._indexed:
+
+            self._indexed.add(node)
+            self._index(node)
+
+        return self._table.get(node)
+
+    def add(self, node):
+        """Leave the node to be indexed when it is looked up."""
+
+    def discard(self, node):
+        """Remove the node and all of its descendants from the table."""
+        nodes = [node]
+        while len(nodes) > 0:
+
+            current = nodes.pop()
+            self._indexed.discard(current)
+            self._table.pop(current, None)
+            nodes.extend(ast.iter_child_nodes(current))
+
+    def refresh(self, node):
+        """Recompute the declarations made by the direct children of node.
+
+        Returns True if the declarations changed or were never computed.
+        """
+        if node not in self._indexed:
+
+            self._entry(node)
+            return True
+
+        return super(LazySymbolTable, self).refresh(node)
+
+    def _update(self, old, new, parent):
+        """Update the declarations of parent after a child was replaced."""
+        if parent in self._indexed:
+
+            return super(LazySymbolTable, self)._update(old, new, parent)
+
+        return any(
+            True
+            for node in (old,) + tuple(new)
+            for _ in declared_names(node)
+        )
+
+
+def get_symbol_table(node):
+    """Get the SymbolTable attached to the tree containing node.
+
+    Returns None if the tree was not given a table when it was parsed.
+    """
+    return getattr(references.get_top_node(node), 'symbol_table', None)
@@ -10,6 +10,7 @@ import ast
 from ..asttools import references as reftools
 from ..asttools import name as nametools
 from ..asttools import scope as scopetools
+from ..asttools import symbols as symboltools
 from ..asttools import visitor as visitortools
 
 
@@ -25,6 +26,207 @@ class NameGenerator(visitortools.NodeVisitorIter, nametools.NameVisitorMixin):
         )
 
 
+class UseChains(object):
+
+    """Cache of the uses and assignments of every name within a tree.
+
+    Uses are grouped by Name identity, which is the string token and the
+    declaration of the name, and are computed with a single NameGenerator
+    pass over the tree the first time they are needed.
+
+    The cache follows the SymbolTable of the tree. Replacements which only
+    touch loaded names are applied incrementally. Any other change, such as
+    adding or removing an assignment, discards the cache so that it is
+    rebuilt on the next query. Trees modified without going through
+    asttools.visitor.NodeTransformer must call 'invalidate' explicitly.
+    """
+
+    def __init__(self, node):
+        """Initialize the cache for the tree rooted at node."""
+        self._node = node
+        self._uses = None
+        self._assignments = None
+        self._keys = None
+        self._globals = None
+
+    def _build(self):
+        """Compute the uses of every name in the tree."""
+        self._uses = {}
+        self._assignments = {}
+        self._keys = {}
+        self._globals = _global_names(self._node)
+        for n in NameGenerator(self._node).visit():
+
+            self._add(n)
+
+    def _add(self, name):
+        """Add a Name to the chain for its token and declaration."""
+        self._uses.setdefault(name, []).append(name)
+        self._keys[name.node] = name
+        if (
+            isinstance(name.node.ctx, ast.Store) or
+            isinstance(name.node.ctx, ast.Param)
+        ):
+
+            self._assignments.setdefault(name, []).append(name)
+
+    def _remove(self, node):
+        """Remove an ast.Name node from the chain which contains it."""
+        key = self._keys.pop(node, None)
+        if key is None:
+
+            return None
+
+        chain = self._uses[key]
+        for idx, name in enumerate(chain):
+
+            if name.node is node:
+
+                del chain[idx]
+                break
+
+    def invalidate(self):
+        """Discard all cached values."""
+        self._uses = None
+        self._assignments = None
+        self._keys = None
+        self._globals = None
+
+    def update(self, old, new, rebound):
+        """Apply a replacement of old with an iterable of new nodes.
+
+        This method is given to the SymbolTable as a listener.
+        """
+        if self._uses is None:
+
+            return None
+
+        if rebound:
+
+            return self.invalidate()
+
+        removed = _loaded_names(old)
+        added = [_loaded_names(node) for node in new]
+        if removed is None or None in added:
+
+            return self.invalidate()
+
+        for node in removed:
+
+            self._remove(node)
+
+        for names in added:
+
+            for node in names:
+
+                self._add(Name(node))
+
+    def uses(self, name):
+        """Get a tuple of all uses of the given Name."""
+        if self._uses is None:
+
+            self._build()
+
+        return tuple(self._uses.get(name, ()))
+
+    def assignments(self, name):
+        """Get a tuple of all assignments to the given Name."""
+        if self._uses is None:
+
+            self._build()
+
+        return tuple(self._assignments.get(name, ()))
+
+    def global_names(self):
+        """Get a frozenset of the tokens named by global statements."""
+        if self._uses is None:
+
+            self._build()
+
+        return self._globals
+
+
+def _global_names(node):
+    """Get a frozenset of the tokens named by global statements in a tree."""
+    return frozenset(
+        token
+        for child in ast.walk(node)
+        if isinstance(child, ast.Global)
+        for token in child.names
+    )
+
+
+def global_names(node):
+    """Get a frozenset of the tokens named by global statements in the tree.
+
+    The result is cached with the UseChains of the tree when it has one.
+    """
+    chains = use_chains(node)
+    if chains is not None:
+
+        return chains.global_names()
+
+    return _global_names(reftools.get_top_node(node))
+
+
+def _loaded_names(node):
+    """Get a list of all loaded ast.Name nodes within a subtree.
+
+    Returns None if the subtree contains anything which binds a name or if
+    the subtree is missing parent references.
+    """
+    names = []
+    nodes = [node]
+    while len(nodes) > 0:
+
+        current = nodes.pop()
+        if not reftools.has_references(current):
+
+            return None
+
+        if isinstance(current, ast.Name):
+
+            if not isinstance(current.ctx, ast.Load):
+
+                return None
+
+            names.append(current)
+            continue
+
+        method = 'visit_' + current.__class__.__name__
+        if hasattr(nametools.NameVisitorMixin, method):
+
+            return None
+
+        nodes.extend(ast.iter_child_nodes(current))
+
+    return names
+
+
+def use_chains(node):
+    """Get the UseChains shared by all names in the tree containing node.
+
+    The cache is attached to the top node of the tree as 'use_chains'.
+    Returns None if the tree has no asttools.symbols.SymbolTable since the
+    cache relies on it to learn about changes to the tree.
+    """
+    top = reftools.get_top_node(node)
+    chains = getattr(top, 'use_chains', None)
+    if chains is not None:
+
+        return chains
+
+    table = symboltools.get_symbol_table(top)
+    if table is None:
+
+        return None
+
+    chains = UseChains(top)
+    table.subscribe(chains.update)
+    top.use_chains = chains
+    return chains
+
+
 class Name(object):
 
     """Wrapper for an ast.Name node for ease of use."""
@@ -82,6 +284,11 @@ class Name(object):
         contain all uses of the name in the module. Otherwise only uses within
         the lexical scope of the declaration are contained within the iterable.
         """
+        chains = use_chains(self._node)
+        if chains is not None:
+
+            return iter(chains.uses(self))
+
         search_path = self._declaration_scope
         if search_path is None:
 
@@ -99,6 +306,11 @@ class Name(object):
         The scoping rules for this method are identical to that which produces
         an iterable of name uses.
         """
+        chains = use_chains(self._node)
+        if chains is not None:
+
+            return iter(chains.assignments(self))
+
         return (
             n for n in self.uses
             if isinstance(n.node.ctx, ast.Store) or
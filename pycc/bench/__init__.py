@@ -0,0 +1,4 @@
+"""Benchmarks for the optimizers and the code they produce.
+
+Run the suite with 'python -m pycc.bench'.
+"""
@@ -0,0 +1,78 @@
+"""Run the benchmark suite and report the results."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import json
+import sys
+
+from ..cli.extensions import utils
+from . import corpus
+from . import runner
+
+
+def parse_args(argv=None):
+    """Get user input."""
+    parser = argparse.ArgumentParser(description='PyCC Benchmarks')
+    parser.add_argument(
+        '--extension',
+        action='append',
+        help='Name of an extension to benchmark. Defaults to all of them.',
+    )
+    parser.add_argument(
+        '--module',
+        action='append',
+        help='Name of a corpus module to benchmark. Defaults to all of them.',
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of times each measurement is repeated.',
+    )
+    parser.add_argument(
+        '--json',
+        required=False,
+        help='Path to write the results as JSON or "stdout".',
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Benchmark the optimizers against the corpus."""
+    args = parse_args(argv)
+
+    extensions = [
+        (ext, {}) for ext in utils.iter_extensions()
+        if args.extension is None or ext.name in args.extension
+    ]
+    modules = [
+        module for module in corpus.load()
+        if args.module is None or module.name in args.module
+    ]
+    if not extensions or not modules:
+
+        sys.stderr.write('No extensions or modules matched.\n')
+        sys.exit(1)
+
+    report = runner.run(modules, extensions, repeat=args.repeat)
+
+    if args.json == 'stdout':
+
+        print(json.dumps(report, indent=2, sort_keys=True))
+        return None
+
+    print(runner.format_table(report))
+    if args.json is not None:
+
+        with open(args.json, 'w') as output:
+
+            json.dump(report, output, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+
+    main()
@@ -0,0 +1,166 @@
+"""Modules used as benchmark input."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import importlib
+import inspect
+
+
+# A module in the benchmark corpus. Only modules marked as executable have
+# their run time measured. The rest are only used to measure the optimizers.
+Module = collections.namedtuple('Module', ('name', 'source', 'executable'))
+
+
+def constant_chain(length=200):
+    """Get source with a chain of constants which depend on each other."""
+    lines = ['VALUE_0 = 1']
+    for idx in range(1, length):
+
+        lines.append('VALUE_{0} = VALUE_{1} + 1'.format(idx, idx - 1))
+
+    lines.append('total = 0')
+    lines.append('for _ in range(2000):')
+    lines.append('    total += VALUE_{0} * VALUE_0'.format(length - 1))
+    return '\n'.join(lines) + '\n'
+
+
+CONSTANT_LOOP = """
+MAGIC_NUMBER = 7
+OFFSET = MAGIC_NUMBER * 3
+NAME = 'magic'
+
+total = 0
+label = ''
+for x in range(20000):
+
+    total += MAGIC_NUMBER * MAGIC_NUMBER + OFFSET
+    label = NAME + '-' + NAME
+"""
+
+FUNCTION_CALLS = """
+LIMIT = 3
+METHODS = ('GET', 'HEAD')
+
+
+def keep(item):
+    return len(item) > LIMIT
+
+
+def collect(items):
+    result = []
+    for item in items:
+
+        if keep(item) and item[0] in ['a', 'b', 'c']:
+
+            result.append(item.upper())
+
+    return result
+
+
+def summarize(items):
+    total = 0
+    for method in items:
+
+        if method in METHODS:
+
+            total += len(method)
+
+    return total
+
+
+words = ['alpha', 'beta', 'cat', 'apple', 'banana', 'cherry'] * 50
+for _ in range(50):
+
+    collect(words)
+    summarize(['GET', 'POST', 'HEAD', 'PUT'] * 50)
+"""
+
+INVARIANT_LOOP = """
+class Scaler(object):
+
+    def __init__(self, factor, offset):
+        self.factor = factor
+        self.offset = offset
+
+    def scale(self, values, n):
+        out = []
+        for value in values:
+
+            out.append(value * (n * 2 + 1) + self.offset * self.factor)
+
+        return out
+
+
+scaler = Scaler(3, 4)
+data = list(range(200))
+for _ in range(100):
+
+    scaler.scale(data, 7)
+"""
+
+FEATURE_FLAGS = """
+_DEBUG = False
+_TRACE = 0
+
+
+def handle(request):
+    if _DEBUG:
+
+        print('handling', request)
+
+    if _TRACE:
+
+        print('trace', request)
+
+    return request * 2
+
+
+total = 0
+for request in range(20000):
+
+    total += handle(request)
+"""
+
+GENERATED = """
+def function_{0}(a, b):
+    c = a + b
+    for x in range(b):
+
+        c += x * {0}
+
+    return c
+"""
+
+# Standard library modules which only define names when imported.
+REAL_WORLD = ('colorsys', 'textwrap', 'string', 'json.decoder', 'argparse')
+
+
+def synthetic():
+    """Generate the synthetic modules of the corpus."""
+    yield Module('constant_chain', constant_chain(), True)
+    yield Module('constant_loop', CONSTANT_LOOP, True)
+    yield Module('function_calls', FUNCTION_CALLS, True)
+    yield Module('invariant_loop', INVARIANT_LOOP, True)
+    yield Module('feature_flags', FEATURE_FLAGS, True)
+    yield Module(
+        'generated',
+        ''.join(GENERATED.format(idx) for idx in range(300)),
+        True,
+    )
+
+
+def real_world(names=REAL_WORLD):
+    """Generate corpus modules from the source of installed modules."""
+    for name in names:
+
+        source = inspect.getsource(importlib.import_module(name))
+        yield Module(name, source, False)
+
+
+def load():
+    """Get a tuple of all modules in the corpus."""
+    return tuple(synthetic()) + tuple(real_world())
@@ -0,0 +1,254 @@
+"""Measure the optimizers and the code they produce."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import platform
+import timeit
+import warnings
+
+try:
+
+    import tracemalloc
+
+except ImportError:
+
+    # Memory is only measured on PY34 and newer.
+    tracemalloc = None
+
+from .. import __version__
+from ..asttools import parse
+from ..cli.extensions import passes
+
+STAGES = ('parse', 'references', 'optimize', 'compile')
+
+
+class Timer(object):
+
+    """Stage runner which records the wall time of each stage."""
+
+    def __init__(self):
+        """Initialize the runner with no results."""
+        self.results = {}
+
+    def __call__(self, name, function, *args, **kwargs):
+        """Run and time a stage of the pipeline."""
+        start = timeit.default_timer()
+        value = function(*args, **kwargs)
+        self.results[name] = timeit.default_timer() - start
+        return value
+
+
+class Tracer(object):
+
+    """Stage runner which records the peak memory allocated by each stage.
+
+    Results are None if the tracemalloc module is not available.
+    """
+
+    def __init__(self):
+        """Initialize the runner with no results."""
+        self.results = {}
+
+    def __call__(self, name, function, *args, **kwargs):
+        """Run a stage of the pipeline and record its peak allocation."""
+        if tracemalloc is None:
+
+            self.results[name] = None
+            return function(*args, **kwargs)
+
+        tracemalloc.start()
+        try:
+
+            value = function(*args, **kwargs)
+            self.results[name] = tracemalloc.get_traced_memory()[1]
+
+        finally:
+
+            tracemalloc.stop()
+
+        return value
+
+
+def _compile(node):
+    """Compile an AST into a code object."""
+    ast.fix_missing_locations(node)
+    with warnings.catch_warnings():
+
+        # Inlined constants can trigger warnings about literal comparisons.
+        warnings.simplefilter('ignore', SyntaxWarning)
+        return compile(node, '<bench>', 'exec', dont_inherit=True)
+
+
+def pipeline(source, extensions, stage):
+    """Optimize and compile source with each stage run through 'stage'.
+
+    The 'extensions' value is an iterable of (extension, kwargs) pairs which
+    are run by a PassManager during the optimize stage. Returns the code
+    object.
+    """
+    node = stage('parse', ast.parse, source)
+    stage('references', parse.annotate, node)
+    stage('optimize', passes.PassManager(extensions).run, node)
+    return stage('compile', _compile, node)
+
+
+def execution_time(code, repeat):
+    """Get the best time of several executions of a module code object."""
+    return min(
+        timeit.repeat(
+            lambda: eval(code, {'__name__': '__bench__'}),
+            repeat=repeat,
+            number=1,
+        ),
+    )
+
+
+def bench_module(module, name, extensions, repeat=3):
+    """Benchmark a corpus module with a list of (extension, kwargs) pairs.
+
+    Returns a dictionary which contains the time and memory used by each
+    stage and, for executable modules, the time taken to run the original
+    and the optimized code. Memory is the peak number of bytes allocated
+    during a stage.
+    """
+    timings = []
+    code = None
+    for _ in range(repeat):
+
+        timer = Timer()
+        code = pipeline(module.source, extensions, timer)
+        timings.append(timer.results)
+
+    tracer = Tracer()
+    pipeline(module.source, extensions, tracer)
+
+    result = {
+        'module': module.name,
+        'extension': name,
+        'stages': dict(
+            (
+                stage,
+                {
+                    'seconds': min(t[stage] for t in timings),
+                    'memory': tracer.results[stage],
+                },
+            )
+            for stage in STAGES
+        ),
+        'execution': None,
+        'error': None,
+    }
+
+    if module.executable:
+
+        original = execution_time(_compile(ast.parse(module.source)), repeat)
+        optimized = execution_time(code, repeat)
+        result['execution'] = {
+            'original': original,
+            'optimized': optimized,
+            'speedup': original / optimized if optimized else None,
+        }
+
+    return result
+
+
+def run(modules, extensions, repeat=3):
+    """Benchmark each module with each extension and all of them together.
+
+    The 'extensions' value is an iterable of (extension, kwargs) pairs.
+    Returns a dictionary suitable for serializing as JSON. Results for a
+    module and extension which raised an error only contain the error.
+    """
+    extensions = tuple(extensions)
+    configurations = [
+        (ext.name, ((ext, kwargs),)) for ext, kwargs in extensions
+    ]
+    if len(extensions) > 1:
+
+        configurations.append(('all', extensions))
+
+    results = []
+    for module in modules:
+
+        for name, exts in configurations:
+
+            try:
+
+                results.append(bench_module(module, name, exts, repeat))
+
+            except Exception as exc:
+
+                # A failing optimizer is reported rather than ending the run.
+                results.append({
+                    'module': module.name,
+                    'extension': name,
+                    'stages': None,
+                    'execution': None,
+                    'error': '{0}: {1}'.format(exc.__class__.__name__, exc),
+                })
+
+    return {
+        'pycc': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'results': results,
+    }
+
+
+def _milliseconds(seconds):
+    """Format a number of seconds as milliseconds."""
+    return '-' if seconds is None else '{0:.2f}'.format(seconds * 1000)
+
+
+def format_table(report):
+    """Get a plain text table summarizing a report from 'run'."""
+    header = (
+        'module', 'extension', 'parse ms', 'refs ms', 'opt ms', 'compile ms',
+        'peak KiB', 'run ms', 'opt run ms', 'speedup',
+    )
+    rows = [header]
+    errors = []
+    for result in report['results']:
+
+        if result['error'] is not None:
+
+            errors.append('{0} ({1}): {2}'.format(
+                result['module'],
+                result['extension'],
+                result['error'],
+            ))
+            rows.append(
+                (result['module'], result['extension'], 'error') +
+                ('-',) * (len(header) - 3)
+            )
+            continue
+
+        stages = result['stages']
+        memory = [
+            stages[s]['memory'] for s in STAGES
+            if stages[s]['memory'] is not None
+        ]
+        execution = result['execution'] or {}
+        speedup = execution.get('speedup')
+        rows.append((
+            result['module'],
+            result['extension'],
+            _milliseconds(stages['parse']['seconds']),
+            _milliseconds(stages['references']['seconds']),
+            _milliseconds(stages['optimize']['seconds']),
+            _milliseconds(stages['compile']['seconds']),
+            '{0:.1f}'.format(max(memory) / 1024) if memory else '-',
+            _milliseconds(execution.get('original')),
+            _milliseconds(execution.get('optimized')),
+            '-' if speedup is None else '{0:.2f}x'.format(speedup),
+        ))
+
+    widths = [max(len(row[idx]) for row in rows) for idx in range(len(header))]
+    return '\n'.join(
+        ['  '.join(c.ljust(w) for c, w in zip(row, widths)) for row in rows] +
+        errors
+    )
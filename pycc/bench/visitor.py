@@ -0,0 +1,196 @@
+"""Compare the visitors of asttools.visitor with ast.NodeVisitor.
+
+Run the comparison with 'python -m pycc.bench.visitor'.
+"""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import ast
+import sys
+import timeit
+
+from ..asttools import visitor
+from . import corpus
+
+VISITORS = ('standard', 'lookup', 'dispatch', 'interesting')
+
+
+class StandardCounter(ast.NodeVisitor):
+
+    """ast.NodeVisitor which counts function definitions."""
+
+    def __init__(self):
+        """Initialize the count at zero."""
+        self.count = 0
+
+    def visit_FunctionDef(self, node):
+        """Count a function and visit its body."""
+        self.count += 1
+        self.generic_visit(node)
+
+
+class Counter(visitor.NodeVisitor):
+
+    """NodeVisitor which counts function definitions."""
+
+    def __init__(self, node):
+        """Initialize the count at zero."""
+        super(Counter, self).__init__(node)
+        self.count = 0
+
+    def visit_FunctionDef(self, node):
+        """Count a function and visit its body."""
+        self.count += 1
+        self.generic_visit(node)
+
+
+class LookupCounter(Counter):
+
+    """Counter which finds the visit method of each node by name.
+
+    This is how the visitors of asttools.visitor worked before they used a
+    DispatchTable.
+    """
+
+    def visit(self):
+        """Visit the nodes."""
+        while len(self._nodes) > 0:
+
+            current = self._nodes.popleft()
+            self._visited += 1
+            method = 'visit_' + current.__class__.__name__
+            getattr(self, method, self.generic_visit)(current)
+
+
+class StatementCounter(Counter):
+
+    """Counter which declares that it only needs statements."""
+
+    interesting_nodes = (ast.stmt,)
+
+
+def measure(node, repeat=3, number=10):
+    """Time each visitor counting the functions of a tree.
+
+    Returns a tuple of a dictionary which maps each name in VISITORS to the
+    best time in seconds of one walk and the number of functions each visitor
+    counted.
+    """
+    counts = {}
+
+    def standard():
+
+        counter = StandardCounter()
+        counter.visit(node)
+        counts['standard'] = counter.count
+
+    def walker(name, visitor_class):
+
+        def walk():
+
+            counter = visitor_class(node)
+            counter.visit()
+            counts[name] = counter.count
+
+        return walk
+
+    functions = {
+        'standard': standard,
+        'lookup': walker('lookup', LookupCounter),
+        'dispatch': walker('dispatch', Counter),
+        'interesting': walker('interesting', StatementCounter),
+    }
+    seconds = dict(
+        (
+            name,
+            min(timeit.repeat(functions[name], repeat=repeat, number=number)) /
+            number,
+        )
+        for name in VISITORS
+    )
+    return seconds, tuple(counts[name] for name in VISITORS)
+
+
+def run(modules, repeat=3):
+    """Time the visitors against each module.
+
+    Returns a list of dictionaries holding the name of the module and the
+    seconds taken by each visitor.
+    """
+    results = []
+    for module in modules:
+
+        seconds, _ = measure(ast.parse(module.source), repeat)
+        results.append({'module': module.name, 'seconds': seconds})
+
+    return results
+
+
+def format_table(results):
+    """Get a plain text table summarizing the results of 'run'.
+
+    Speedups are relative to ast.NodeVisitor.
+    """
+    header = ('module',) + tuple(name + ' ms' for name in VISITORS) + tuple(
+        name + ' speedup' for name in VISITORS[1:]
+    )
+    rows = [header]
+    for result in results:
+
+        seconds = result['seconds']
+        rows.append(
+            (result['module'],) +
+            tuple(
+                '{0:.3f}'.format(seconds[name] * 1000) for name in VISITORS
+            ) +
+            tuple(
+                '{0:.2f}x'.format(seconds['standard'] / seconds[name])
+                for name in VISITORS[1:]
+            )
+        )
+
+    widths = [max(len(row[idx]) for row in rows) for idx in range(len(header))]
+    return '\n'.join(
+        '  '.join(c.ljust(w) for c, w in zip(row, widths)) for row in rows
+    )
+
+
+def parse_args(argv=None):
+    """Get user input."""
+    parser = argparse.ArgumentParser(description='PyCC Visitor Benchmarks')
+    parser.add_argument(
+        '--module',
+        action='append',
+        help='Name of a corpus module to walk. Defaults to all of them.',
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of times each measurement is repeated.',
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Compare the visitors against the corpus."""
+    args = parse_args(argv)
+    modules = [
+        module for module in corpus.load()
+        if args.module is None or module.name in args.module
+    ]
+    if not modules:
+
+        sys.stderr.write('No modules matched.\n')
+        sys.exit(1)
+
+    print(format_table(run(modules, repeat=args.repeat)))
+
+
+if __name__ == '__main__':
+
+    main()
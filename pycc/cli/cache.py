@@ -0,0 +1,191 @@
+"""Content addressed cache of build results for CLI tools."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import os
+import re
+import tempfile
+
+from .. import __version__
+from ..asttools import compiler
+
+# Entries are kept in this subdirectory of the cache path so that other files
+# in the path are never counted or removed.
+ENTRY_DIR = 'pycc-build-cache'
+
+# Entries are stored under the first two characters of the hex digest with
+# the rest as the file name.
+_BUCKET_PATTERN = re.compile(r'^[0-9a-f]{2}$')
+_ENTRY_PATTERN = re.compile(r'^[0-9a-f]{62}$')
+
+# Prefix of the temporary files an entry is written to before being moved
+# into place.
+_TEMP_PREFIX = '.tmp-'
+
+
+class BuildCache(object):
+
+    """A directory of build results keyed by a hash of their inputs.
+
+    Each key combines the source bytes with the options used to build them,
+    the version of pycc, and the bytecode magic number of the interpreter.
+    Any change in one of these produces a new key.
+
+    Entries are evicted in least recently used order once the total size of
+    the cache exceeds 'max_size' bytes. Reading an entry marks it as used.
+    Only entries within the ENTRY_DIR subdirectory of the path count towards
+    the size or are ever removed.
+
+    Instances only hold the location and size limit of the cache so they can
+    be shared with worker processes.
+    """
+
+    def __init__(self, path, max_size):
+        """Initialize the cache with a directory and a size limit in bytes."""
+        self._path = path
+        self._max_size = max_size
+
+    @property
+    def path(self):
+        """Get the directory which contains the cache."""
+        return self._path
+
+    def key(self, source, options):
+        """Get the cache key for the source bytes and a string of options."""
+        digest = hashlib.sha256()
+        for part in (
+            __version__.encode('utf-8'),
+            compiler.magic_number(),
+            options.encode('utf-8'),
+            source,
+        ):
+
+            # Length prefixes keep the parts from running into each other.
+            digest.update('{0}:'.format(len(part)).encode('utf-8'))
+            digest.update(part)
+
+        return digest.hexdigest()
+
+    def _entry(self, key):
+        """Get the path of the file which holds a key."""
+        return os.path.join(self._path, ENTRY_DIR, key[:2], key[2:])
+
+    def get(self, key):
+        """Get the cached bytes for a key or None if it is not cached."""
+        entry = self._entry(key)
+        try:
+
+            with open(entry, 'rb') as cached:
+
+                body = cached.read()
+
+            os.utime(entry, None)
+
+        except (IOError, OSError):
+
+            return None
+
+        return body
+
+    def put(self, key, body):
+        """Store the bytes for a key.
+
+        The entry is written to a temporary file first and then moved into
+        place so that concurrent readers never see a partial entry.
+        """
+        entry = self._entry(key)
+        entry_dir = os.path.dirname(entry)
+        if not os.path.isdir(entry_dir):
+
+            try:
+
+                os.makedirs(entry_dir)
+
+            except OSError:
+
+                if not os.path.isdir(entry_dir):
+
+                    raise
+
+        handle, temp_path = tempfile.mkstemp(
+            prefix=_TEMP_PREFIX,
+            dir=entry_dir,
+        )
+        try:
+
+            with os.fdopen(handle, 'wb') as temp_file:
+
+                temp_file.write(body)
+
+            os.rename(temp_path, entry)
+
+        except OSError:
+
+            # Another process may have stored the same entry.
+            if os.path.exists(temp_path):
+
+                os.remove(temp_path)
+
+    def evict(self):
+        """Remove the least recently used entries until under the size limit.
+
+        Files which do not match the layout of an entry, such as temporary
+        files of entries being written, are ignored.
+
+        Returns the number of entries removed.
+        """
+        entries = []
+        total = 0
+        root = os.path.join(self._path, ENTRY_DIR)
+        buckets = os.listdir(root) if os.path.isdir(root) else ()
+        for bucket in buckets:
+
+            bucket_dir = os.path.join(root, bucket)
+            if (
+                not _BUCKET_PATTERN.match(bucket) or
+                not os.path.isdir(bucket_dir)
+            ):
+
+                continue
+
+            for file_name in os.listdir(bucket_dir):
+
+                if not _ENTRY_PATTERN.match(file_name):
+
+                    continue
+
+                entry = os.path.join(bucket_dir, file_name)
+                try:
+
+                    stat = os.stat(entry)
+
+                except OSError:
+
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, entry))
+                total += stat.st_size
+
+        removed = 0
+        for mtime, size, entry in sorted(entries):
+
+            if total <= self._max_size:
+
+                break
+
+            try:
+
+                os.remove(entry)
+
+            except OSError:
+
+                continue
+
+            total -= size
+            removed += 1
+
+        return removed
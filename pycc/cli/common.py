@@ -5,11 +5,28 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import ast
 import collections
+import contextlib
+import functools
+import json
+import multiprocessing
 import os
 import sys
 
+try:
+
+    import resource
+
+except ImportError:
+
+    # The resource module is only available on Unix platforms.
+    resource = None
+
 from ..asttools import parse
+from ..asttools import pragma
+from . import cache as cachetools
+from . import profiler as profilertools
 from .extensions import utils
 
 
@@ -25,6 +42,49 @@ def register_arguments(parser):
         required=False,
         help='Path to place the optimized result or "stdout".',
     )
+    parser.add_argument(
+        '--jobs',
+        required=False,
+        type=int,
+        default=1,
+        help='Number of modules to process in parallel.',
+    )
+    parser.add_argument(
+        '--verbose',
+        required=False,
+        action='store_true',
+        help='Report each module and the peak memory use.',
+    )
+    parser.add_argument(
+        '--cache-dir',
+        required=False,
+        help='Path of a cache used to skip unchanged modules.',
+    )
+    parser.add_argument(
+        '--cache-size',
+        required=False,
+        type=int,
+        default=256,
+        help='Maximum size of the cache in megabytes.',
+    )
+    parser.add_argument(
+        '--rounds',
+        required=False,
+        type=int,
+        default=1,
+        help='Most times to run the extensions while they change a module.',
+    )
+    parser.add_argument(
+        '--profile',
+        required=False,
+        action='store_true',
+        help='Report the time and nodes visited by each stage of the build.',
+    )
+    parser.add_argument(
+        '--profile-trace',
+        required=False,
+        help='Path to write a Chrome trace of the slowest modules.',
+    )
 
     utils.register_extensions(parser)
 
@@ -33,6 +93,17 @@ def register_arguments(parser):
 
 PySource = collections.namedtuple('PySource', ('node', 'path'))
 
+# The outcome of processing a single module. The output is only set when
+# the result must be written by the parent process. The error is a message
+# describing why the module could not be processed. Cached is True for a
+# cache hit, False for a miss, and None if no cache is in use. Events is a
+# tuple of profiler Events which is empty unless profiling is enabled.
+# Reports is a tuple of the descriptions given by each extension which ran.
+Result = collections.namedtuple(
+    'Result',
+    ('path', 'output', 'error', 'cached', 'events', 'reports'),
+)
+
 
 def abspath(path):
     """Resolve a path to an absolute path."""
@@ -45,62 +116,390 @@ def abspath(path):
     )
 
 
-def load_dir(path):
-    """Get an iterable of PySource from the given directory."""
+def find_dir(path):
+    """Get an iterable of Python file paths from the given directory.
+
+    The paths are produced in a stable, sorted order.
+    """
     for root, subdirs, files in os.walk(abspath(path)):
 
-        files = (abspath(os.path.join(root, fname)) for fname in files)
-        files = (fname for fname in files if fname.endswith('.py'))
+        subdirs.sort()
+        files = (abspath(os.path.join(root, fname)) for fname in sorted(files))
         for file_name in files:
 
-            with open(file_name, 'r') as file_handle:
+            if file_name.endswith('.py'):
 
-                source = file_handle.read()
-                yield PySource(parse.parse(source), file_name)
+                yield file_name
 
 
-def load_path(path):
-    """Get an iterable of PySource from the given path."""
+def find_path(path):
+    """Get an iterable of Python file paths from the given path."""
     path = abspath(path)
 
     if os.path.isdir(path):
 
-        return load_dir(path)
+        return find_dir(path)
 
+    return (path,)
+
+
+def source_root(path):
+    """Get the directory which output paths are relative to for a source.
+
+    This is the source itself when it is a directory or the directory which
+    holds it when it is a single file.
+    """
+    path = abspath(path)
+    if os.path.isdir(path):
+
+        return path
+
+    return os.path.dirname(path)
+
+
+def load_file(path):
+    """Get a PySource from the given file."""
     with open(path, 'r') as file_handle:
 
-        return (PySource(parse.parse(file_handle.read()), path),)
+        return PySource(parse.parse(file_handle.read(), lazy=True), path)
+
+
+def load_dir(path):
+    """Get an iterable of PySource from the given directory."""
+    for file_name in find_dir(path):
+
+        yield load_file(file_name)
+
+
+def load_path(path):
+    """Get an iterable of PySource from the given path."""
+    return (load_file(file_name) for file_name in find_path(path))
+
+
+def peak_rss():
+    """Get the peak resident set size, in bytes, of the process tree.
+
+    The value covers this process and any worker processes which have been
+    joined. Returns None if the platform does not report it.
+    """
+    if resource is None:
+
+        return None
+
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Linux reports the value in kilobytes while OS X uses bytes.
+    if sys.platform != 'darwin':
+
+        peak = peak * 1024
+
+    return peak
+
+
+def build_options(args, build):
+    """Get a string describing all build inputs other than the source.
+
+    This covers the tool which builds the output along with the enabled
+    extensions, their arguments, and the number of rounds they may run for
+    when it is more than one. Build callables which are not functions are
+    described by their repr.
+    """
+    extensions = sorted(
+        (ext.name, sorted(kwargs.items()))
+        for ext, kwargs in utils.enabled_extensions(args)
+    )
+    options = (getattr(build, '__name__', None) or repr(build), extensions)
+    rounds = getattr(args, 'rounds', None) or 1
+    if rounds > 1:
+
+        options += (rounds,)
+
+    return repr(options)
+
+
+@contextlib.contextmanager
+def _unprofiled():
+    """Stand in for a profiler stage when profiling is disabled."""
+    yield None
+
+
+def _stage(profiler, path, name):
+    """Get a context which records a stage if a profiler is given."""
+    if profiler is None:
+
+        return _unprofiled()
+
+    return profiler.stage(path, name)
 
 
-def run_optimizers(args):
-    """Optimize each of an iterable of PySource objects."""
-    sources = tuple(load_path(args.source))
-    for source in sources:
+def build_file(args, build, raw, path, profiler=None):
+    """Parse, optimize, and build the source bytes of a module.
 
-        utils.execute(args, source.node)
+    The pycc comment markers of the source are attached to the tree as
+    'pragmas' as asttools.parse.parse does. If a cli.profiler.Profiler is
+    given each stage is recorded with it.
 
-    return sources
+    Returns a tuple of the built body and the extension reports.
+    """
+    with _stage(profiler, path, 'parse'):
 
+        node = ast.parse(raw)
+        node.pragmas = pragma.scan(raw)
 
-def write_result(body, path, path_override=None):
-    """Write the body into a file in path or path_override."""
+    with _stage(profiler, path, 'references'):
+
+        parse.annotate(node, lazy=True)
+
+    reports = utils.execute(args, node, profiler=profiler, path=path)
+
+    with _stage(profiler, path, 'build'):
+
+        return build(PySource(node, path)), reports
+
+
+def process_file(args, build, output_path, cache, options, path):
+    """Load, optimize, build, and write a single module.
+
+    The 'build' value must be a callable which accepts a PySource and returns
+    the body to write. The 'output_path' value must be a callable which gives
+    the default output path for a source path. Both must be defined at the
+    module level so that they can be sent to worker processes.
+
+    If a BuildCache is given the body is taken from the cache when the source
+    and options have been built before. Otherwise the new body is stored. If
+    'build' has a 'stamp' method its value for the path is added to the key.
+    Builds which embed details of the file, such as its location or
+    modification time, use it to keep files with the same source from sharing
+    an entry.
+
+    Errors are captured in the returned Result rather than raised so that one
+    bad module does not abort the rest of a batch.
+    """
+    cached = None
+    profiler = None
+    reports = ()
+    if args.profile or args.profile_trace is not None:
+
+        profiler = profilertools.Profiler()
+
+    try:
+
+        with open(path, 'rb') as file_handle:
+
+            raw = file_handle.read()
+
+        body = None
+        if cache is not None:
+
+            stamp = getattr(build, 'stamp', None)
+            key = cache.key(
+                raw,
+                options if stamp is None else options + repr(stamp(path)),
+            )
+            body = cache.get(key)
+            cached = body is not None
+
+        if body is None:
+
+            body, reports = build_file(args, build, raw, path, profiler)
+
+            if cache is not None:
+
+                cache.put(
+                    key,
+                    body if isinstance(body, bytes) else body.encode('utf-8'),
+                )
+
+        events = profiler.events if profiler is not None else ()
+        if args.destination == 'stdout':
+
+            return Result(path, body, None, cached, events, reports)
+
+        write_result(
+            body=body,
+            path=output_path(path),
+            path_override=args.destination,
+            root=source_root(args.source),
+        )
+        return Result(path, None, None, cached, events, reports)
+
+    except Exception as exc:
+
+        return Result(
+            path,
+            None,
+            '{0}: {1}'.format(exc.__class__.__name__, exc),
+            cached,
+            profiler.events if profiler is not None else (),
+            reports,
+        )
+
+
+def process(args, build, output_path):
+    """Process every module found at the source path.
+
+    Modules are spread across 'args.jobs' processes. Results are reported in
+    the order the modules were found regardless of which finishes first.
+
+    Each module is parsed, optimized, and written before its tree is released
+    so that memory use is bounded by the largest module rather than the size
+    of the whole source tree.
+
+    Returns a tuple of the Results which contain an error.
+    """
+    cache = None
+    if args.cache_dir is not None:
+
+        cache = cachetools.BuildCache(
+            abspath(args.cache_dir),
+            args.cache_size * 1024 * 1024,
+        )
+
+    paths = find_path(args.source)
+    worker = functools.partial(
+        process_file,
+        args,
+        build,
+        output_path,
+        cache,
+        build_options(args, build),
+    )
+    pool = None
+    results = (worker(path) for path in paths)
+    if args.jobs > 1:
+
+        pool = multiprocessing.Pool(args.jobs)
+        results = pool.imap(worker, paths)
+
+    failures = []
+    count = 0
+    hits = 0
+    profiler = profilertools.Profiler()
+    try:
+
+        for result in results:
+
+            count += 1
+            hits += 1 if result.cached else 0
+            profiler.extend(result.events)
+            if args.verbose and result.error is None:
+
+                sys.stderr.write('{0}: ok{1}\n'.format(
+                    result.path,
+                    ' ({0})'.format('; '.join(result.reports))
+                    if result.reports else '',
+                ))
+
+            if result.output is not None:
+
+                write_result(result.output, result.path, 'stdout')
+
+            if result.error is not None:
+
+                failures.append(result)
+                sys.stderr.write(
+                    '{0}: {1}\n'.format(result.path, result.error),
+                )
+
+    finally:
+
+        if pool is not None:
+
+            pool.close()
+            pool.join()
+
+    if cache is not None:
+
+        evicted = cache.evict()
+        sys.stderr.write(
+            'Cache: {0} hits, {1} misses, {2} evicted.\n'.format(
+                hits,
+                count - hits,
+                evicted,
+            ),
+        )
+
+    if args.verbose:
+
+        peak = peak_rss()
+        sys.stderr.write(
+            'Processed {0} modules with {1} failures. Peak RSS: {2}\n'.format(
+                count,
+                len(failures),
+                'unknown' if peak is None else '{0:.1f} MiB'.format(
+                    peak / (1024 * 1024),
+                ),
+            ),
+        )
+
+    if args.profile:
+
+        sys.stderr.write(profiler.summary() + '\n')
+
+    if args.profile_trace is not None:
+
+        with open(abspath(args.profile_trace), 'w') as trace:
+
+            json.dump(profiler.trace(), trace)
+
+    return tuple(failures)
+
+
+def write_result(body, path, path_override=None, root=None):
+    """Write the body into a file in path or path_override.
+
+    A path_override other than 'stdout' is a directory. The file keeps its
+    path relative to 'root' within it so that modules with the same name in
+    different packages do not overwrite each other. Without a root only the
+    file name is kept.
+    """
     dest = abspath(path)
     if path_override is not None:
 
         if path_override == 'stdout':
 
-            sys.stdout.write(body)
-            sys.stdout.write('\n')
+            stdout = sys.stdout
+            if isinstance(body, bytes):
+
+                stdout = getattr(sys.stdout, 'buffer', sys.stdout)
+
+            stdout.write(body)
+            stdout.write(b'\n' if isinstance(body, bytes) else '\n')
+            stdout.flush()
             return None
 
-        file_name = os.path.split(path)[1]
-        dest = os.path.join(abspath(path_override), file_name)
+        relative = os.path.split(path)[1]
+        if root is not None:
+
+            relative = os.path.relpath(dest, abspath(root))
+            if relative.split(os.sep)[0] == os.pardir:
+
+                raise ValueError(
+                    '{0} is outside of {1}.'.format(dest, abspath(root)),
+                )
+
+        dest = os.path.join(abspath(path_override), relative)
 
     # Lazy create destination directories if they don't already exist.
     dest_dir = os.path.split(dest)[0]
     if not os.path.isdir(dest_dir):
 
-        os.makedirs(dest_dir, exists_ok=True)
+        try:
+
+            os.makedirs(dest_dir)
+
+        except OSError:
+
+            # Another worker may have created the directory first.
+            if not os.path.isdir(dest_dir):
+
+                raise
+
+    if not isinstance(body, bytes):
+
+        body = body.encode('utf-8')
 
     with open(dest, 'wb') as output:
 
@@ -6,37 +6,93 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import argparse
+import os
+import sys
 
 from ..asttools import compiler
 from . import common
 
 
+# Invalidation modes by the name used on the command line.
+MODES = {
+    'timestamp': compiler.INVALIDATION_MODE.TIMESTAMP,
+    'checked-hash': compiler.INVALIDATION_MODE.CHECKED_HASH,
+    'unchecked-hash': compiler.INVALIDATION_MODE.UNCHECKED_HASH,
+}
+
+
 def parse_args():
     """Get user input."""
     parser = argparse.ArgumentParser(description='PyCC Compiler')
     common.register_arguments(parser)
+    parser.add_argument(
+        '--invalidation-mode',
+        required=False,
+        choices=sorted(MODES),
+        default='timestamp',
+        help='How the interpreter checks that the bytecode is up to date.',
+    )
     return parser.parse_args()
 
 
-def main():
-    """Generate optimized bytecode."""
-    args = parse_args()
-    optimized = common.run_optimizers(args)
-    bc_compiler = compiler.ByteCodeCompiler()
+class BytecodeBuilder(object):
+
+    """Build callable which generates bytecode for a module.
+
+    Instances only hold the name of the invalidation mode so that they can be
+    sent to worker processes.
+    """
+
+    def __init__(self, mode='timestamp'):
+        """Initialize the builder with the name of an invalidation mode."""
+        self._mode = mode
+
+    def __repr__(self):
+        """Get a description of the builder for use in cache keys."""
+        return 'BytecodeBuilder({0!r})'.format(str(self._mode))
+
+    def stamp(self, path):
+        """Get the build inputs which come from the file and not its source.
+
+        The absolute path of the file is embedded in the bytecode as the name
+        of its code objects. Timestamp bytecode also records the modification
+        time and size of the source file. All of these must be part of the
+        cache key.
+        """
+        location = common.abspath(path)
+        if MODES[self._mode] is not compiler.INVALIDATION_MODE.TIMESTAMP:
 
-    for module in optimized:
+            return location
 
-        bytecode = bc_compiler(
+        stat = os.stat(path)
+        return location, int(stat.st_mtime), stat.st_size
+
+    def __call__(self, module):
+        """Generate bytecode for a module."""
+        return compiler.ByteCodeCompiler(MODES[self._mode])(
             module.node,
-            location=common.abspath(module.path)
-        )
-        common.write_result(
-            body=bytecode,
-            path=module.path + 'c',
-            path_override=args.destination
+            location=common.abspath(module.path),
         )
 
 
+def output_path(path):
+    """Get the default path of the bytecode for a module."""
+    return path + 'c'
+
+
+def main():
+    """Generate optimized bytecode."""
+    args = parse_args()
+    failures = common.process(
+        args,
+        BytecodeBuilder(args.invalidation_mode),
+        output_path,
+    )
+    if failures:
+
+        sys.exit(1)
+
+
 if __name__ == '__main__':
 
     main()
@@ -0,0 +1,34 @@
+"""Core extension for caching the methods called within loops."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from . import interfaces
+from ...optimizers import attrcache
+
+
+class AttributeCacheExtension(interfaces.CliExtension):
+
+    """A CLI extension which looks up the methods called in loops once."""
+
+    name = 'attrcache'
+    description = (
+        'Look up methods called within loops once before the loop, assuming '
+        'the methods are not replaced while it runs.'
+    )
+    arguments = ()
+    # Fused comprehensions and folded strings are never cached so the
+    # extensions which produce them run first and may share a traversal.
+    after = ('fusion', 'strings')
+
+    @staticmethod
+    def optimize(node):
+        """Cache the methods called within loops."""
+        return attrcache.optimize(node)
+
+    @staticmethod
+    def report(result):
+        """Describe the calls which were changed."""
+        return '{0} method calls cached'.format(result.cached)
@@ -20,4 +20,12 @@ class ConstantInlineExtension(interfaces.CliExtension):
     @staticmethod
     def optimize(node):
         """In-line all constant values."""
-        constant.optimize(node)
+        return constant.optimize(node)
+
+    @staticmethod
+    def report(result):
+        """Describe the passes which were made over the tree."""
+        return '{0} passes visiting {1} nodes'.format(
+            len(result.touched),
+            sum(result.touched),
+        )
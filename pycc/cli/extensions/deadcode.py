@@ -0,0 +1,41 @@
+"""Core extension for dead code elimination."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from . import interfaces
+from ...optimizers import deadcode
+
+
+class DeadCodeExtension(interfaces.CliExtension):
+
+    """A CLI extension which removes code that never runs or is never used."""
+
+    name = 'deadcode'
+    description = 'Remove unreachable code and unused private constants.'
+    arguments = ()
+    # Inlined constants leave branches which can never run.
+    after = ('constants',)
+
+    @staticmethod
+    def optimize(node):
+        """Remove unreachable code and unused private constants."""
+        return deadcode.optimize(node)
+
+    @staticmethod
+    def changed(result):
+        """Determine if any code was removed.
+
+        Unused private names are removed after the tree has been visited.
+        """
+        return result.pruned > 0 or len(result.unused) > 0
+
+    @staticmethod
+    def report(result):
+        """Describe the code which was removed."""
+        return '{0} statements pruned, {1} unused names removed'.format(
+            result.pruned,
+            len(result.unused),
+        )
@@ -0,0 +1,39 @@
+"""Core extension for fusing comprehensions."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from . import interfaces
+from ...optimizers import localize
+from ...optimizers import fusion
+
+
+class FusionExtension(interfaces.CliExtension):
+
+    """A CLI extension which removes intermediate lists and lambdas."""
+
+    name = 'fusion'
+    description = 'Merge comprehensions with the calls which consume them.'
+    arguments = ()
+
+    @staticmethod
+    def optimize(node):
+        """Fuse comprehensions and the calls around them."""
+        return fusion.optimize(node)
+
+    @staticmethod
+    def transformer(node):
+        """Get a ComprehensionFuser for the node."""
+        return fusion.ComprehensionFuser(node, localize.ModuleNames(node))
+
+    @staticmethod
+    def result(transformer):
+        """Get the FusionResult of a ComprehensionFuser which ran."""
+        return fusion.FusionResult(fused=transformer.fused)
+
+    @staticmethod
+    def report(result):
+        """Describe the comprehensions which were merged."""
+        return '{0} comprehensions fused'.format(result.fused)
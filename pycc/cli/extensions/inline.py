@@ -0,0 +1,35 @@
+"""Core extension for inlining small functions."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from . import interfaces
+from ...optimizers import inline
+
+
+class InlineExtension(interfaces.CliExtension):
+
+    """A CLI extension which inlines calls to small functions."""
+
+    name = 'inline'
+    description = 'Inline calls to small module level functions.'
+    arguments = (
+        interfaces.Arg(
+            'max-size',
+            int,
+            'Largest return expression to inline, in AST nodes. '
+            'Defaults to {0}.'.format(inline.MAX_SIZE),
+        ),
+    )
+
+    @staticmethod
+    def optimize(node, max_size=inline.MAX_SIZE):
+        """Inline calls to small module level functions."""
+        return inline.optimize(node, max_size=max_size)
+
+    @staticmethod
+    def report(result):
+        """Describe the call sites which were inlined."""
+        return '{0} call sites inlined'.format(result.inlined)
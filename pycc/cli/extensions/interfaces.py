@@ -25,11 +25,50 @@ class CliExtension(object):
     # passed into the optimize metehod. All dashes are converted to underscores
     # when passing args to optimize.
     arguments = (Arg('num-tries', int, 'Number of times to try something.'),)
+    # After must be an iterable of extension names. When any of them are
+    # enabled along with this extension they are run first.
+    after = ()
 
     @staticmethod
     def optimize(node, *args, **kwargs):
         """Run the optimizer for the given node.
 
-        Arguments given on the CLI will be passed in as keyword arguments.
+        Arguments given on the CLI will be passed in as keyword arguments. Any
+        value returned is given to 'report'.
         """
         raise NotImplementedError()
+
+    @staticmethod
+    def report(result):
+        """Get a short description of the value returned by 'optimize'.
+
+        The description is shown for each module when the CLI tools are run
+        in verbose mode. Returns None if there is nothing to report.
+        """
+        return None
+
+    @staticmethod
+    def changed(result):
+        """Determine if the value returned by 'optimize' shows a change.
+
+        Replacements made by an asttools.visitor.NodeTransformer are always
+        counted as changes. Extensions which change the tree in any other way
+        must return True for results which show such a change.
+        """
+        return False
+
+    @staticmethod
+    def transformer(node, *args, **kwargs):
+        """Get an asttools.visitor.NodeTransformer which optimizes the node.
+
+        Extensions which do all of their work in one traversal may return a
+        transformer which has not been run so that it can share a traversal
+        with other extensions. The arguments are those given to 'optimize'.
+        Returns None if the extension must be run through 'optimize'.
+        """
+        return None
+
+    @staticmethod
+    def result(transformer):
+        """Get the value 'optimize' returns from a transformer which ran."""
+        raise NotImplementedError()
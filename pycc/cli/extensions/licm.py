@@ -0,0 +1,34 @@
+"""Core extension for loop invariant code motion."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from . import interfaces
+from ...optimizers import licm
+
+
+class LoopInvariantExtension(interfaces.CliExtension):
+
+    """A CLI extension which hoists invariant expressions out of loops."""
+
+    name = 'licm'
+    description = 'Hoist loop invariant expressions out of loops.'
+    arguments = (
+        interfaces.Arg(
+            'allow-attributes',
+            bool,
+            'Also hoist attribute loads, assuming they have no side effects.',
+        ),
+    )
+
+    @staticmethod
+    def optimize(node, allow_attributes=False):
+        """Hoist loop invariant expressions out of loops."""
+        return licm.optimize(node, allow_attributes=allow_attributes)
+
+    @staticmethod
+    def report(result):
+        """Describe the expressions which were hoisted."""
+        return '{0} expressions hoisted'.format(result.hoisted)
@@ -0,0 +1,37 @@
+"""Core extension for binding globals to local names."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from . import interfaces
+from ...optimizers import localize
+
+
+class LocalizeExtension(interfaces.CliExtension):
+
+    """A CLI extension which binds globals used in loops to local names."""
+
+    name = 'localize'
+    description = 'Bind builtins and module globals used in loops to locals.'
+    arguments = ()
+
+    @staticmethod
+    def optimize(node):
+        """Bind globals used in loops to local names."""
+        return localize.optimize(node)
+
+    @staticmethod
+    def changed(result):
+        """Determine if any names were bound.
+
+        Names are bound by editing the tree in place rather than through a
+        NodeTransformer.
+        """
+        return len(result.bound) > 0
+
+    @staticmethod
+    def report(result):
+        """Describe the names which were bound."""
+        return '{0} names bound'.format(len(result.bound))
@@ -0,0 +1,39 @@
+"""Core extension for rewriting membership tests."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from . import interfaces
+from ...optimizers import localize
+from ...optimizers import membership
+
+
+class MembershipExtension(interfaces.CliExtension):
+
+    """A CLI extension which rewrites displays that are only searched."""
+
+    name = 'membership'
+    description = 'Search constant tuples and sets instead of new lists.'
+    arguments = ()
+
+    @staticmethod
+    def optimize(node):
+        """Rewrite displays which are only searched or iterated."""
+        return membership.optimize(node)
+
+    @staticmethod
+    def transformer(node):
+        """Get a MembershipRewriter for the node."""
+        return membership.MembershipRewriter(node, localize.ModuleNames(node))
+
+    @staticmethod
+    def result(transformer):
+        """Get the MembershipResult of a MembershipRewriter which ran."""
+        return membership.MembershipResult(rewritten=transformer.rewritten)
+
+    @staticmethod
+    def report(result):
+        """Describe the displays which were rewritten."""
+        return '{0} displays rewritten'.format(result.rewritten)
@@ -0,0 +1,188 @@
+"""Utilities for running several extensions over a tree together."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import contextlib
+
+from ...asttools import visitor
+from . import interfaces
+
+
+def order(extensions):
+    """Sort (extension, kwargs) pairs so that dependencies run first.
+
+    An extension runs after every enabled extension named in its optional
+    'after' value. Names of extensions which are not enabled are ignored.
+    Otherwise the extensions keep the order they were given in.
+
+    Raises ValueError if the extensions depend on each other in a cycle.
+    """
+    pending = list(extensions)
+    names = set(ext.name for ext, _ in pending)
+    done = set()
+    ordered = []
+    while pending:
+
+        for idx, (ext, kwargs) in enumerate(pending):
+
+            after = getattr(ext, 'after', ())
+            if all(name in done or name not in names for name in after):
+
+                break
+
+        else:
+
+            raise ValueError('Extensions depend on each other: {0}.'.format(
+                ', '.join(ext.name for ext, _ in pending),
+            ))
+
+        pending.pop(idx)
+        done.add(ext.name)
+        ordered.append((ext, kwargs))
+
+    return ordered
+
+
+def group(extensions):
+    """Split ordered (extension, kwargs) pairs into lists run together.
+
+    Consecutive extensions which provide a transformer share a list so that
+    they can be run in one traversal. Every other extension is alone.
+    """
+    groups = []
+    fusable = False
+    for ext, kwargs in extensions:
+
+        provides = getattr(
+            ext,
+            'transformer',
+            interfaces.CliExtension.transformer,
+        ) is not interfaces.CliExtension.transformer
+        if provides and fusable:
+
+            groups[-1].append((ext, kwargs))
+
+        else:
+
+            groups.append([(ext, kwargs)])
+
+        fusable = provides
+
+    return groups
+
+
+@contextlib.contextmanager
+def _unprofiled():
+    """Stand in for a profiler stage when profiling is disabled."""
+    yield None
+
+
+class PassManager(object):
+
+    """Runs extensions in dependency order with few traversals of the tree.
+
+    Extensions are sorted with 'order' and split with 'group'. Extensions
+    which provide a transformer are run together by a single
+    asttools.visitor.FusedTransformer. Others run through their optimize
+    method.
+
+    The extensions may be run for up to 'rounds' rounds. After the first
+    round a group is only run again if another group changed the tree since
+    it last ran. Running stops early once a round changes nothing. A fused
+    group changed the tree if any of its transformers did. Any other group
+    changed it if a NodeTransformer replaced a node while it ran or if the
+    'changed' method of one of its extensions says so.
+    """
+
+    def __init__(self, extensions, rounds=1):
+        """Initialize the manager with (extension, kwargs) pairs."""
+        self._groups = group(order(extensions))
+        self._rounds = rounds
+
+    @property
+    def groups(self):
+        """Get the lists of (extension, kwargs) pairs run together."""
+        return self._groups
+
+    def _run(self, members, node):
+        """Run a group.
+
+        Returns a list of (extension, result) pairs and True if the tree was
+        changed.
+        """
+        transformers = []
+        if len(members) > 1:
+
+            transformers = [
+                ext.transformer(node, **kwargs) for ext, kwargs in members
+            ]
+
+        if transformers and None not in transformers:
+
+            fused = visitor.FusedTransformer(node, transformers)
+            fused.visit()
+            return [
+                (ext, ext.result(transformer))
+                for (ext, _), transformer in zip(members, transformers)
+            ], fused.modified
+
+        with visitor.counting() as counter:
+
+            results = [
+                (ext, ext.optimize(node, **kwargs))
+                for ext, kwargs in members
+            ]
+
+        return results, counter.replaced > 0 or any(
+            getattr(ext, 'changed', interfaces.CliExtension.changed)(result)
+            for ext, result in results
+        )
+
+    def run(self, node, profiler=None, path=None):
+        """Run the extensions over a tree.
+
+        If a cli.profiler.Profiler is given each group is recorded as a stage
+        of the file at 'path' named after the extensions in it.
+
+        Returns a list of (extension, result) pairs in the order the
+        extensions ran.
+        """
+        results = []
+        # Number of changes to the tree and the count seen by each group.
+        changes = 0
+        seen = [None] * len(self._groups)
+        for _ in range(self._rounds):
+
+            for idx, members in enumerate(self._groups):
+
+                if seen[idx] == changes:
+
+                    continue
+
+                stage = _unprofiled()
+                if profiler is not None:
+
+                    stage = profiler.stage(
+                        path,
+                        '+'.join(ext.name for ext, _ in members),
+                    )
+
+                with stage:
+
+                    ran, changed = self._run(members, node)
+
+                results.extend(ran)
+                if changed:
+
+                    changes += 1
+
+                seen[idx] = changes
+
+            if all(count == changes for count in seen):
+
+                break
+
+        return results
@@ -0,0 +1,46 @@
+"""Core extension for folding string formatting."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from . import interfaces
+from ... import pycompat
+from ...optimizers import localize
+from ...optimizers import strings
+
+
+class StringExtension(interfaces.CliExtension):
+
+    """A CLI extension which builds strings with a single operation."""
+
+    name = 'strings'
+    description = 'Fold string formatting and concatenation.'
+    arguments = ()
+    # Inlined constants become literal parts which can be folded.
+    after = ('constants',)
+
+    @staticmethod
+    def optimize(node):
+        """Fold string formatting and concatenation."""
+        return strings.optimize(node)
+
+    @staticmethod
+    def transformer(node):
+        """Get a StringFolder for the node."""
+        if pycompat.PY2:
+
+            return None
+
+        return strings.StringFolder(node, localize.ModuleNames(node))
+
+    @staticmethod
+    def result(transformer):
+        """Get the StringResult of a StringFolder which ran."""
+        return strings.StringResult(folded=transformer.folded)
+
+    @staticmethod
+    def report(result):
+        """Describe the expressions which were folded."""
+        return '{0} string expressions folded'.format(result.folded)
@@ -0,0 +1,43 @@
+"""Core extension for loop unrolling."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from . import interfaces
+from ...optimizers import unroll
+
+
+class UnrollExtension(interfaces.CliExtension):
+
+    """A CLI extension which unrolls loops over small constant sequences."""
+
+    name = 'unroll'
+    description = 'Unroll loops over small constant sequences.'
+    arguments = (
+        interfaces.Arg(
+            'max-trips',
+            int,
+            'Most iterations of a loop to unroll. '
+            'Defaults to {0}.'.format(unroll.MAX_TRIPS),
+        ),
+        interfaces.Arg(
+            'max-size',
+            int,
+            'Largest loop body to unroll, in AST nodes. '
+            'Defaults to {0}.'.format(unroll.MAX_SIZE),
+        ),
+    )
+    # Inlined constants give loops a known number of iterations.
+    after = ('constants',)
+
+    @staticmethod
+    def optimize(node, max_trips=unroll.MAX_TRIPS, max_size=unroll.MAX_SIZE):
+        """Unroll loops over small constant sequences."""
+        return unroll.optimize(node, max_trips=max_trips, max_size=max_size)
+
+    @staticmethod
+    def report(result):
+        """Describe the loops which were unrolled."""
+        return '{0} loops unrolled'.format(result.unrolled)
@@ -7,6 +7,8 @@ from __future__ import unicode_literals
 
 import pkg_resources
 
+from . import passes
+
 
 def iter_extensions():
     """Get an iterable of extensions."""
@@ -45,8 +47,12 @@ def register_extensions(parser):
                 )
 
 
-def execute(args, node):
-    """Run the enabled extensions."""
+def enabled_extensions(args):
+    """Get an iterable of the enabled extensions and their arguments.
+
+    Each item is a tuple of the extension and a dictionary of the keyword
+    arguments which must be given to its optimize method.
+    """
     args_dict = vars(args)
     possible_extensions = []
     for key in args_dict:
@@ -55,12 +61,12 @@ def execute(args, node):
 
             possible_extensions.append(key)
 
-    enabled_extensions = (
+    extensions = (
         ext for ext in iter_extensions()
         if ext.name in possible_extensions
     )
 
-    for ext in enabled_extensions:
+    for ext in extensions:
 
         kwargs = {}
         for arg in ext.arguments:
@@ -74,4 +80,29 @@ def execute(args, node):
 
                 kwargs[arg.name.replace('-', '_')] = val
 
-        ext.optimize(node, **kwargs)
+        yield ext, kwargs
+
+
+def execute(args, node, profiler=None, path=None):
+    """Run the enabled extensions.
+
+    Extensions are run by a passes.PassManager for as many rounds as the
+    'rounds' argument allows. If a cli.profiler.Profiler is given each
+    traversal is recorded as a stage of the file at 'path'.
+
+    Returns a tuple of strings describing what each extension reported.
+    """
+    manager = passes.PassManager(
+        enabled_extensions(args),
+        rounds=getattr(args, 'rounds', None) or 1,
+    )
+    reports = []
+    for ext, result in manager.run(node, profiler=profiler, path=path):
+
+        report = getattr(ext, 'report', None)
+        message = report(result) if report is not None else None
+        if message is not None:
+
+            reports.append('{0}: {1}'.format(ext.name, message))
+
+    return tuple(reports)
@@ -0,0 +1,171 @@
+"""Timing and node count instrumentation for CLI builds."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import contextlib
+import os
+import time
+import timeit
+
+from ..asttools import visitor
+
+# A single run of one stage for one file. The start is a wall clock time in
+# seconds and the duration is measured with the most precise timer available.
+# Visited and replaced are the node totals of all pycc visitors in the stage.
+Event = collections.namedtuple(
+    'Event',
+    ('path', 'stage', 'start', 'duration', 'visited', 'replaced', 'pid'),
+)
+
+
+class Profiler(object):
+
+    """Collects an Event for each stage run while processing files.
+
+    Events recorded in worker processes can be sent back to the parent and
+    merged with 'extend' so that one Profiler covers the whole build.
+    """
+
+    def __init__(self):
+        """Initialize the profiler with no events."""
+        self._events = []
+
+    @property
+    def events(self):
+        """Get a tuple of all recorded events."""
+        return tuple(self._events)
+
+    def extend(self, events):
+        """Add events recorded by another profiler."""
+        self._events.extend(events)
+
+    @contextlib.contextmanager
+    def stage(self, path, name):
+        """Record an Event for the code run within the context."""
+        with visitor.counting() as counter:
+
+            start = time.time()
+            begin = timeit.default_timer()
+            try:
+
+                yield counter
+
+            finally:
+
+                self._events.append(Event(
+                    path,
+                    name,
+                    start,
+                    timeit.default_timer() - begin,
+                    counter.visited,
+                    counter.replaced,
+                    os.getpid(),
+                ))
+
+    def stages(self):
+        """Get an ordered mapping of stage names to their events."""
+        stages = collections.OrderedDict()
+        for event in self._events:
+
+            stages.setdefault(event.stage, []).append(event)
+
+        return stages
+
+    def files(self):
+        """Get a list of (total duration, path) pairs, slowest first."""
+        totals = collections.OrderedDict()
+        for event in self._events:
+
+            totals[event.path] = totals.get(event.path, 0) + event.duration
+
+        return sorted(
+            ((total, path) for path, total in totals.items()),
+            key=lambda pair: pair[0],
+            reverse=True,
+        )
+
+    def summary(self, limit=10):
+        """Get a plain text table of each stage and the slowest files."""
+        rows = [('stage', 'calls', 'total ms', 'mean ms', 'visited',
+                 'replaced')]
+        for name, events in self.stages().items():
+
+            total = sum(e.duration for e in events)
+            rows.append((
+                name,
+                str(len(events)),
+                '{0:.2f}'.format(total * 1000),
+                '{0:.2f}'.format(total * 1000 / len(events)),
+                str(sum(e.visited for e in events)),
+                str(sum(e.replaced for e in events)),
+            ))
+
+        widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+        lines = [
+            '  '.join(c.ljust(w) for c, w in zip(row, widths)).rstrip()
+            for row in rows
+        ]
+
+        slowest = self.files()[:limit]
+        if slowest:
+
+            lines.append('')
+            lines.append('Slowest files:')
+
+        for total, path in slowest:
+
+            lines.append('{0:10.2f} ms  {1} ({2})'.format(
+                total * 1000,
+                path,
+                ', '.join(
+                    '{0} {1:.2f}'.format(e.stage, e.duration * 1000)
+                    for e in self._events if e.path == path
+                ),
+            ))
+
+        return '\n'.join(lines)
+
+    def trace(self, limit=10):
+        """Get the events of the slowest files in the Chrome trace format.
+
+        The result is a dictionary which can be serialized as JSON and loaded
+        by chrome://tracing or any viewer which accepts trace event files.
+        Each file is shown on its own row within the process that built it.
+        """
+        paths = [path for total, path in self.files()[:limit]]
+        events = []
+        for tid, path in enumerate(paths):
+
+            events.append({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': next(e.pid for e in self._events if e.path == path),
+                'tid': tid,
+                'args': {'name': path},
+            })
+            for event in self._events:
+
+                if event.path != path:
+
+                    continue
+
+                events.append({
+                    'name': event.stage,
+                    'cat': 'pycc',
+                    'ph': 'X',
+                    'ts': event.start * 1000000,
+                    'dur': event.duration * 1000000,
+                    'pid': event.pid,
+                    'tid': tid,
+                    'args': {
+                        'path': path,
+                        'visited': event.visited,
+                        'replaced': event.replaced,
+                    },
+                })
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
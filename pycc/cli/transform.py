@@ -6,6 +6,7 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import argparse
+import sys
 
 from ..asttools import compiler
 from . import common
@@ -18,22 +19,23 @@ def parse_args():
     return parser.parse_args()
 
 
+def build_source(module):
+    """Generate optimized source code for a module."""
+    return compiler.SourceCodeCompiler()(module.node)
+
+
+def output_path(path):
+    """Get the default path of the optimized source for a module."""
+    return path.replace('.py', '') + '_optimized.py'
+
+
 def main():
     """Generate optimized source code."""
     args = parse_args()
-    optimized = common.run_optimizers(args)
-    source_compiler = compiler.SourceCodeCompiler()
-
-    for module in optimized:
-
-        bytecode = source_compiler(
-            module.node
-        )
-        common.write_result(
-            body=bytecode,
-            path=module.path.replace('.py', '') + '_optimized.py',
-            path_override=args.destination
-        )
+    failures = common.process(args, build_source, output_path)
+    if failures:
+
+        sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,211 @@
+"""Import hook which optimizes modules as they are imported.
+
+Installing the hook places a finder at the front of sys.meta_path. Python
+source modules found by the standard path finder are loaded by a loader which
+runs the requested pycc.optimizers extensions before compiling the module.
+The optimized bytecode is cached in __pycache__ under a pycc specific tag so
+that later processes load it without optimizing the module again.
+
+The hook requires the importlib loader APIs added in PY34.
+"""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import hashlib
+import os
+import sys
+
+try:
+
+    from importlib import machinery
+    from importlib import util
+
+except ImportError:
+
+    # PY2 and PY33 do not provide the loader APIs used by this module.
+    machinery = None
+    util = None
+
+from . import __version__
+from .asttools import parse
+from .cli.extensions import passes
+from .cli.extensions import utils
+
+
+def _resolve_extensions(extensions, arguments):
+    """Get a tuple of (extension, kwargs) pairs from extension names."""
+    available = dict((ext.name, ext) for ext in utils.iter_extensions())
+    resolved = []
+    for name in extensions:
+
+        if name not in available:
+
+            raise ValueError('Unknown extension: {0}.'.format(name))
+
+        resolved.append((available[name], dict(arguments.get(name, {}))))
+
+    return tuple(resolved)
+
+
+def cache_tag(extensions):
+    """Get the bytecode cache tag for a tuple of (extension, kwargs) pairs.
+
+    The tag changes whenever the pycc version, the extensions, or their
+    arguments change so that stale bytecode is never loaded.
+    """
+    description = repr((
+        __version__,
+        [(ext.name, sorted(kwargs.items())) for ext, kwargs in extensions],
+    ))
+    digest = hashlib.sha1(description.encode('utf-8')).hexdigest()
+    return 'pycc{0}'.format(digest[:8])
+
+
+# The loader can only be defined when the importlib machinery exists.
+_BaseLoader = machinery.SourceFileLoader if machinery is not None else object
+
+
+class OptimizingLoader(_BaseLoader):
+
+    """Source loader which optimizes modules before compiling them.
+
+    The standard loader handles reading the source and validating and writing
+    bytecode. This loader only redirects the bytecode file to a tagged path
+    and replaces the compile step. If an extension raises an error the module
+    is compiled without optimization instead.
+    """
+
+    def __init__(self, fullname, path, extensions, tag):
+        """Initialize the loader with extensions and a cache tag."""
+        super(OptimizingLoader, self).__init__(fullname, path)
+        self._extensions = extensions
+        self._tag = tag
+
+    def _redirect(self, path):
+        """Swap the standard bytecode path for the tagged one."""
+        if path == util.cache_from_source(self.path):
+
+            return util.cache_from_source(self.path, optimization=self._tag)
+
+        return path
+
+    def get_data(self, path):
+        """Read source or bytecode, using the tagged bytecode path."""
+        return super(OptimizingLoader, self).get_data(self._redirect(path))
+
+    def set_data(self, path, data, *args, **kwargs):
+        """Write bytecode to the tagged bytecode path."""
+        return super(OptimizingLoader, self).set_data(
+            self._redirect(path),
+            data,
+            *args,
+            **kwargs
+        )
+
+    def source_to_code(self, data, path, *args, **kwargs):
+        """Optimize and compile the source of a module."""
+        try:
+
+            node = parse.parse(data, path, lazy=True)
+            passes.PassManager(self._extensions).run(node)
+            ast.fix_missing_locations(node)
+            return compile(node, path, 'exec', dont_inherit=True)
+
+        except Exception:
+
+            return super(OptimizingLoader, self).source_to_code(
+                data,
+                path,
+                *args,
+                **kwargs
+            )
+
+
+class OptimizingFinder(object):
+
+    """Meta path finder which loads Python source with an OptimizingLoader.
+
+    Only modules found by the standard path finder are affected. If 'paths'
+    is given only modules within those directories are optimized.
+    """
+
+    def __init__(self, extensions, paths=None):
+        """Initialize the finder with (extension, kwargs) pairs."""
+        self._extensions = extensions
+        self._tag = cache_tag(extensions)
+        self._paths = None
+        if paths is not None:
+
+            self._paths = tuple(
+                os.path.join(os.path.realpath(p), '') for p in paths
+            )
+
+    def find_spec(self, fullname, path=None, target=None):
+        """Find a module spec which uses the OptimizingLoader."""
+        spec = machinery.PathFinder.find_spec(fullname, path)
+        if spec is None or type(spec.loader) is not machinery.SourceFileLoader:
+
+            return None
+
+        if self._paths is not None and not os.path.realpath(
+            spec.origin,
+        ).startswith(self._paths):
+
+            return None
+
+        spec.loader = OptimizingLoader(
+            fullname,
+            spec.origin,
+            self._extensions,
+            self._tag,
+        )
+        if spec.cached is not None:
+
+            spec.cached = util.cache_from_source(
+                spec.origin,
+                optimization=self._tag,
+            )
+
+        return spec
+
+    def invalidate_caches(self):
+        """Nothing is cached by the finder."""
+        return None
+
+
+def install(extensions=(), arguments=None, paths=None):
+    """Optimize modules imported from now on with the given extensions.
+
+    The 'extensions' value is an iterable of extension names as registered
+    under the pycc.optimizers entry point. They are run in the order given.
+    The 'arguments' value may map extension names to a dictionary of keyword
+    arguments for their optimize method. If 'paths' is given only modules
+    loaded from within those directories are optimized.
+
+    Returns the installed finder.
+    """
+    if machinery is None:
+
+        raise RuntimeError('The import hook requires Python 3.4 or newer.')
+
+    finder = OptimizingFinder(
+        _resolve_extensions(extensions, arguments or {}),
+        paths=paths,
+    )
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+def uninstall(finder=None):
+    """Remove an installed finder or, by default, all pycc finders."""
+    sys.meta_path[:] = [
+        f for f in sys.meta_path
+        if not (
+            f is finder or
+            (finder is None and isinstance(f, OptimizingFinder))
+        )
+    ]
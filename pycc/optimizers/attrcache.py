@@ -0,0 +1,301 @@
+"""Optimizer for caching the methods called within loops."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import collections
+
+from ..asttools import pragma
+from ..asttools import scope
+from ..asttools import symbols
+from ..asttools import visitor
+from . import licm
+from . import localize
+
+TEMP_PREFIX = '_pycc_attr_'
+
+# Marker which disables the optimizer for a single function.
+PRAGMA = 'no-attr-cache'
+
+CacheResult = collections.namedtuple('CacheResult', ('cached',))
+
+
+def _receiver(node):
+    """Get the base ast.Name of a chain of attribute loads or None."""
+    current = node
+    while isinstance(current, ast.Attribute):
+
+        if not isinstance(current.ctx, ast.Load):
+
+            return None
+
+        current = current.value
+
+    if isinstance(current, ast.Name) and isinstance(current.ctx, ast.Load):
+
+        return current
+
+    return None
+
+
+def _attributes(node):
+    """Get the names of the attributes loaded by a chain of attributes."""
+    found = set()
+    while isinstance(node, ast.Attribute):
+
+        found.add(node.attr)
+        node = node.value
+
+    return found
+
+
+def _loop_calls(loop):
+    """Generate the method calls run on every iteration of a loop.
+
+    Only calls which are evaluated whenever the body starts, as found by
+    licm.region and licm.operands, are included. Calls which run under some
+    condition, such as within an 'if' statement or after a nested loop, are
+    not. Nor are calls in the iterable of a 'for' loop, in the 'else'
+    clause, or in nested namespaces.
+    """
+    for expression, consumed in licm.region(loop):
+
+        nodes = [(expression, consumed)]
+        while len(nodes) > 0:
+
+            current, consumed = nodes.pop()
+            if isinstance(current, ast.Call) and isinstance(
+                current.func,
+                ast.Attribute,
+            ):
+
+                yield current
+
+            nodes.extend(reversed(licm.operands(current, consumed)))
+
+
+class AttributeCacher(visitor.NodeTransformer):
+
+    """NodeTransformer which looks up the methods called in loops once.
+
+    A call such as 'result.append(x)' which runs on every iteration of a
+    loop has the bound method 'result.append' assigned to a temporary name
+    before the loop and the call uses the temporary instead. Calls which
+    only run under some condition are left alone. The receiver may be a
+    local name or a module name, or a chain of attribute loads starting from
+    one, such as 'self._buf.write'.
+
+    A method is cached if the receiver name is never rebound in the loop, no
+    attribute in the chain is ever assigned or deleted, and neither
+    'setattr' nor 'delattr' is called. A chain is only cached if the loop
+    calls no other method through the name it starts from. A local receiver
+    must be a parameter or be assigned by a statement which always runs
+    before the loop. Each function is processed once and functions marked
+    with '# pycc: no-attr-cache' on the line of the definition or at the top
+    of the body are skipped.
+    """
+
+    # Only functions are visited so expressions are never walked.
+    interesting_nodes = (ast.stmt,)
+
+    def __init__(self, node, names):
+        """Initialize the cacher with the ModuleNames of the tree."""
+        super(AttributeCacher, self).__init__(node)
+        self._names = names
+        self._pragmas = pragma.get_pragmas(node)
+        self._temps = 0
+        self._cached = 0
+
+        # Locals which nested functions may rebind while a loop runs.
+        self._nonlocal = set(
+            token
+            for child in ast.walk(node)
+            if child.__class__.__name__ == 'Nonlocal'
+            for token in child.names
+        )
+
+    @property
+    def cached(self):
+        """Get the number of calls which use a cached method."""
+        return self._cached
+
+    def _temp(self):
+        """Get the token of a new temporary name."""
+        token = TEMP_PREFIX + str(self._temps)
+        self._temps += 1
+        while token in self._names.tokens:
+
+            token = TEMP_PREFIX + str(self._temps)
+            self._temps += 1
+
+        return token
+
+    def _cacheable(self, call, loop, function):
+        """Determine if the method of a call is the same every iteration.
+
+        The 'loop' value is a dictionary describing the loop and 'function'
+        a dictionary describing the function which holds it.
+        """
+        name = _receiver(call.func.value)
+        if (
+            name is None or
+            loop['setattr'] or
+            _attributes(call.func) & loop['attributes'] or
+            name.id in loop['bound'] or
+            name.id in function['hidden']
+        ):
+
+            return False
+
+        # Other calls on the object at the start of a chain, such as
+        # 'self.flush()', may replace an attribute in the chain.
+        if isinstance(call.func.value, ast.Attribute) and (
+            loop['calls'][name.id] != set((ast.dump(call.func),))
+        ):
+
+            return False
+
+        if name.id in function['local']:
+
+            return licm.bound_before(
+                name.id,
+                loop['node'],
+                function['node'],
+            )
+
+        return localize.is_module_name(name, self._names)
+
+    def _cache(self, node, function):
+        """Cache the methods called within one loop."""
+        loop = {
+            'node': node,
+            'bound': set(),
+            'attributes': set(),
+            'setattr': False,
+            'calls': collections.defaultdict(set),
+        }
+        for child in ast.walk(node):
+
+            loop['bound'].update(symbols.bound_names(child))
+            if isinstance(child, ast.Call) and isinstance(
+                child.func,
+                ast.Attribute,
+            ):
+
+                name = _receiver(child.func.value)
+                if name is not None:
+
+                    loop['calls'][name.id].add(ast.dump(child.func))
+
+            if (
+                isinstance(child, ast.Attribute) and
+                not isinstance(child.ctx, ast.Load)
+            ):
+
+                loop['attributes'].add(child.attr)
+
+            if (
+                isinstance(child, ast.Call) and
+                isinstance(child.func, ast.Name) and
+                child.func.id in licm.ATTRIBUTE_CALLS
+            ):
+
+                loop['setattr'] = True
+
+        temps = collections.OrderedDict()
+        for call in tuple(_loop_calls(node)):
+
+            if not self._cacheable(call, loop, function):
+
+                continue
+
+            key = ast.dump(call.func)
+            if key not in temps:
+
+                temps[key] = (self._temp(), call.func)
+
+            self._replace(
+                ast.Name(id=temps[key][0], ctx=ast.Load()),
+                call.func,
+            )
+            self._cached += 1
+
+        if not temps:
+
+            return None
+
+        self._replace(
+            [
+                ast.Assign(
+                    targets=[ast.Name(id=token, ctx=ast.Store())],
+                    value=method,
+                )
+                for token, method in temps.values()
+            ] + [node],
+            node,
+        )
+
+    def visit_FunctionDef(self, node):
+        """Cache the methods called within the loops of a function."""
+        self.generic_visit(node)
+        if pragma.has_pragma(node, PRAGMA, self._pragmas):
+
+            return node
+
+        function = {
+            'node': node,
+            'params': set(
+                token
+                for child in ast.walk(node.args)
+                for token in symbols.bound_names(child)
+            ),
+            'local': set(),
+            'hidden': set(self._names.globals) | self._nonlocal,
+        }
+        for child in scope.walk(node):
+
+            function['local'].update(symbols.bound_names(child))
+            if isinstance(child, ast.Global):
+
+                function['hidden'].update(child.names)
+
+        function['local'].update(function['params'])
+
+        loops = [
+            n for n in scope.walk(node)
+            if isinstance(n, localize.LOOP_NODES)
+        ]
+        for loop in loops:
+
+            self._cache(loop, function)
+
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
+def optimize(node):
+    """Optimize an AST by caching the methods called within loops.
+
+    Methods called within the loops of functions are looked up once before
+    the loop and assigned to a temporary name. This assumes that looking up
+    the method has no side effects and that the method is not replaced while
+    the loop runs by anything other than the statements visible in the loop.
+    The method is looked up even if the loop never runs. Modules which use
+    star imports or access namespaces dynamically are not changed. See
+    AttributeCacher for the calls which are changed.
+
+    Returns a CacheResult whose 'cached' value is the number of calls which
+    were changed.
+    """
+    names = localize.ModuleNames(node)
+    if names.dynamic:
+
+        return CacheResult(cached=0)
+
+    cacher = AttributeCacher(node, names)
+    cacher.visit()
+    return CacheResult(cached=cacher.cached)
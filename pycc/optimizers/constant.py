@@ -6,12 +6,309 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import ast
+import collections
+import copy
+import operator
 
+from .. import pycompat
+from ..asttools import literal
 from ..asttools import name as nametools
+from ..asttools import references
+from ..asttools import scope
 from ..asttools import visitor
 from ..astwrappers import name as namewrap
 
 
+# Expressions which may be folded once all of their operands are literals.
+FOLDABLE_NODES = (
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.BoolOp,
+    ast.Compare,
+    ast.Subscript,
+)
+
+# Nodes which hold the operands of a foldable expression.
+OPERAND_NODES = tuple(
+    getattr(ast, name)
+    for name in ('Tuple', 'Index', 'Slice')
+    if hasattr(ast, name)
+)
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+    ast.BitAnd: operator.and_,
+}
+
+UNARY_OPERATORS = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.Invert: operator.invert,
+}
+
+COMPARE_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+}
+
+# Errors raised by operators given values of the wrong type or range.
+FOLD_ERRORS = (ArithmeticError, LookupError, TypeError, ValueError)
+
+_INTEGER_TYPES = (int, pycompat.long)
+_STRING_TYPES = pycompat.string_types + (bytes,)
+
+# Marker for expressions which cannot be folded.
+_UNKNOWN = object()
+
+
+def _is_singleton(value):
+    """Determine if a value has only one instance in the interpreter."""
+    return value is None or isinstance(value, bool)
+
+
+def _is_cheap(op, left, right):
+    """Determine if a binary operation is cheap and small enough to fold.
+
+    Operations which could allocate a huge result, such as repeating a string
+    or raising a number to a large power, are checked before they are run.
+    """
+    if isinstance(op, ast.Mod) and isinstance(left, _STRING_TYPES):
+
+        # String formatting is not folded.
+        return False
+
+    if isinstance(op, ast.Div) and pycompat.PY2 and all(
+        isinstance(v, _INTEGER_TYPES) for v in (left, right)
+    ):
+
+        # Integer division depends on the future imports of the module.
+        return False
+
+    if isinstance(op, ast.Mult):
+
+        for sequence, count in ((left, right), (right, left)):
+
+            if (
+                isinstance(sequence, _STRING_TYPES + (tuple,)) and
+                isinstance(count, _INTEGER_TYPES)
+            ):
+
+                limit = (
+                    literal.MAX_COLLECTION_SIZE
+                    if isinstance(sequence, tuple)
+                    else literal.MAX_STR_SIZE
+                )
+                return len(sequence) * count <= limit
+
+    if not all(isinstance(v, _INTEGER_TYPES) for v in (left, right)):
+
+        return True
+
+    if isinstance(op, ast.Mult):
+
+        return left.bit_length() + right.bit_length() <= literal.MAX_INT_SIZE
+
+    if isinstance(op, ast.Pow) and right > 0:
+
+        return left.bit_length() * right <= literal.MAX_INT_SIZE
+
+    if isinstance(op, ast.LShift):
+
+        return (
+            0 <= right <= literal.MAX_INT_SIZE and
+            left.bit_length() + right <= literal.MAX_INT_SIZE
+        )
+
+    return True
+
+
+def _fold_binop(node):
+    """Get the value of a binary operation."""
+    if not (literal.is_literal(node.left) and literal.is_literal(node.right)):
+
+        return _UNKNOWN
+
+    function = BINARY_OPERATORS.get(node.op.__class__)
+    left = literal.evaluate(node.left)
+    right = literal.evaluate(node.right)
+    if function is None or not _is_cheap(node.op, left, right):
+
+        return _UNKNOWN
+
+    return function(left, right)
+
+
+def _fold_unaryop(node):
+    """Get the value of a unary operation."""
+    if not literal.is_literal(node.operand):
+
+        return _UNKNOWN
+
+    value = literal.evaluate(node.operand)
+    if isinstance(node.op, ast.Invert) and isinstance(value, bool):
+
+        # Inverting a bool is deprecated.
+        return _UNKNOWN
+
+    return UNARY_OPERATORS[node.op.__class__](value)
+
+
+def _fold_compare(node):
+    """Get the value of a possibly chained comparison."""
+    operands = [node.left] + list(node.comparators)
+    if not all(literal.is_literal(operand) for operand in operands):
+
+        return _UNKNOWN
+
+    values = [literal.evaluate(operand) for operand in operands]
+    for op, left, right in zip(node.ops, values, values[1:]):
+
+        if isinstance(op, (ast.Is, ast.IsNot)) and not (
+            _is_singleton(left) and _is_singleton(right)
+        ):
+
+            # The identity of other values depends on the interpreter.
+            return _UNKNOWN
+
+        if not COMPARE_OPERATORS[op.__class__](left, right):
+
+            return False
+
+    return True
+
+
+def _fold_subscript(node):
+    """Get the value of an index or slice of a literal sequence."""
+    if not (
+        isinstance(node.ctx, ast.Load) and
+        literal.is_literal(node.value)
+    ):
+
+        return _UNKNOWN
+
+    sequence = literal.evaluate(node.value)
+    key = node.slice
+    if key.__class__.__name__ == 'Index':
+
+        key = key.value
+
+    if isinstance(key, ast.Slice):
+
+        bounds = (key.lower, key.upper, key.step)
+        if not all(b is None or literal.is_literal(b) for b in bounds):
+
+            return _UNKNOWN
+
+        index = slice(*(
+            None if b is None else literal.evaluate(b) for b in bounds
+        ))
+
+    elif literal.is_literal(key):
+
+        index = literal.evaluate(key)
+
+    else:
+
+        return _UNKNOWN
+
+    if not (
+        isinstance(sequence, _STRING_TYPES + (tuple,)) and
+        isinstance(index, _INTEGER_TYPES + (slice,))
+    ):
+
+        return _UNKNOWN
+
+    return sequence[index]
+
+
+def _fold_boolop(node):
+    """Get the node a boolean operation simplifies to or None.
+
+    Leading literal values which cannot decide the result are dropped. The
+    first literal value which does decide it becomes the result.
+    """
+    values = list(node.values)
+    decides = isinstance(node.op, ast.Or)
+    while len(values) > 1 and literal.is_literal(values[0]):
+
+        if bool(literal.evaluate(values[0])) is decides:
+
+            return values[0]
+
+        values.pop(0)
+
+    if len(values) == len(node.values):
+
+        return None
+
+    if len(values) == 1:
+
+        return values[0]
+
+    return ast.BoolOp(op=node.op, values=values)
+
+
+_FOLDERS = {
+    ast.BinOp: _fold_binop,
+    ast.UnaryOp: _fold_unaryop,
+    ast.Compare: _fold_compare,
+    ast.Subscript: _fold_subscript,
+}
+
+
+def fold(node):
+    """Get a simpler node which computes the same value as an expression.
+
+    Binary, unary, boolean, and comparison operators are evaluated when all
+    of their operands are literals, as are subscripts of literal strings,
+    bytes, and tuples. Results which are too large to keep in a code object
+    or which cannot be written as a literal are not folded.
+
+    Returns None if the node cannot be simplified.
+    """
+    if isinstance(node, ast.BoolOp):
+
+        return _fold_boolop(node)
+
+    folder = _FOLDERS.get(node.__class__)
+    if folder is None or literal.is_literal(node):
+
+        return None
+
+    try:
+
+        value = folder(node)
+
+    except FOLD_ERRORS:
+
+        return None
+
+    if value is _UNKNOWN or not literal.is_buildable(value):
+
+        return None
+
+    return literal.build(value)
+
+
 def _resolve_constant_value(name):
     """Get the AST node representing the constant value of a name."""
     decl = name.declaration
@@ -34,142 +331,204 @@ def _resolve_constant_value(name):
             return value
 
 
-class ConstantInliner(visitor.NodeTransformer):
+def resolve(node):
+    """Get the value node of a loaded name which is a constant reference.
 
-    """NodeTransformer which places constant values in-line."""
+    The value is either a scalar literal or another ast.Name. Returns None if
+    the name is not constant, is a module name which a function rebinds with
+    a global statement, or its value is a more complex type or too large to
+    build again as a literal.
+    """
+    # Skip if not loading the value from memory.
+    if not isinstance(node.ctx, ast.Load):
 
-    def visit_Name(self, node):
-        """Replace ast.Name with a value if it is a constant reference."""
-        n = namewrap.Name(node)
+        return None
 
-        # Skip if not loading the value from memory.
-        if not isinstance(node.ctx, ast.Load):
+    n = namewrap.Name(node)
 
-            return node
+    # Skip if value is not constant or the node is the initial assignment.
+    if not n.constant or n.node is n.declaration:
 
-        # Skip if value is not constant.
-        if not n.constant or n.node is n.declaration:
+        return None
 
-            return node
+    # Skip if the constant value cannot be found.
+    if n.source in (
+        nametools.NAME_SOURCE.BUILTIN,
+        nametools.NAME_SOURCE.IMPORTED,
+    ):
 
-        # Skip if the node represents the initial assignment.
-        if n.node is n.declaration:
+        return None
 
-            return node
+    # Skip if a function may rebind the module name.
+    if isinstance(
+        scope.parent_scope(n.declaration),
+        ast.Module,
+    ) and n.token in namewrap.global_names(node):
 
-        # Skip if the constant value cannot be found.
-        if n.source in (
-            nametools.NAME_SOURCE.BUILTIN,
-            nametools.NAME_SOURCE.IMPORTED,
-        ):
+        return None
 
-            return node
+    value = _resolve_constant_value(n)
+    if isinstance(value, ast.Name):
 
-        value = _resolve_constant_value(n)
+        return value
 
-        # Skip if the value is a complex typ.
-        if not (
-            isinstance(value, ast.Num) or
-            isinstance(value, ast.Str) or
-            isinstance(value, ast.Name)
-        ):
+    # Skip if the value is a complex type or cannot be built again.
+    if (
+        value is None or
+        isinstance(value, ast.Tuple) or
+        not literal.is_literal(value) or
+        not literal.is_buildable(literal.evaluate(value))
+    ):
 
-            return node
+        return None
 
-        if value is None:
+    return value
 
-            return node
 
-        return value
+def _dependents(node):
+    """Get the nodes which may be simplified after node became constant."""
+    parent = references.get_parent(node)
+    dependents = []
 
-    def visit_BinOp(self, node):
-        """Perform binary ops if all values are constant."""
-        self.generic_visit(node)
-        if isinstance(node.op, ast.Add):
+    # Names may resolve to another constant once they are in-lined.
+    if isinstance(node, ast.Name):
 
-            if (
-                isinstance(node.left, ast.Num) and
-                isinstance(node.right, ast.Num)
-            ):
+        dependents.append(node)
 
-                return ast.Num(n=node.left.n + node.right.n)
+    # Expressions may be folded once all of their operands are constant.
+    current = parent
+    while isinstance(current, OPERAND_NODES):
 
-            if (
-                isinstance(node.left, ast.Str) and
-                isinstance(node.right, ast.Str)
-            ):
+        current = references.get_parent(current)
 
-                return ast.Str(s=node.left + node.right)
+    if isinstance(current, FOLDABLE_NODES):
 
-        if isinstance(node.op, ast.Sub):
+        dependents.append(current)
 
-            if (
-                isinstance(node.left, ast.Num) and
-                isinstance(node.right, ast.Num)
-            ):
+    if isinstance(parent, ast.Tuple):
 
-                return ast.Num(n=node.left.n - node.right.n)
+        parent = references.get_parent(parent)
 
-        if isinstance(node.op, ast.Mult):
+    if not isinstance(parent, ast.Assign):
 
-            if (
-                isinstance(node.left, ast.Num) and
-                isinstance(node.right, ast.Num)
-            ):
+        return dependents
 
-                return ast.Num(n=node.left.n * node.right.n)
+    target = parent.targets[0]
+    targets = (target,)
+    if isinstance(target, ast.Tuple):
 
-            if (
-                isinstance(node.left, ast.Str) and
-                isinstance(node.right, ast.Num)
-            ):
+        targets = target.elts
 
-                return ast.Str(s=node.left * node.right)
+    for target in targets:
 
-        if isinstance(node.op, ast.Div):
+        if not isinstance(target, ast.Name):
 
-            if (
-                isinstance(node.left, ast.Num) and
-                isinstance(node.right, ast.Num)
-            ):
+            continue
 
-                return ast.Num(n=node.left.n / node.right.n)
+        dependents.extend(
+            n.node for n in namewrap.Name(target).uses
+            if isinstance(n.node.ctx, ast.Load)
+        )
 
-        if isinstance(node.op, ast.FloorDiv):
+    return dependents
 
-            if (
-                isinstance(node.left, ast.Num) and
-                isinstance(node.right, ast.Num)
-            ):
 
-                return ast.Num(n=node.left.n // node.right.n)
+InlineResult = collections.namedtuple('InlineResult', ('touched',))
 
-        if isinstance(node.op, ast.Mod):
 
-            if (
-                isinstance(node.left, ast.Num) and
-                isinstance(node.right, ast.Num)
-            ):
+class ConstantInliner(visitor.NodeTransformer):
 
-                return ast.Num(n=node.left.n % node.right.n)
+    """NodeTransformer which places constant values in-line.
 
-        if isinstance(node.op, ast.Pow):
+    Each node which may be simplified further because of a replacement made
+    during the visit is recorded in 'pending'. Passing these nodes back in as
+    the worklist of a new inliner revisits only those nodes rather than the
+    whole tree.
+    """
 
-            if (
-                isinstance(node.left, ast.Num) and
-                isinstance(node.right, ast.Num)
+    def __init__(self, node, worklist=None):
+        """Initialize the inliner with a tree and an optional worklist."""
+        super(ConstantInliner, self).__init__(node)
+        self._pending = collections.OrderedDict()
+        if worklist is not None:
+
+            self._nodes = collections.deque(worklist)
+
+    @property
+    def pending(self):
+        """Get a tuple of nodes to revisit after this visit."""
+        return tuple(self._pending.values())
+
+    def _replace(self, new, old):
+        """Replace a node and record the nodes which depend on it."""
+        replaced = super(ConstantInliner, self)._replace(new, old)
+        if replaced and new is not None:
+
+            for dependent in _dependents(new):
+
+                self._pending[id(dependent)] = dependent
+
+        return replaced
+
+    def visit_Name(self, node):
+        """Replace ast.Name with a value if it is a constant reference."""
+        value = resolve(node)
+        if value is None:
+
+            return node
+
+        if isinstance(value, ast.Name):
+
+            if value.id == node.id and (
+                namewrap.Name(value).declaration is
+                namewrap.Name(node).declaration
             ):
 
-                return ast.Num(n=node.left.n ** node.right.n)
+                # A name which refers to itself, such as 'X = X' in a class
+                # body, is left alone so that it is never queued again.
+                return node
 
-        return node
+            # Copy the value so the declaration keeps its own node.
+            return copy.copy(value)
 
+        # Build a new value so the declaration keeps its own nodes.
+        return literal.build(literal.evaluate(value))
 
-def optimize(node):
-    """Optimize an AST by in-lining constant values."""
-    modified = True
-    while modified is True:
+    def _fold(self, node):
+        """Get the folded value of a node once its children are queued."""
+        self.generic_visit(node)
+        folded = fold(node)
+        return node if folded is None else folded
+
+    visit_BinOp = _fold
+    visit_UnaryOp = _fold
+    visit_BoolOp = _fold
+    visit_Compare = _fold
+    visit_Subscript = _fold
+
+
+def optimize(node, worklist=True):
+    """Optimize an AST by in-lining constant values.
 
-        inliner = ConstantInliner(node)
+    The first iteration visits the whole tree. When 'worklist' is True each
+    following iteration only revisits the nodes that depend on a value which
+    became constant in the iteration before it. Otherwise the whole tree is
+    visited again until no more changes are made.
+
+    Returns an InlineResult whose 'touched' value is a tuple containing the
+    number of nodes visited in each iteration.
+    """
+    inliner = ConstantInliner(node)
+    inliner.visit()
+    touched = [inliner.visited]
+
+    while (inliner.pending if worklist else inliner.modified):
+
+        inliner = ConstantInliner(
+            node,
+            worklist=inliner.pending if worklist else None,
+        )
         inliner.visit()
-        modified = inliner.modified
+        touched.append(inliner.visited)
+
+    return InlineResult(touched=tuple(touched))
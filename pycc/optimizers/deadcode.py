@@ -0,0 +1,327 @@
+"""Optimizer for removing code which can never run or is never used."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import collections
+
+from ..asttools import literal
+from ..asttools import references
+from ..asttools import scope
+from ..asttools import symbols
+from ..asttools import visitor
+from . import constant
+from . import localize
+
+# Statements after which the rest of a statement list never runs.
+JUMP_NODES = (ast.Return, ast.Raise, ast.Break, ast.Continue)
+
+FUNCTION_NODES = tuple(
+    getattr(ast, name)
+    for name in ('FunctionDef', 'AsyncFunctionDef', 'Lambda')
+    if hasattr(ast, name)
+)
+
+# Nodes which change the meaning of a namespace just by appearing in it. A
+# 'yield' makes a function a generator even if it never runs.
+DECLARATION_NODES = tuple(
+    getattr(ast, name)
+    for name in ('Yield', 'YieldFrom', 'Global', 'Nonlocal', 'NamedExpr')
+    if hasattr(ast, name)
+)
+
+# Statement list fields which may be left empty.
+OPTIONAL_FIELDS = ('orelse',)
+
+DeadCodeResult = collections.namedtuple('DeadCodeResult', ('pruned', 'unused'))
+
+
+def _namespace(node):
+    """Get the node which holds the namespace a node is evaluated in."""
+    current = references.get_parent(node)
+    while references.get_parent(current) is not None and not isinstance(
+        current,
+        scope.NAMESPACE_NODES,
+    ):
+
+        current = references.get_parent(current)
+
+    return current
+
+
+def _field(node):
+    """Get the (name, list) pair of the parent field which holds a node."""
+    for field, value in ast.iter_fields(references.get_parent(node)):
+
+        if isinstance(value, list) and node in value:
+
+            return field, value
+
+    return None, None
+
+
+def _static_value(node):
+    """Get the truth of an expression which is always the same or None."""
+    if isinstance(node, ast.Name):
+
+        node = constant.resolve(node) or node
+
+    else:
+
+        node = constant.fold(node) or node
+
+    if not literal.is_literal(node):
+
+        return None
+
+    return bool(literal.evaluate(node))
+
+
+def _bindings(nodes):
+    """Get a Counter of the tokens bound by nodes within their namespace."""
+    counts = collections.Counter()
+    for node in nodes:
+
+        counts.update(symbols.bound_names(node))
+        for child in scope.walk(node):
+
+            counts.update(symbols.bound_names(child))
+
+    return counts
+
+
+def _removable(nodes, namespace):
+    """Determine if removing nodes leaves the meaning of a namespace intact.
+
+    Nodes may not declare anything about the namespace. Within a function
+    each name they bind must be bound elsewhere too or else the name would
+    stop being a local variable.
+    """
+    for node in nodes:
+
+        for child in [node] + list(scope.walk(node)):
+
+            if isinstance(child, DECLARATION_NODES):
+
+                return False
+
+    if not isinstance(namespace, FUNCTION_NODES):
+
+        return True
+
+    removed = _bindings(nodes)
+    if not removed:
+
+        return True
+
+    remaining = _bindings([namespace.args]) + _bindings(
+        n for n in ast.iter_child_nodes(namespace) if n is not namespace.args
+    )
+    return all(remaining[token] > count for token, count in removed.items())
+
+
+class DeadCodeEliminator(visitor.NodeTransformer):
+
+    """NodeTransformer which removes branches and statements that never run.
+
+    Branches of 'if' statements and expressions whose test always has the
+    same value are replaced by the branch which is taken. A 'while' loop
+    whose test is always false is replaced by its 'else' clause. Statements
+    which follow a return, raise, break, or continue in the same block are
+    removed.
+
+    Code is kept if removing it would change how the interpreter compiles the
+    rest of the namespace. See '_removable' for the rules.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the eliminator."""
+        super(DeadCodeEliminator, self).__init__(*args, **kwargs)
+        self._pruned = 0
+
+    @property
+    def pruned(self):
+        """Get the number of branches and statements removed."""
+        return self._pruned
+
+    def _detached(self, node):
+        """Determine if a queued node was removed from the tree before now."""
+        return node is not self._node and references.get_parent(node) is None
+
+    def generic_visit(self, node):
+        """Queue up the child nodes of a node still in the tree."""
+        if not self._detached(node):
+
+            super(DeadCodeEliminator, self).generic_visit(node)
+
+    def _keep(self, node, kept, dropped):
+        """Get the replacement for a statement when only 'kept' may run."""
+        if not _removable(dropped, _namespace(node)):
+
+            self.generic_visit(node)
+            return node
+
+        self._pruned += 1
+        self._nodes.extend(kept)
+        if kept:
+
+            return list(kept)
+
+        field, statements = _field(node)
+        if (
+            len(statements) > 1 or
+            field in OPTIONAL_FIELDS or
+            isinstance(references.get_parent(node), ast.Module)
+        ):
+
+            return None
+
+        return [ast.Pass()]
+
+    def visit_If(self, node):
+        """Replace an if statement whose test never changes."""
+        if self._detached(node):
+
+            return node
+
+        value = _static_value(node.test)
+        if value is None:
+
+            self.generic_visit(node)
+            return node
+
+        if value:
+
+            return self._keep(node, node.body, node.orelse)
+
+        return self._keep(node, node.orelse, node.body)
+
+    def visit_While(self, node):
+        """Replace a while loop whose test is always false."""
+        if self._detached(node) or _static_value(node.test) is not False:
+
+            self.generic_visit(node)
+            return node
+
+        return self._keep(node, node.orelse, node.body)
+
+    def visit_IfExp(self, node):
+        """Replace an if expression whose test never changes."""
+        value = _static_value(node.test)
+        kept, dropped = (
+            (node.body, node.orelse) if value else (node.orelse, node.body)
+        )
+        if value is None or not _removable([dropped], _namespace(node)):
+
+            self.generic_visit(node)
+            return node
+
+        self._pruned += 1
+        self._nodes.append(kept)
+        return kept
+
+    def _unreachable(self, node):
+        """Remove the statements which follow a jump in the same block.
+
+        The removed statements are still queued, so their parent reference is
+        cleared to mark them as detached and they are skipped when reached.
+        """
+        if self._detached(node):
+
+            return node
+
+        self.generic_visit(node)
+        field, statements = _field(node)
+        if statements is None:
+
+            return node
+
+        namespace = _namespace(node)
+        for stmt in statements[statements.index(node) + 1:]:
+
+            if _removable([stmt], namespace) and self._replace(None, stmt):
+
+                references.set_references(stmt, None)
+                self._pruned += 1
+
+        return node
+
+    visit_Return = _unreachable
+    visit_Raise = _unreachable
+    visit_Break = _unreachable
+    visit_Continue = _unreachable
+
+
+def _unused_private(node, names):
+    """Generate module statements assigning private names never used.
+
+    Private names begin with a single underscore. The assigned value must be
+    a literal so that removing it cannot skip a side effect. Any other ast.Name
+    with the same token anywhere in the module, even in a scope which does
+    not see the module name, is treated as a use. So is a string with the
+    same value, such as an entry of '__all__'.
+    """
+    strings = set()
+    counts = collections.Counter()
+    for child in ast.walk(node):
+
+        if isinstance(child, ast.Name):
+
+            counts[child.id] += 1
+
+        elif literal.is_literal(child) and not isinstance(child, ast.Tuple):
+
+            strings.add(literal.evaluate(child))
+
+    for stmt in node.body:
+
+        if not (
+            isinstance(stmt, ast.Assign) and
+            literal.is_literal(stmt.value) and
+            all(isinstance(t, ast.Name) for t in stmt.targets)
+        ):
+
+            continue
+
+        if all(
+            t.id.startswith('_') and
+            not t.id.startswith('__') and
+            t.id not in names.globals and
+            t.id not in strings and
+            counts[t.id] == 1
+            for t in stmt.targets
+        ):
+
+            yield stmt
+
+
+def optimize(node):
+    """Optimize an AST by removing code which never runs or is never used.
+
+    Branches and loops whose tests always have the same value, possibly
+    after following constant names, are reduced to the code which actually
+    runs. Statements after a return, raise, break, or continue are removed.
+    Finally module level assignments of literal values to private names
+    which are never used are removed. Modules which access namespaces
+    dynamically keep their private assignments.
+
+    Returns a DeadCodeResult whose 'pruned' value is the number of branches
+    and statements removed and whose 'unused' value is a tuple of the
+    private names whose assignments were removed.
+    """
+    eliminator = DeadCodeEliminator(node)
+    eliminator.visit()
+
+    unused = []
+    names = localize.ModuleNames(node)
+    if not names.dynamic:
+
+        for stmt in tuple(_unused_private(node, names)):
+
+            eliminator._replace(None, stmt)
+            unused.extend(t.id for t in stmt.targets)
+
+    return DeadCodeResult(pruned=eliminator.pruned, unused=tuple(unused))
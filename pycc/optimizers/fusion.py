@@ -0,0 +1,420 @@
+"""Optimizer for fusing comprehensions with the calls which consume them."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import collections
+
+from .. import pycompat
+from ..asttools import clone
+from ..asttools import literal
+from ..asttools import name as nametools
+from ..asttools import scope
+from ..asttools import visitor
+from . import localize
+
+# Expressions which behave differently when moved into another function.
+SCOPED_NODES = tuple(
+    getattr(ast, name)
+    for name in ('Yield', 'YieldFrom', 'Await', 'NamedExpr')
+    if hasattr(ast, name)
+)
+
+# Expressions whose evaluation may be observed by other code.
+EFFECT_NODES = (ast.Call,) + SCOPED_NODES
+
+# Builtins which consume an iterable argument and how they are rewritten.
+BUILDER_CALLS = {'list': ast.ListComp, 'set': ast.SetComp}
+
+# Builtins which reduce an iterable and the most positional arguments they
+# may be given. Calls which may stop early only accept lists built without
+# side effects.
+REDUCER_CALLS = {'sum': 2, 'min': 1, 'max': 1, 'any': 1, 'all': 1}
+SHORT_CIRCUIT_CALLS = frozenset(('any', 'all'))
+
+# Builtins which produce a lazy iterable from a function and an iterable.
+PRODUCER_CALLS = frozenset(('map', 'filter'))
+
+FusionResult = collections.namedtuple('FusionResult', ('fused',))
+
+
+def _pure(nodes):
+    """Determine if evaluating nodes can have no visible side effects.
+
+    Operators and attribute loads are assumed to be free of side effects.
+    """
+    return not any(
+        isinstance(child, EFFECT_NODES)
+        for node in nodes
+        for child in ast.walk(node)
+    )
+
+
+def _is_async(node):
+    """Determine if a comprehension iterates asynchronously."""
+    return any(
+        getattr(generator, 'is_async', False)
+        for generator in node.generators
+    ) or any(
+        child.__class__.__name__ == 'Await' for child in ast.walk(node)
+    )
+
+
+def _tokens(nodes):
+    """Get the set of all name tokens which appear within nodes."""
+    return set(
+        child.id
+        for node in nodes
+        for child in ast.walk(node)
+        if isinstance(child, ast.Name)
+    )
+
+
+def _parts(node):
+    """Get the expressions of a comprehension evaluated in its namespace.
+
+    The iterable of the first generator is evaluated in the enclosing
+    namespace and is not included.
+    """
+    parts = (
+        [node.key, node.value]
+        if isinstance(node, ast.DictComp)
+        else [node.elt]
+    )
+    for idx, generator in enumerate(node.generators):
+
+        if idx > 0:
+
+            parts.append(generator.iter)
+
+        parts.append(generator.target)
+        parts.extend(generator.ifs)
+
+    return parts
+
+
+def _lambda(node):
+    """Get the (token, body) of a lambda with one plain parameter or None."""
+    if not isinstance(node, ast.Lambda):
+
+        return None
+
+    args = node.args
+    if (
+        len(args.args) != 1 or
+        args.vararg is not None or
+        args.kwarg is not None or
+        args.defaults or
+        getattr(args, 'kwonlyargs', None) or
+        getattr(args, 'posonlyargs', None)
+    ):
+
+        return None
+
+    token = getattr(args.args[0], 'arg', None) or getattr(
+        args.args[0],
+        'id',
+        None,
+    )
+    if not isinstance(token, pycompat.string_types) or any(
+        isinstance(child, SCOPED_NODES) for child in ast.walk(node.body)
+    ):
+
+        return None
+
+    return token, node.body
+
+
+def _comprehension(target, iterable, ifs=None):
+    """Build a comprehension node for a generator of one name."""
+    generator = ast.comprehension(
+        target=ast.Name(id=target, ctx=ast.Store()),
+        iter=iterable,
+        ifs=ifs or [],
+    )
+    if 'is_async' in generator._fields:
+
+        generator.is_async = 0
+
+    return generator
+
+
+class ComprehensionFuser(visitor.NodeTransformer):
+
+    """NodeTransformer which removes intermediate lists and function calls.
+
+    Calls to the builtins 'list' and 'set' with a comprehension, or with a
+    'map' or 'filter' of a lambda, become a single comprehension. Calls to
+    'sum', 'min', 'max', 'any', and 'all' with a list comprehension or with
+    a 'map' or 'filter' of a lambda are given a generator expression. A
+    comprehension which iterates over another list comprehension or
+    generator expression is merged with it.
+
+    Builtins must be verified as never rebound by the module.
+    """
+
+    def __init__(self, node, names):
+        """Initialize the fuser with the ModuleNames of the tree."""
+        super(ComprehensionFuser, self).__init__(node)
+        self._names = names
+        self._fused = 0
+
+    @property
+    def fused(self):
+        """Get the number of calls and comprehensions which were merged."""
+        return self._fused
+
+    def _builtin(self, node, tokens):
+        """Get the token of a call to one of the given builtins or None."""
+        if not (
+            isinstance(node, ast.Call) and
+            isinstance(node.func, ast.Name) and
+            node.func.id in tokens and
+            not self._names.dynamic and
+            nametools.name_source(node.func) is
+            nametools.NAME_SOURCE.BUILTIN and
+            localize.is_module_name(node.func, self._names) and
+            len(node.args) >= 1 and
+            not getattr(node, 'starargs', None) and
+            not getattr(node, 'kwargs', None) and
+            node.args[0].__class__.__name__ != 'Starred'
+        ):
+
+            return None
+
+        return node.func.id
+
+    def _produced(self, node):
+        """Get the (elt, generators) of a map or filter of a lambda or None.
+
+        Only calls with one iterable are accepted. The values are new nodes.
+        """
+        token = self._builtin(node, PRODUCER_CALLS)
+        if token is None or len(node.args) != 2 or node.keywords:
+
+            return None
+
+        function = _lambda(node.args[0])
+        if function is None:
+
+            return None
+
+        param, body = function
+        if token == 'map':
+
+            return body, [_comprehension(param, node.args[1])]
+
+        return (
+            ast.Name(id=param, ctx=ast.Load()),
+            [_comprehension(param, node.args[1], [body])],
+        )
+
+    def _consume(self, node):
+        """Get the comprehension which replaces a builtin call or None.
+
+        Calls to builders are replaced by a comprehension of the same type.
+        Calls to reducers keep the call and replace its first argument with
+        a generator expression.
+        """
+        token = self._builtin(node, set(BUILDER_CALLS) | set(REDUCER_CALLS))
+        if token is None:
+
+            return None
+
+        arg = node.args[0]
+        if pycompat.PY2 and (token == 'list' or isinstance(arg, ast.ListComp)):
+
+            # PY2 list comprehensions bind names in the enclosing scope.
+            return None
+
+        produced = self._produced(arg)
+        if token in BUILDER_CALLS:
+
+            if len(node.args) != 1 or node.keywords:
+
+                return None
+
+            if (
+                isinstance(arg, (ast.ListComp, ast.GeneratorExp)) and
+                not _is_async(arg)
+            ):
+
+                produced = arg.elt, arg.generators
+
+            if produced is None:
+
+                return None
+
+            elt, generators = produced
+            return BUILDER_CALLS[token](elt=elt, generators=generators)
+
+        if len(node.args) > REDUCER_CALLS[token]:
+
+            return None
+
+        if isinstance(arg, ast.ListComp) and not _is_async(arg) and (
+            token not in SHORT_CIRCUIT_CALLS or _pure(_parts(arg))
+        ):
+
+            produced = arg.elt, arg.generators
+
+        if produced is None:
+
+            return None
+
+        elt, generators = produced
+        return ast.GeneratorExp(elt=elt, generators=generators)
+
+    def _fuse(self, node):
+        """Merge a comprehension with one it iterates over.
+
+        Returns the merged comprehension or None if it cannot be merged.
+        """
+        outer = node.generators[0]
+        inner = outer.iter
+        if (
+            not isinstance(inner, (ast.ListComp, ast.GeneratorExp)) or
+            (pycompat.PY2 and ast.ListComp in (type(node), type(inner))) or
+            not isinstance(outer.target, ast.Name) or
+            _is_async(node) or
+            _is_async(inner)
+        ):
+
+            return None
+
+        inner_parts = _parts(inner)
+        outer_parts = _parts(node)
+        outer_parts.remove(outer.target)
+        if isinstance(inner, ast.ListComp) and (
+            isinstance(node, ast.GeneratorExp) or
+            not _pure(inner_parts + outer_parts)
+        ):
+
+            # The whole list is built before the outer comprehension runs.
+            return None
+
+        token = outer.target.id
+        value = inner.elt
+        uses = [
+            child for part in outer_parts
+            for child in ast.walk(part)
+            if isinstance(child, ast.Name) and child.id == token
+        ]
+        local_uses = [
+            child for part in outer_parts
+            for child in [part] + list(scope.walk(part))
+            if isinstance(child, ast.Name) and child.id == token
+        ]
+        if (
+            len(uses) != len(local_uses) or
+            any(not isinstance(use.ctx, ast.Load) for use in uses) or
+            not _pure([value]) or
+            (
+                len(uses) > 1 and
+                not isinstance(value, ast.Name) and
+                not literal.is_literal(value)
+            )
+        ):
+
+            return None
+
+        inner_bound = _tokens(g.target for g in inner.generators)
+        outer_bound = _tokens(g.target for g in node.generators[1:])
+        if (
+            token in outer_bound or
+            (_tokens(outer_parts) - set((token,))) & inner_bound or
+            _tokens(inner_parts) & outer_bound
+        ):
+
+            # A name would refer to a different variable once merged.
+            return None
+
+        def substitute(child):
+            """Get a copy of the inner value for a use of the outer name."""
+            if isinstance(child, ast.Name) and child.id == token:
+
+                return clone.clone(value)
+
+            return None
+
+        inner.generators[-1].ifs.extend(
+            clone.clone(test, substitute) for test in outer.ifs
+        )
+        generators = list(inner.generators) + [
+            clone.clone(generator, substitute)
+            for generator in node.generators[1:]
+        ]
+        if isinstance(node, ast.DictComp):
+
+            return ast.DictComp(
+                key=clone.clone(node.key, substitute),
+                value=clone.clone(node.value, substitute),
+                generators=generators,
+            )
+
+        return node.__class__(
+            elt=clone.clone(node.elt, substitute),
+            generators=generators,
+        )
+
+    def _rewrite(self, node):
+        """Merge a comprehension with those it iterates over until it can't."""
+        fused = self._fuse(node)
+        while fused is not None:
+
+            self._fused += 1
+            node = fused
+            fused = self._fuse(node)
+
+        return node
+
+    def visit_Call(self, node):
+        """Fuse a call to a builtin with the iterable it consumes."""
+        replacement = self._consume(node)
+        if replacement is None:
+
+            self.generic_visit(node)
+            return node
+
+        self._fused += 1
+        replacement = self._rewrite(replacement)
+        if isinstance(replacement, ast.GeneratorExp):
+
+            self._replace(replacement, node.args[0])
+            self.generic_visit(node)
+            return node
+
+        self.generic_visit(replacement)
+        return replacement
+
+    def _comprehension(self, node):
+        """Merge a comprehension with those it iterates over."""
+        replacement = self._rewrite(node)
+        self.generic_visit(replacement)
+        return replacement
+
+    visit_ListComp = _comprehension
+    visit_SetComp = _comprehension
+    visit_DictComp = _comprehension
+    visit_GeneratorExp = _comprehension
+
+
+def optimize(node):
+    """Optimize an AST by fusing comprehensions and the calls around them.
+
+    Intermediate lists passed to 'list', 'set', 'sum', 'min', 'max', 'any',
+    and 'all', calls to 'map' and 'filter' with a lambda, and comprehensions
+    which iterate over other comprehensions are merged into one comprehension
+    or generator expression. Builtins are only rewritten in modules which
+    never rebind them and never access namespaces dynamically. See
+    ComprehensionFuser for the rules.
+
+    Returns a FusionResult whose 'fused' value is the number of calls and
+    comprehensions which were merged.
+    """
+    fuser = ComprehensionFuser(node, localize.ModuleNames(node))
+    fuser.visit()
+    return FusionResult(fused=fuser.fused)
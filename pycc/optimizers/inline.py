@@ -0,0 +1,450 @@
+"""Optimizer for inlining calls to small functions."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import collections
+
+from .. import pycompat
+from ..asttools import clone
+from ..asttools import literal
+from ..asttools import name as nametools
+from ..asttools import references
+from ..asttools import scope
+from ..asttools import symbols
+from ..asttools import visitor
+from . import localize
+
+# Default limit on the number of nodes in an inlined return expression.
+MAX_SIZE = 20
+
+FUNCTION_NODES = tuple(
+    getattr(ast, name)
+    for name in ('FunctionDef', 'AsyncFunctionDef', 'Lambda')
+    if hasattr(ast, name)
+)
+
+# Expressions which may not appear in an inlined return value. Namespaces
+# would close over the parameters and the rest change the caller itself.
+EXCLUDED_NODES = scope.NAMESPACE_NODES + tuple(
+    getattr(ast, name)
+    for name in ('ListComp', 'Yield', 'YieldFrom', 'Await', 'NamedExpr')
+    if hasattr(ast, name)
+)
+
+# Expressions after which the order of argument evaluation is observable.
+EFFECT_NODES = tuple(
+    getattr(ast, name)
+    for name in ('Call', 'Yield', 'YieldFrom', 'Await')
+    if hasattr(ast, name)
+)
+
+InlineResult = collections.namedtuple('InlineResult', ('inlined',))
+
+# A function which may be inlined. Params is a tuple of parameter tokens,
+# value is the returned expression, and globals is the set of other names
+# the expression loads.
+Callee = collections.namedtuple(
+    'Callee',
+    ('node', 'index', 'params', 'value', 'globals'),
+)
+
+
+def _size(node):
+    """Get the number of expression nodes in a tree."""
+    return sum(
+        1 for n in ast.walk(node)
+        if not isinstance(n, (ast.expr_context, ast.operator, ast.unaryop,
+                              ast.cmpop, ast.boolop))
+    )
+
+
+def _params(node):
+    """Get the parameter tokens of a function or None if any are complex.
+
+    Only plain positional parameters without defaults are accepted.
+    """
+    args = node.args
+    if (
+        args.vararg is not None or
+        args.kwarg is not None or
+        args.defaults or
+        getattr(args, 'kwonlyargs', None) or
+        getattr(args, 'posonlyargs', None)
+    ):
+
+        return None
+
+    params = []
+    for arg in args.args:
+
+        token = getattr(arg, 'arg', None) or getattr(arg, 'id', None)
+        if not isinstance(token, pycompat.string_types):
+
+            # PY2 allows tuple parameters.
+            return None
+
+        params.append(token)
+
+    return tuple(params)
+
+
+def _callee(node, index, max_size):
+    """Get the Callee for a module level statement or None."""
+    if not isinstance(node, ast.FunctionDef) or node.decorator_list:
+
+        return None
+
+    body = node.body[1:] if localize.is_docstring(node.body[0]) else node.body
+    if (
+        len(body) != 1 or
+        not isinstance(body[0], ast.Return) or
+        body[0].value is None
+    ):
+
+        return None
+
+    params = _params(node)
+    value = body[0].value
+    if params is None or _size(value) > max_size or any(
+        isinstance(n, EXCLUDED_NODES) for n in ast.walk(value)
+    ):
+
+        return None
+
+    names = set(
+        n.id for n in ast.walk(value)
+        if isinstance(n, ast.Name) and n.id not in params
+    )
+    if node.name in names or names & localize.RESERVED:
+
+        # Inlining a recursive function would only grow the caller.
+        return None
+
+    return Callee(node, index, params, value, names)
+
+
+def _postorder(node):
+    """Generate (node, conditional) pairs in the order they are evaluated.
+
+    The 'conditional' value is True if the node is not always evaluated or
+    is evaluated in an order which differs from the field order.
+    """
+    stack = [(node, False, False)]
+    while len(stack) > 0:
+
+        current, conditional, expanded = stack.pop()
+        if expanded:
+
+            yield current, conditional
+            continue
+
+        stack.append((current, conditional, True))
+        children = list(ast.iter_child_nodes(current))
+        flags = [conditional] * len(children)
+        if isinstance(current, ast.IfExp):
+
+            flags = [conditional, True, True]
+
+        if isinstance(current, ast.BoolOp):
+
+            flags = [conditional] + [True] * (len(children) - 1)
+
+        if isinstance(current, ast.Dict):
+
+            flags = [True] * len(children)
+
+        stack.extend(
+            (child, flag, False)
+            for child, flag in reversed(list(zip(children, flags)))
+        )
+
+
+def _namespaces(node):
+    """Generate the namespace nodes which enclose a node, innermost first."""
+    current = references.get_parent(node)
+    while current is not None:
+
+        if isinstance(current, scope.NAMESPACE_NODES):
+
+            yield current
+
+        current = references.get_parent(current)
+
+
+def _bound(namespace):
+    """Get the set of tokens bound within a namespace."""
+    found = set()
+    children = list(scope.walk(namespace))
+    if isinstance(namespace, FUNCTION_NODES):
+
+        children.extend(ast.walk(namespace.args))
+
+    for child in children:
+
+        found.update(symbols.bound_names(child))
+
+    return found
+
+
+def _deferred(node):
+    """Determine if a node is only evaluated when a function is called."""
+    current = node
+    parent = references.get_parent(current)
+    while parent is not None:
+
+        body = getattr(parent, 'body', None)
+        if isinstance(parent, FUNCTION_NODES) and (
+            current is body or (isinstance(body, list) and current in body)
+        ):
+
+            return True
+
+        current = parent
+        parent = references.get_parent(current)
+
+    return False
+
+
+def _top_index(node):
+    """Get the index of the module statement which holds a node."""
+    current = node
+    parent = references.get_parent(current)
+    while references.get_parent(parent) is not None:
+
+        current = parent
+        parent = references.get_parent(current)
+
+    return parent.body.index(current)
+
+
+def _literal_factory(node):
+    """Get a callable which builds copies of a literal node."""
+    value = literal.evaluate(node)
+    return lambda: literal.build(value)
+
+
+def _name_factory(token):
+    """Get a callable which builds loads of a name."""
+    return lambda: ast.Name(id=token, ctx=ast.Load())
+
+
+class CallInliner(visitor.NodeTransformer):
+
+    """NodeTransformer which replaces calls with the value they return.
+
+    A call is inlined when the name called always refers to a Callee, the
+    arguments match the parameters one to one, and substituting them into
+    the returned expression evaluates each argument once and in the same
+    order as the call would.
+
+    Literal arguments and local names of the caller may be used any number
+    of times. Any other argument must be used exactly once, always, and
+    before the returned expression calls anything.
+    """
+
+    def __init__(self, node, callees, names):
+        """Initialize the inliner with a mapping of tokens to Callees."""
+        super(CallInliner, self).__init__(node)
+        self._callees = callees
+        self._names = names
+        self._inlined = 0
+
+        # Locals which nested functions may rebind while a call runs.
+        self._nonlocal = set(
+            token
+            for child in ast.walk(node)
+            if child.__class__.__name__ == 'Nonlocal'
+            for token in child.names
+        )
+
+    @property
+    def inlined(self):
+        """Get the number of call sites which were inlined."""
+        return self._inlined
+
+    def _arguments(self, node, callee):
+        """Get a mapping of parameter tokens to argument nodes or None."""
+        if len(node.args) + len(node.keywords) != len(callee.params):
+
+            return None
+
+        arguments = collections.OrderedDict()
+        for param, arg in zip(callee.params, node.args):
+
+            if arg.__class__.__name__ == 'Starred':
+
+                return None
+
+            arguments[param] = arg
+
+        for keyword in node.keywords:
+
+            if keyword.arg not in callee.params or keyword.arg in arguments:
+
+                return None
+
+            arguments[keyword.arg] = keyword.value
+
+        # PY2 and PY34 keep star arguments outside of the argument lists.
+        if getattr(node, 'starargs', None) or getattr(node, 'kwargs', None):
+
+            return None
+
+        return arguments
+
+    def _substitutions(self, callee, arguments, local):
+        """Get the substitutions for a call or None if it is unsafe.
+
+        The 'local' value is the set of names local to the caller.
+        """
+        substitutions = {}
+        ordered = []
+        for param, arg in arguments.items():
+
+            if literal.is_literal(arg):
+
+                substitutions[param] = _literal_factory(arg)
+                continue
+
+            if (
+                isinstance(arg, ast.Name) and
+                isinstance(arg.ctx, ast.Load) and
+                arg.id in local and
+                arg.id not in self._nonlocal
+            ):
+
+                substitutions[param] = _name_factory(arg.id)
+                continue
+
+            substitutions[param] = (lambda arg=arg: arg)
+            ordered.append(param)
+
+        # Other arguments must be evaluated once each, in order, and before
+        # anything in the expression can observe the difference.
+        uses = []
+        for child, conditional in _postorder(callee.value):
+
+            if isinstance(child, EFFECT_NODES):
+
+                break
+
+            if isinstance(child, ast.Name) and child.id in ordered:
+
+                if conditional:
+
+                    return None
+
+                uses.append(child.id)
+
+        total = sum(
+            1 for n in ast.walk(callee.value)
+            if isinstance(n, ast.Name) and n.id in ordered
+        )
+        if uses != ordered or total != len(ordered):
+
+            return None
+
+        return substitutions
+
+    def visit_Call(self, node):
+        """Replace a call to a small function with its return value."""
+        self.generic_visit(node)
+        func = node.func
+        callee = None
+        if isinstance(func, ast.Name) and isinstance(func.ctx, ast.Load):
+
+            callee = self._callees.get(func.id)
+
+        if (
+            callee is None or
+            not localize.is_module_name(func, self._names) or
+            nametools.declaration(func) is not callee.node
+        ):
+
+            return node
+
+        namespaces = tuple(_namespaces(node))
+        if not _deferred(node) and _top_index(node) <= callee.index:
+
+            # The function is not defined yet when the call runs.
+            return node
+
+        bound = set()
+        for namespace in namespaces:
+
+            bound.update(_bound(namespace))
+
+        if bound & callee.globals:
+
+            # A name the function loads is shadowed at the call site.
+            return node
+
+        arguments = self._arguments(node, callee)
+        local = set()
+        if namespaces and not isinstance(namespaces[0], ast.ClassDef):
+
+            local = _bound(namespaces[0])
+
+        substitutions = (
+            self._substitutions(callee, arguments, local)
+            if arguments is not None
+            else None
+        )
+        if substitutions is None:
+
+            return node
+
+        # Arguments moved into the new expression are already queued by the
+        # generic visit above.
+        self._inlined += 1
+
+        def substitute(child):
+            """Get the argument node for a load of a parameter."""
+            if isinstance(child, ast.Name) and child.id in substitutions:
+
+                return substitutions[child.id]()
+
+            return None
+
+        return clone.clone(callee.value, substitute, node)
+
+
+def optimize(node, max_size=MAX_SIZE):
+    """Optimize an AST by inlining calls to small module level functions.
+
+    A function may be inlined if its body is a single return statement, with
+    an optional docstring, whose value has at most 'max_size' nodes. It must
+    take only plain positional parameters, have no decorators, and be bound
+    exactly once by the module. The returned expression may not contain
+    lambdas, comprehensions, or anything which yields. Modules which use
+    star imports or access namespaces dynamically are not changed.
+
+    The function definitions are kept so that other modules may use them.
+
+    Returns an InlineResult whose 'inlined' value is the number of call sites
+    which were replaced.
+    """
+    names = localize.ModuleNames(node)
+    if names.dynamic:
+
+        return InlineResult(inlined=0)
+
+    callees = {}
+    for index, stmt in enumerate(node.body):
+
+        callee = _callee(stmt, index, max_size)
+        if callee is not None:
+
+            callees[stmt.name] = callee
+
+    if not callees:
+
+        return InlineResult(inlined=0)
+
+    inliner = CallInliner(node, callees, names)
+    inliner.visit()
+    return InlineResult(inlined=inliner.inlined)
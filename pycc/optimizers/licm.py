@@ -0,0 +1,642 @@
+"""Optimizer for moving loop invariant expressions out of loops."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import collections
+
+from .. import pycompat
+from ..asttools import clone
+from ..asttools import literal
+from ..asttools import references
+from ..asttools import scope
+from ..asttools import symbols
+from ..asttools import visitor
+from . import constant
+from . import localize
+
+TEMP_PREFIX = '_pycc_licm_'
+
+LITERAL_NODES = tuple(
+    getattr(ast, name)
+    for name in ('Num', 'Str', 'Bytes', 'NameConstant', 'Constant')
+    if hasattr(ast, name)
+)
+
+# Calls which change attributes by string name.
+ATTRIBUTE_CALLS = frozenset(('setattr', 'delattr'))
+
+# Statements which end the part of a loop body that runs on every iteration.
+# Anything after them may be skipped by a break, continue, return, or raise.
+BARRIER_NODES = tuple(
+    getattr(ast, name)
+    for name in (
+        'If',
+        'For',
+        'AsyncFor',
+        'While',
+        'With',
+        'AsyncWith',
+        'Try',
+        'TryExcept',
+        'TryFinally',
+        'Return',
+        'Raise',
+        'Break',
+        'Continue',
+        'Delete',
+    )
+    if hasattr(ast, name)
+)
+
+# Comparisons which never raise for the builtin types.
+SAFE_COMPARISONS = (ast.Is, ast.IsNot, ast.Eq, ast.NotEq)
+
+# Nodes which may appear in a loop test without changing anything.
+PURE_NODES = LITERAL_NODES + (
+    ast.Name,
+    ast.Attribute,
+    ast.Subscript,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.BoolOp,
+    ast.Tuple,
+    ast.expr_context,
+    ast.operator,
+    ast.unaryop,
+    ast.cmpop,
+    ast.boolop,
+) + tuple(
+    getattr(ast, name)
+    for name in ('Index', 'Slice', 'ExtSlice')
+    if hasattr(ast, name)
+)
+
+HoistResult = collections.namedtuple('HoistResult', ('hoisted',))
+
+
+def _assigned(stmt):
+    """Get the tokens of the names a statement binds whenever it completes."""
+    if isinstance(stmt, (ast.Import, ast.ImportFrom)):
+
+        return set(
+            token
+            for alias in stmt.names
+            for token in symbols.bound_names(alias)
+        )
+
+    if isinstance(stmt, ast.Assign):
+
+        targets = stmt.targets
+
+    elif stmt.__class__.__name__ == 'AnnAssign' and stmt.value is not None:
+
+        targets = [stmt.target]
+
+    else:
+
+        return set()
+
+    return set(
+        token
+        for target in targets
+        for child in ast.walk(target)
+        for token in symbols.bound_names(child)
+    )
+
+
+def bound_before(token, loop, function):
+    """Determine if a name is always bound when a loop in a function starts.
+
+    The name must be a parameter of the function or be assigned by an
+    earlier statement in the block which holds the loop or in one of the
+    blocks around it. Assignments within branches which the loop is not
+    part of may not have run and are ignored.
+    """
+    if any(
+        token in symbols.bound_names(child)
+        for child in ast.walk(function.args)
+    ):
+
+        return True
+
+    current = loop
+    while current is not function:
+
+        parent = references.get_parent(current)
+        for _, value in ast.iter_fields(parent):
+
+            if isinstance(value, list) and current in value and any(
+                token in _assigned(stmt)
+                for stmt in value[:value.index(current)]
+            ):
+
+                return True
+
+        current = parent
+
+    return False
+
+
+def _root(node):
+    """Get the token of the name an attribute or subscript chain starts at."""
+    while isinstance(node, (ast.Attribute, ast.Subscript)) or (
+        node.__class__.__name__ == 'Starred'
+    ):
+
+        node = node.value
+
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def _changed(loop):
+    """Get the tokens of the names whose values a loop may change in place.
+
+    A value may change when one of its methods is called, when it is given
+    to a call, or when one of its attributes or items is assigned, deleted,
+    or updated with an augmented assignment.
+    """
+    found = set()
+    for child in ast.walk(loop):
+
+        if isinstance(child, ast.Call):
+
+            if isinstance(child.func, ast.Attribute):
+
+                found.add(_root(child.func.value))
+
+            found.update(_root(arg) for arg in child.args)
+            found.update(_root(k.value) for k in child.keywords)
+
+        if isinstance(child, (ast.Attribute, ast.Subscript)) and (
+            not isinstance(child.ctx, ast.Load)
+        ):
+
+            found.add(_root(child.value))
+
+        if isinstance(child, ast.AugAssign):
+
+            found.add(_root(child.target))
+
+    found.discard(None)
+    return found
+
+
+def _runs(loop):
+    """Determine if a loop always runs at least once."""
+    if isinstance(loop, ast.While):
+
+        return (
+            literal.is_literal(loop.test) and
+            bool(literal.evaluate(loop.test))
+        )
+
+    if isinstance(loop.iter, (ast.List, ast.Tuple, ast.Set)):
+
+        return len(loop.iter.elts) > 0 and not any(
+            n.__class__.__name__ == 'Starred' for n in loop.iter.elts
+        )
+
+    if not literal.is_literal(loop.iter):
+
+        return False
+
+    value = literal.evaluate(loop.iter)
+    return isinstance(
+        value,
+        pycompat.string_types + (bytes, tuple),
+    ) and len(value) > 0
+
+
+def _pure(node):
+    """Determine if evaluating an expression never changes anything."""
+    return all(isinstance(n, PURE_NODES) for n in ast.walk(node))
+
+
+def region(loop):
+    """Generate (expression, consumed) pairs evaluated on every iteration.
+
+    Expressions come from the test of a while loop and the statements at the
+    start of the loop body up to the first which may skip the rest of it.
+    The 'consumed' value is True if the value of the expression is only used
+    by the interpreter and is never kept by the program.
+    """
+    if isinstance(loop, ast.While):
+
+        yield loop.test, True
+
+    for stmt in loop.body:
+
+        if isinstance(stmt, ast.Expr):
+
+            yield stmt.value, True
+
+        if isinstance(stmt, (ast.Assign, ast.AugAssign)) or (
+            stmt.__class__.__name__ == 'AnnAssign' and stmt.value is not None
+        ):
+
+            yield stmt.value, False
+
+        if isinstance(stmt, ast.If):
+
+            yield stmt.test, True
+
+        if isinstance(stmt, BARRIER_NODES):
+
+            return
+
+
+def operands(node, consumed):
+    """Get (child, consumed) pairs for the parts of node always evaluated.
+
+    Children which are only evaluated under some condition, such as the
+    later values of a boolean operation, are not included. Nor are the
+    children of nodes which start a new namespace.
+    """
+    if isinstance(node, ast.BinOp):
+
+        return ((node.left, True), (node.right, True))
+
+    if isinstance(node, ast.UnaryOp):
+
+        return ((node.operand, True),)
+
+    if isinstance(node, ast.Compare):
+
+        return tuple((n, True) for n in [node.left] + node.comparators)
+
+    if isinstance(node, ast.BoolOp):
+
+        # The result of a boolean operation is one of its values.
+        return ((node.values[0], consumed),)
+
+    if isinstance(node, ast.IfExp):
+
+        return ((node.test, True),)
+
+    if isinstance(node, ast.Attribute):
+
+        return ((node.value, True),)
+
+    if isinstance(node, ast.Subscript):
+
+        return ((node.value, True), (node.slice, True))
+
+    if isinstance(node, ast.Call):
+
+        return ((node.func, True),) + tuple(
+            (n, False)
+            for n in list(node.args) + [k.value for k in node.keywords]
+        )
+
+    if node.__class__.__name__ in ('Index', 'Slice', 'FormattedValue'):
+
+        return tuple((n, True) for n in ast.iter_child_nodes(node))
+
+    if node.__class__.__name__ in ('Tuple', 'List', 'Set', 'Dict', 'Starred'):
+
+        return tuple((n, False) for n in ast.iter_child_nodes(node))
+
+    return ()
+
+
+class LoopInvariantHoister(visitor.NodeTransformer):
+
+    """NodeTransformer which hoists invariant expressions out of loops.
+
+    Each function is processed once, from its innermost loops outward, so
+    that an expression hoisted out of an inner loop may then be hoisted out
+    of the loops around it.
+
+    An expression is hoisted if it is evaluated on every iteration of the
+    loop, is built only from literals, invariant names, and operators, and,
+    if 'allow_attributes' is True, attribute loads. A name is invariant if it
+    is a local of the function which is never bound within the loop or a
+    module name or builtin which is never rebound. The operands of operators
+    must also be locals which the loop never changes in place or module names
+    which refer to literals. Operators and attribute loads are assumed to be
+    free of side effects.
+
+    Expressions which may raise are only hoisted out of loops which always
+    run or, behind a copy of the test, out of while loops whose test has no
+    side effects.
+
+    The results of operators are only hoisted when the program never keeps
+    them, such as the operands of other operators, so that a mutable result
+    is never shared between iterations.
+    """
+
+    # Only functions are visited so expressions are never walked.
+    interesting_nodes = (ast.stmt,)
+
+    def __init__(self, node, names, allow_attributes=False):
+        """Initialize the hoister with the ModuleNames of the tree."""
+        super(LoopInvariantHoister, self).__init__(node)
+        self._names = names
+        self._allow_attributes = allow_attributes
+        self._temps = 0
+        self._hoisted = 0
+
+    @property
+    def hoisted(self):
+        """Get the number of expressions moved out of loops."""
+        return self._hoisted
+
+    def _temp(self):
+        """Get the token of a new temporary name."""
+        token = TEMP_PREFIX + str(self._temps)
+        self._temps += 1
+        while token in self._names.tokens:
+
+            token = TEMP_PREFIX + str(self._temps)
+            self._temps += 1
+
+        return token
+
+    def _hoistable(self, node, loop, operand=False):
+        """Determine if an expression has the same value on every iteration.
+
+        The 'loop' value is a dictionary describing the loop. The 'operand'
+        value is True when the value of the expression is used by an operator
+        or a test, in which case a name must also refer to a value the loop
+        never changes in place. Module names must then refer to a literal.
+        """
+        if isinstance(node, LITERAL_NODES):
+
+            return True
+
+        if isinstance(node, ast.Name):
+
+            token = node.id
+            if (
+                not isinstance(node.ctx, ast.Load) or
+                token in loop['bound'] or
+                token in loop['hidden']
+            ):
+
+                return False
+
+            if token in loop['local']:
+
+                return not operand or token not in loop['changed']
+
+            if not localize.is_module_name(node, self._names):
+
+                return False
+
+            return not operand or isinstance(
+                constant.resolve(node),
+                LITERAL_NODES,
+            )
+
+        if isinstance(node, ast.Attribute):
+
+            return (
+                self._allow_attributes and
+                not loop['setattr'] and
+                isinstance(node.ctx, ast.Load) and
+                node.attr not in loop['attributes'] and
+                self._hoistable(node.value, loop)
+            )
+
+        if isinstance(node, ast.Tuple) and not isinstance(node.ctx, ast.Load):
+
+            return False
+
+        if isinstance(node, (
+            ast.BinOp,
+            ast.UnaryOp,
+            ast.Compare,
+            ast.BoolOp,
+            ast.Tuple,
+        )):
+
+            return all(
+                self._hoistable(
+                    child,
+                    loop,
+                    operand or not isinstance(node, ast.Tuple),
+                )
+                for child in ast.iter_child_nodes(node)
+                if not isinstance(child, (ast.operator, ast.unaryop,
+                                          ast.cmpop, ast.boolop,
+                                          ast.expr_context))
+            )
+
+        return False
+
+    def _raises(self, node, loop):
+        """Determine if evaluating a hoistable expression may raise.
+
+        Names which may be unbound, attribute loads, arithmetic, and ordering
+        comparisons may raise. Tuples, truth tests, and identity and equality
+        comparisons of names which are always bound never do.
+        """
+        if isinstance(node, LITERAL_NODES):
+
+            return False
+
+        if isinstance(node, ast.Name):
+
+            return node.id in loop['local'] and not bound_before(
+                node.id,
+                loop['node'],
+                loop['function'],
+            )
+
+        if isinstance(node, ast.Compare) and not all(
+            isinstance(op, SAFE_COMPARISONS) for op in node.ops
+        ):
+
+            return True
+
+        if isinstance(node, ast.UnaryOp) and not isinstance(
+            node.op,
+            ast.Not,
+        ):
+
+            return True
+
+        if isinstance(node, (
+            ast.Tuple,
+            ast.Compare,
+            ast.UnaryOp,
+            ast.BoolOp,
+        )):
+
+            return any(
+                self._raises(child, loop)
+                for child in ast.iter_child_nodes(node)
+                if isinstance(child, ast.expr)
+            )
+
+        return True
+
+    def _candidates(self, loop):
+        """Get the largest hoistable expressions evaluated every iteration."""
+        found = []
+        for expression, consumed in region(loop['node']):
+
+            nodes = [(expression, consumed)]
+            while len(nodes) > 0:
+
+                current, consumed = nodes.pop()
+                if (
+                    not isinstance(current, (ast.Name,) + LITERAL_NODES) and
+                    (consumed or isinstance(current, (
+                        ast.Attribute,
+                        ast.Tuple,
+                    ))) and
+                    self._hoistable(current, loop) and
+                    (loop['safe'] or not self._raises(current, loop)) and
+                    any(
+                        isinstance(n, (ast.Name, ast.Attribute))
+                        for n in ast.walk(current)
+                    )
+                ):
+
+                    found.append(current)
+                    continue
+
+                nodes.extend(reversed(operands(current, consumed)))
+
+        return found
+
+    def _hoist(self, node, function, local, hidden):
+        """Hoist the invariant expressions of one loop.
+
+        Expressions which may raise are only hoisted if the loop always runs
+        or if the test of a while loop never changes anything. The hoisted
+        assignments are then guarded by a copy of the test.
+        """
+        guarded = (
+            not _runs(node) and
+            isinstance(node, ast.While) and
+            _pure(node.test)
+        )
+        loop = {
+            'node': node,
+            'function': function,
+            'local': local,
+            'hidden': hidden,
+            'bound': set(),
+            'attributes': set(),
+            'setattr': False,
+            'changed': _changed(node),
+            'safe': guarded or _runs(node),
+        }
+        for child in ast.walk(node):
+
+            loop['bound'].update(symbols.bound_names(child))
+            if (
+                isinstance(child, ast.Attribute) and
+                not isinstance(child.ctx, ast.Load)
+            ):
+
+                loop['attributes'].add(child.attr)
+
+            if (
+                isinstance(child, ast.Call) and
+                isinstance(child.func, ast.Name) and
+                child.func.id in ATTRIBUTE_CALLS
+            ):
+
+                loop['setattr'] = True
+
+        temps = collections.OrderedDict()
+        for expression in self._candidates(loop):
+
+            key = ast.dump(expression)
+            if key not in temps:
+
+                temps[key] = (self._temp(), expression)
+
+            self._replace(
+                ast.Name(id=temps[key][0], ctx=ast.Load()),
+                expression,
+            )
+            self._hoisted += 1
+
+        if not temps:
+
+            return None
+
+        assignments = [
+            ast.Assign(
+                targets=[ast.Name(id=token, ctx=ast.Store())],
+                value=expression,
+            )
+            for token, expression in temps.values()
+        ]
+        if guarded and any(
+            self._raises(expression, loop)
+            for _, expression in temps.values()
+        ):
+
+            assignments = [ast.If(
+                test=clone.clone(node.test),
+                body=[ast.copy_location(n, node) for n in assignments],
+                orelse=[],
+            )]
+
+        self._replace(assignments + [node], node)
+
+    def visit_FunctionDef(self, node):
+        """Hoist invariant expressions out of the loops of a function."""
+        self.generic_visit(node)
+        hidden = set(self._names.globals)
+        local = set()
+        for child in ast.walk(node):
+
+            if child is node:
+
+                continue
+
+            local.update(symbols.bound_names(child))
+            if (
+                isinstance(child, ast.Global) or
+                child.__class__.__name__ == 'Nonlocal'
+            ):
+
+                hidden.update(child.names)
+
+        loops = [
+            n for n in scope.walk(node)
+            if isinstance(n, localize.LOOP_NODES)
+        ]
+        for loop in reversed(loops):
+
+            self._hoist(loop, node, local, hidden)
+
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
+def optimize(node, allow_attributes=False):
+    """Optimize an AST by hoisting loop invariant expressions.
+
+    Invariant expressions within the loops of functions are assigned to
+    temporary names before the loop and the loop uses the temporary instead.
+    Modules which use star imports or access namespaces dynamically are not
+    changed. See LoopInvariantHoister for the expressions which are hoisted.
+
+    Returns a HoistResult whose 'hoisted' value is the number of expressions
+    which were replaced.
+    """
+    names = localize.ModuleNames(node)
+    if names.dynamic:
+
+        return HoistResult(hoisted=0)
+
+    hoister = LoopInvariantHoister(
+        node,
+        names,
+        allow_attributes=allow_attributes,
+    )
+    hoister.visit()
+    return HoistResult(hoisted=hoister.hoisted)
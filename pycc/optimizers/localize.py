@@ -0,0 +1,314 @@
+"""Optimizer for binding globals and builtins to local names."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import collections
+
+try:
+
+    import builtins
+
+except ImportError:
+
+    # PY2 exposes the builtins under a different module name.
+    import __builtin__ as builtins
+
+from ..asttools import name as nametools
+from ..asttools import references
+from ..asttools import scope
+from ..asttools import symbols
+
+ALIAS_PREFIX = '_pycc_'
+
+# Calls which can read or write a namespace by string name. Modules which
+# use them are left alone since their names cannot be tracked statically.
+DYNAMIC_CALLS = frozenset(('globals', 'locals', 'vars', 'eval', 'exec'))
+
+# Builtins which the compiler treats specially when it sees their name.
+# Calling super through an alias loses the implicit __class__ cell.
+RESERVED = frozenset(('super', '__class__'))
+
+LOOP_NODES = tuple(
+    getattr(ast, name)
+    for name in ('For', 'AsyncFor', 'While')
+    if hasattr(ast, name)
+)
+
+BindResult = collections.namedtuple('BindResult', ('bound',))
+
+
+def _statements_walk(statements):
+    """Generate (node, in_loop) pairs for a list of statements.
+
+    Nodes are limited to the namespace of the statements. The 'in_loop' value
+    is True if the node is evaluated within a loop of that namespace.
+    """
+    nodes = collections.deque((stmt, False) for stmt in statements)
+    while len(nodes) > 0:
+
+        current, in_loop = nodes.popleft()
+        yield current, in_loop
+        if isinstance(current, scope.NAMESPACE_NODES):
+
+            continue
+
+        in_loop = in_loop or isinstance(current, LOOP_NODES)
+        nodes.extend(
+            (child, in_loop) for child in ast.iter_child_nodes(current)
+        )
+
+
+def is_docstring(node):
+    """Determine if a statement is a docstring."""
+    if not isinstance(node, ast.Expr):
+
+        return False
+
+    value = node.value
+    if isinstance(value, ast.Str):
+
+        return True
+
+    return isinstance(getattr(value, 'value', None), str)
+
+
+class ModuleNames(object):
+
+    """Summary of how a module binds the names it uses.
+
+    The 'stable' set holds the names bound exactly once by a statement at the
+    top of the module. The 'counts' value maps names to the number of times
+    the module namespace binds them. A module is 'dynamic' if it uses star
+    imports or accesses namespaces by string name.
+    """
+
+    def __init__(self, node):
+        """Collect the names bound and used anywhere in the module."""
+        self.dynamic = False
+        self.tokens = set()
+        self.globals = set()
+        self.counts = collections.defaultdict(int)
+        for child in ast.walk(node):
+
+            if isinstance(child, ast.ImportFrom) and any(
+                a.name == '*' for a in child.names
+            ):
+
+                self.dynamic = True
+
+            if child.__class__.__name__ == 'Exec' or (
+                isinstance(child, ast.Call) and
+                isinstance(child.func, ast.Name) and
+                child.func.id in DYNAMIC_CALLS
+            ):
+
+                self.dynamic = True
+
+            if isinstance(child, ast.Global):
+
+                self.globals.update(child.names)
+
+            if isinstance(child, ast.Name):
+
+                self.tokens.add(child.id)
+
+            self.tokens.update(symbols.bound_names(child))
+
+        for child in scope.walk(node):
+
+            for token in symbols.bound_names(child):
+
+                self.counts[token] += 1
+
+        # Names bound once by a statement at the top of the module.
+        self.stable = set()
+        for stmt in node.body:
+
+            found = ()
+            if isinstance(stmt, (ast.FunctionDef, ast.ClassDef)):
+
+                found = (stmt.name,)
+
+            if isinstance(stmt, (ast.Import, ast.ImportFrom, ast.Assign)):
+
+                found = (
+                    token
+                    for child in scope.walk(stmt)
+                    for token in symbols.bound_names(child)
+                )
+
+            self.stable.update(t for t in found if self.counts[t] == 1)
+
+        self.stable.difference_update(self.globals)
+
+
+def is_module_name(node, names):
+    """Determine if a loaded name always refers to the same module value.
+
+    The 'names' value must be the ModuleNames of the module holding node.
+    """
+    token = node.id
+    if token in RESERVED or token.startswith('__'):
+
+        return False
+
+    if token in names.globals:
+
+        return False
+
+    source = nametools.name_source(node)
+    if source is nametools.NAME_SOURCE.BUILTIN:
+
+        return names.counts[token] == 0 and hasattr(builtins, token)
+
+    return token in names.stable
+
+
+def _bind_loop(loop, local, names):
+    """Bind the names a loop uses to local aliases assigned before it.
+
+    The 'local' value is the set of names the function binds. Returns a
+    tuple of the name tokens which were bound.
+    """
+    loads = collections.defaultdict(list)
+    for child, _ in _statements_walk((loop,)):
+
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load):
+
+            loads[child.id].append(child)
+
+    tokens = sorted(
+        token for token in loads
+        if token not in local and
+        ALIAS_PREFIX + token not in names.tokens and
+        is_module_name(loads[token][0], names)
+    )
+    if not tokens:
+
+        return ()
+
+    for token in tokens:
+
+        for child in loads[token]:
+
+            child.id = ALIAS_PREFIX + token
+
+    parent = references.get_parent(loop)
+    statements = next(
+        value for _, value in ast.iter_fields(parent)
+        if isinstance(value, list) and any(item is loop for item in value)
+    )
+    offset = next(
+        idx for idx, item in enumerate(statements) if item is loop
+    )
+    aliases = [
+        ast.copy_location(
+            ast.Assign(
+                targets=[ast.Name(id=ALIAS_PREFIX + token, ctx=ast.Store())],
+                value=ast.Name(id=token, ctx=ast.Load()),
+            ),
+            loop,
+        )
+        for token in tokens
+    ]
+    statements[offset:offset] = aliases
+    references.add_child_references(parent)
+
+    # The aliases are recorded as though they replaced the loop along with
+    # it. Renamed names are only loads so they declare nothing.
+    table = symbols.get_symbol_table(parent)
+    if table is not None:
+
+        table.replace(loop, aliases + [loop], parent)
+
+    return tuple(tokens)
+
+
+def _bind_function(node, names):
+    """Bind the names a function uses within loops to local aliases.
+
+    Each loop which is not within another loop of the function is given its
+    own aliases immediately before it. Returns a tuple of the name tokens
+    which were bound.
+    """
+    local = set(
+        token
+        for child in ast.walk(node.args)
+        for token in symbols.bound_names(child)
+    )
+    for stmt in node.body:
+
+        for child in ast.walk(stmt):
+
+            local.update(symbols.bound_names(child))
+
+    loops = [
+        child for child, in_loop in _statements_walk(node.body)
+        if isinstance(child, LOOP_NODES) and not in_loop
+    ]
+    bound = set()
+    for loop in loops:
+
+        bound.update(_bind_loop(loop, local, names))
+
+    return tuple(sorted(bound))
+
+
+def _functions(node):
+    """Generate the functions which are not nested in other functions."""
+    nodes = collections.deque(ast.iter_child_nodes(node))
+    while len(nodes) > 0:
+
+        current = nodes.popleft()
+        if isinstance(current, ast.FunctionDef):
+
+            yield current
+            continue
+
+        if isinstance(current, scope.NAMESPACE_NODES) and not isinstance(
+            current,
+            ast.ClassDef,
+        ):
+
+            continue
+
+        nodes.extend(ast.iter_child_nodes(current))
+
+
+def optimize(node):
+    """Optimize an AST by binding globals used in loops to local names.
+
+    Builtins, imported names, and names defined at the top of the module
+    which are loaded within a loop of a function are assigned to a local
+    alias immediately before the loop. Uses of the name within the loop are
+    then replaced with the alias so that the loop loads a local value rather
+    than searching the module and builtin namespaces. This assumes that the
+    name is bound whenever the loop is reached, even if the loop never runs
+    an iteration.
+
+    A name is only bound if the module binds it exactly once, never declares
+    it global, and never shadows it in the function. Modules which use star
+    imports or access namespaces dynamically are not changed. Nested
+    functions are not changed.
+
+    Returns a BindResult whose 'bound' value is a tuple of (function, token)
+    pairs for each name which was bound.
+    """
+    names = ModuleNames(node)
+    if names.dynamic:
+
+        return BindResult(bound=())
+
+    bound = []
+    for function in tuple(_functions(node)):
+
+        bound.extend(
+            (function.name, token)
+            for token in _bind_function(function, names)
+        )
+
+    return BindResult(bound=tuple(bound))
@@ -0,0 +1,138 @@
+"""Optimizer for rewriting membership tests and loops over displays."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import collections
+
+from ..asttools import literal
+from ..asttools import name as nametools
+from ..asttools import visitor
+from . import localize
+
+MEMBERSHIP_OPERATORS = (ast.In, ast.NotIn)
+
+SET_NAMES = frozenset(('set', 'frozenset'))
+
+MembershipResult = collections.namedtuple('MembershipResult', ('rewritten',))
+
+
+def _is_list(node):
+    """Determine if a node is a list display which is only read."""
+    return isinstance(node, ast.List) and isinstance(node.ctx, ast.Load)
+
+
+def _tuple(node):
+    """Build a tuple display holding the elements of a list display."""
+    return ast.Tuple(elts=node.elts, ctx=ast.Load())
+
+
+class MembershipRewriter(visitor.NodeTransformer):
+
+    """NodeTransformer which replaces displays built only to be searched.
+
+    A list display on the right of a final 'in' or 'not in' comparison, or
+    iterated by a 'for' loop or comprehension, becomes a tuple display. The
+    compiler stores a tuple of literals as a single constant rather than
+    building a new list each time the expression runs.
+
+    A call to the builtin 'set' or 'frozenset' with a display of literals on
+    the right of a membership test becomes a set display. The compiler
+    stores a set display of literals used this way as a frozenset constant.
+
+    List displays are never turned into sets since searching a set requires
+    the value being searched for to be hashable and searching a list does
+    not.
+    """
+
+    def __init__(self, node, names):
+        """Initialize the rewriter with the ModuleNames of the tree."""
+        super(MembershipRewriter, self).__init__(node)
+        self._names = names
+        self._rewritten = 0
+
+    @property
+    def rewritten(self):
+        """Get the number of displays and calls which were replaced."""
+        return self._rewritten
+
+    def _is_set_call(self, node):
+        """Determine if a node calls the builtin set types with literals."""
+        if not (
+            isinstance(node, ast.Call) and
+            isinstance(node.func, ast.Name) and
+            node.func.id in SET_NAMES and
+            not self._names.dynamic and
+            nametools.name_source(node.func) is
+            nametools.NAME_SOURCE.BUILTIN and
+            localize.is_module_name(node.func, self._names) and
+            not node.keywords and
+            len(node.args) == 1 and
+            not getattr(node, 'starargs', None) and
+            not getattr(node, 'kwargs', None)
+        ):
+
+            return False
+
+        arg = node.args[0]
+        return (
+            isinstance(arg, (ast.List, ast.Tuple, ast.Set)) and
+            len(arg.elts) > 0 and
+            all(literal.is_literal(elt) for elt in arg.elts)
+        )
+
+    def _rewrite(self, new, old):
+        """Replace a node and count the replacement."""
+        if self._replace(new, old):
+
+            self._rewritten += 1
+
+    def visit_Compare(self, node):
+        """Rewrite the container searched by a final membership test."""
+        # Only the last operand is safe since any other is also compared
+        # with the operand which follows it.
+        container = node.comparators[-1]
+        if isinstance(node.ops[-1], MEMBERSHIP_OPERATORS):
+
+            if _is_list(container):
+
+                self._rewrite(_tuple(container), container)
+
+            elif self._is_set_call(container):
+
+                self._rewrite(ast.Set(elts=container.args[0].elts), container)
+
+        self.generic_visit(node)
+        return node
+
+    def _iterated(self, node):
+        """Rewrite a list display which is only iterated over."""
+        if _is_list(node.iter):
+
+            self._rewrite(_tuple(node.iter), node.iter)
+
+        self.generic_visit(node)
+        return node
+
+    visit_For = _iterated
+    visit_comprehension = _iterated
+
+
+def optimize(node):
+    """Optimize an AST by rewriting displays which are only searched.
+
+    List displays which are searched with 'in' or 'not in', or iterated by a
+    loop or comprehension, become tuple displays. Calls to 'set' or
+    'frozenset' with literal values which are searched become set displays.
+    Calls are left alone in modules which rebind those names or access
+    namespaces dynamically.
+
+    Returns a MembershipResult whose 'rewritten' value is the number of
+    expressions which were replaced.
+    """
+    rewriter = MembershipRewriter(node, localize.ModuleNames(node))
+    rewriter.visit()
+    return MembershipResult(rewritten=rewriter.rewritten)
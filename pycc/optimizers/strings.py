@@ -0,0 +1,567 @@
+"""Optimizer for folding string formatting and concatenation."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import collections
+import re
+import string
+
+from .. import pycompat
+from ..asttools import literal
+from ..asttools import name as nametools
+from ..asttools import visitor
+from . import localize
+
+# Parsers from PY36 represent f-strings with these nodes. Older versions
+# join the parts with str.join instead.
+JOINED = hasattr(ast, 'JoinedStr')
+
+# Expressions whose evaluation may be observed by other code.
+EFFECT_NODES = tuple(
+    getattr(ast, name)
+    for name in ('Call', 'Yield', 'YieldFrom', 'Await', 'NamedExpr')
+    if hasattr(ast, name)
+)
+
+# Conversion codes used by ast.FormattedValue.
+CONVERSIONS = {None: -1, 's': ord('s'), 'r': ord('r'), 'a': ord('a')}
+
+# Printf style specifiers. Mapping keys are matched so they can be rejected.
+PERCENT_PATTERN = re.compile(
+    r'%(?P<key>\([^)]*\))?(?P<flags>[#0\- +]*)(?P<width>\*|\d+)?'
+    r'(?:\.(?P<precision>\*|\d+))?[hlL]?(?P<type>[diouxXeEfFgGcrsa%])'
+)
+
+# Printf style conversions which are the same as an f-string conversion.
+PERCENT_CONVERSIONS = frozenset(('s', 'r', 'a'))
+
+NUMBER_PATTERN = re.compile(r'\d+')
+
+# Values which format the same way on every supported interpreter.
+FOLDABLE_TYPES = (str, int, bool)
+
+# One piece of a string being built. Text pieces hold only 'text'. Other
+# pieces hold the 'value' to format with a 'conversion' code and an optional
+# 'spec' node as in ast.FormattedValue. The 'node' is an expression which
+# evaluates to the piece as a string or None if there is none.
+Piece = collections.namedtuple(
+    'Piece',
+    ('text', 'value', 'conversion', 'spec', 'node'),
+)
+
+StringResult = collections.namedtuple('StringResult', ('folded',))
+
+
+def _text(text):
+    """Build a text Piece."""
+    return Piece(text, None, -1, None, None)
+
+
+def _is_text(node):
+    """Determine if a node is a literal str."""
+    return literal.is_literal(node) and isinstance(
+        literal.evaluate(node),
+        str,
+    )
+
+
+def _is_cheap(spec):
+    """Determine if a format spec never builds a string over the limit."""
+    return all(
+        int(number) <= literal.MAX_STR_SIZE
+        for number in NUMBER_PATTERN.findall(spec)
+    )
+
+
+def _foldable(node):
+    """Determine if a node is a literal which may be formatted now."""
+    return literal.is_literal(node) and isinstance(
+        literal.evaluate(node),
+        FOLDABLE_TYPES,
+    )
+
+
+def _pure(node):
+    """Determine if evaluating a node can have no visible side effects."""
+    return not any(isinstance(n, EFFECT_NODES) for n in ast.walk(node))
+
+
+def _merge(pieces):
+    """Join adjacent text pieces."""
+    merged = []
+    for piece in pieces:
+
+        if piece.value is None and merged and merged[-1].value is None:
+
+            merged[-1] = _text(merged[-1].text + piece.text)
+            continue
+
+        if piece.value is not None or piece.text:
+
+            merged.append(piece)
+
+    return merged
+
+
+def _percent(node):
+    """Get the pieces of a printf style format of a literal str or None."""
+    template = literal.evaluate(node.left)
+    args = node.right.elts if isinstance(node.right, ast.Tuple) else None
+    if args is None:
+
+        # A single value may turn out to be a tuple when the code runs.
+        if not _is_text(node.right):
+
+            return None
+
+        args = [node.right]
+
+    if any(arg.__class__.__name__ == 'Starred' for arg in args):
+
+        return None
+
+    pieces = []
+    remaining = list(args)
+    position = 0
+    for match in PERCENT_PATTERN.finditer(template):
+
+        pieces.append(_text(template[position:match.start()]))
+        position = match.end()
+        spec = match.group(0)
+        if match.group('type') == '%':
+
+            if spec != '%%':
+
+                return None
+
+            pieces.append(_text('%'))
+            continue
+
+        if (
+            match.group('key') is not None or
+            '*' in spec or
+            not _is_cheap(spec) or
+            not remaining
+        ):
+
+            return None
+
+        arg = remaining.pop(0)
+        if _foldable(arg):
+
+            try:
+
+                pieces.append(_text(spec % (literal.evaluate(arg),)))
+
+            except (TypeError, ValueError, OverflowError):
+
+                return None
+
+            continue
+
+        if spec[1:] not in PERCENT_CONVERSIONS:
+
+            # The specifier has no f-string equivalent so it is kept.
+            pieces.append(Piece(spec, arg, -1, None, None))
+            continue
+
+        pieces.append(Piece(None, arg, CONVERSIONS[spec[1:]], None, None))
+
+    if remaining or '%' in template[position:]:
+
+        return None
+
+    pieces.append(_text(template[position:]))
+    return _merge(pieces)
+
+
+def _format_fields(template):
+    """Get the (text, key, conversion, spec) fields of a template or None.
+
+    Keys are integers for positional fields and strings for keywords.
+    """
+    fields = []
+    automatic = None
+    try:
+
+        parsed = list(string.Formatter().parse(template))
+
+    except ValueError:
+
+        return None
+
+    for text, field, spec, conversion in parsed:
+
+        if field is None:
+
+            fields.append((text, None, None, None))
+            continue
+
+        if '.' in field or '[' in field or '{' in spec or not _is_cheap(spec):
+
+            return None
+
+        if field == '' or field.isdigit():
+
+            if automatic is None:
+
+                automatic = field == ''
+
+            if automatic != (field == ''):
+
+                # Mixing the styles raises an error when the code runs.
+                return None
+
+        if field == '':
+
+            key = len([f for f in fields if isinstance(f[1], int)])
+
+        elif field.isdigit():
+
+            key = int(field)
+
+        else:
+
+            key = field
+
+        fields.append((text, key, conversion, spec))
+
+    return fields
+
+
+def _format(node):
+    """Get the pieces of a str.format call on a literal str or None."""
+    if (
+        node.keywords and any(k.arg is None for k in node.keywords) or
+        any(arg.__class__.__name__ == 'Starred' for arg in node.args) or
+        getattr(node, 'starargs', None) or
+        getattr(node, 'kwargs', None)
+    ):
+
+        return None
+
+    fields = _format_fields(literal.evaluate(node.func.value))
+    if fields is None:
+
+        return None
+
+    args = collections.OrderedDict(enumerate(node.args))
+    args.update((k.arg, k.value) for k in node.keywords)
+    uses = [field[1] for field in fields if field[1] is not None]
+    if set(uses) != set(args):
+
+        # Missing or unused arguments either raise or are evaluated anyway.
+        return None
+
+    # Arguments are evaluated once each and in order by the call. Anything
+    # else must be free of side effects and cheap to evaluate again.
+    ordered = [key for key in args if not _pure(args[key])]
+    if [key for key in uses if key in ordered] != ordered or any(
+        uses.count(key) > 1 and not (
+            isinstance(args[key], ast.Name) or literal.is_literal(args[key])
+        )
+        for key in args
+    ):
+
+        return None
+
+    pieces = []
+    for text, key, conversion, spec in fields:
+
+        pieces.append(_text(text))
+        if key is None:
+
+            continue
+
+        if conversion not in CONVERSIONS:
+
+            return None
+
+        arg = args[key]
+        if _foldable(arg):
+
+            template = '{0' + ('!' + conversion if conversion else '') + (
+                ':' + spec if spec else ''
+            ) + '}'
+            try:
+
+                pieces.append(_text(template.format(literal.evaluate(arg))))
+
+            except (TypeError, ValueError, OverflowError):
+
+                return None
+
+            continue
+
+        pieces.append(Piece(
+            None,
+            arg,
+            CONVERSIONS[conversion],
+            spec or None,
+            None,
+        ))
+
+    return _merge(pieces)
+
+
+class StringFolder(visitor.NodeTransformer):
+
+    """NodeTransformer which builds strings with a single operation.
+
+    Printf style formatting and str.format calls on literal templates have
+    their literal arguments formatted into the template. Concatenations of
+    values which are always strings are merged. Where the interpreter
+    supports f-strings the result becomes one. Otherwise the parts are
+    joined with str.join.
+    """
+
+    def __init__(self, node, names):
+        """Initialize the folder with the ModuleNames of the tree."""
+        super(StringFolder, self).__init__(node)
+        self._names = names
+        self._folded = 0
+
+    @property
+    def folded(self):
+        """Get the number of expressions which were replaced."""
+        return self._folded
+
+    def _is_str_call(self, node):
+        """Determine if a node calls the builtin str with one argument."""
+        return (
+            isinstance(node, ast.Call) and
+            isinstance(node.func, ast.Name) and
+            node.func.id == 'str' and
+            len(node.args) == 1 and
+            not node.keywords and
+            node.args[0].__class__.__name__ != 'Starred' and
+            not self._names.dynamic and
+            nametools.name_source(node.func) is
+            nametools.NAME_SOURCE.BUILTIN and
+            localize.is_module_name(node.func, self._names)
+        )
+
+    def _pieces(self, node):
+        """Get the pieces of a str expression or None if it may not be one.
+
+        Pieces from a printf style format may hold the specifier as their
+        'text' when it has no f-string equivalent.
+        """
+        if _is_text(node):
+
+            return [_text(literal.evaluate(node))]
+
+        if JOINED and isinstance(node, ast.JoinedStr):
+
+            return [
+                _text(literal.evaluate(value)) if literal.is_literal(value)
+                else Piece(
+                    None,
+                    value.value,
+                    value.conversion,
+                    value.format_spec,
+                    None,
+                )
+                for value in node.values
+            ]
+
+        if self._is_str_call(node):
+
+            return [Piece(None, node.args[0], CONVERSIONS['s'], None, node)]
+
+        if (
+            isinstance(node, ast.BinOp) and
+            isinstance(node.op, ast.Mod) and
+            _is_text(node.left)
+        ):
+
+            return _percent(node) or [Piece(None, node, -1, None, node)]
+
+        if (
+            isinstance(node, ast.Call) and
+            isinstance(node.func, ast.Attribute) and
+            node.func.attr == 'format' and
+            _is_text(node.func.value)
+        ):
+
+            return _format(node) or [Piece(None, node, -1, None, node)]
+
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+
+            left = self._pieces(node.left)
+            right = self._pieces(node.right) if left is not None else None
+            if right is not None:
+
+                return _merge(left + right)
+
+        return None
+
+    def _build(self, pieces, node):
+        """Build an expression from pieces or None if it would not help."""
+        if all(piece.value is None for piece in pieces):
+
+            text = ''.join(piece.text for piece in pieces)
+            if len(text) > literal.MAX_STR_SIZE:
+
+                return None
+
+            return literal.build(text)
+
+        if not JOINED and isinstance(node, ast.BinOp) and isinstance(
+            node.op,
+            ast.Mod,
+        ) or any(
+            p.text is not None and p.value is not None for p in pieces
+        ):
+
+            return self._build_percent(pieces, node)
+
+        if JOINED:
+
+            values = []
+            for piece in pieces:
+
+                if piece.value is None:
+
+                    values.append(literal.build(piece.text))
+                    continue
+
+                spec = piece.spec
+                if spec is not None and not isinstance(spec, ast.AST):
+
+                    spec = ast.JoinedStr(values=[literal.build(spec)])
+
+                values.append(ast.FormattedValue(
+                    value=piece.value,
+                    conversion=piece.conversion,
+                    format_spec=spec,
+                ))
+
+            return ast.JoinedStr(values=values)
+
+        if any(p.value is not None and p.node is None for p in pieces):
+
+            return None
+
+        parts = [
+            literal.build(p.text) if p.value is None else p.node
+            for p in pieces
+        ]
+        if len(parts) == 1:
+
+            return parts[0]
+
+        return ast.Call(
+            func=ast.Attribute(
+                value=literal.build(''),
+                attr='join',
+                ctx=ast.Load(),
+            ),
+            args=[ast.Tuple(elts=parts, ctx=ast.Load())],
+            keywords=[],
+        )
+
+    def _build_percent(self, pieces, node):
+        """Build a printf style format of the pieces which remain.
+
+        Used when some specifier has no f-string equivalent. Only a format
+        which was given a tuple is rebuilt.
+        """
+        if not (
+            isinstance(node, ast.BinOp) and
+            isinstance(node.op, ast.Mod) and
+            isinstance(node.right, ast.Tuple)
+        ):
+
+            return None
+
+        template = []
+        args = []
+        for piece in pieces:
+
+            if piece.value is None:
+
+                template.append(piece.text.replace('%', '%%'))
+                continue
+
+            template.append(piece.text or '%' + chr(piece.conversion))
+            args.append(piece.value)
+
+        if len(args) == len(node.right.elts):
+
+            # Nothing was folded.
+            return None
+
+        return ast.BinOp(
+            left=literal.build(''.join(template)),
+            op=ast.Mod(),
+            right=ast.Tuple(elts=args, ctx=ast.Load()),
+        )
+
+    def _fold(self, node):
+        """Replace a string expression with one which builds it at once."""
+        pieces = self._pieces(node)
+        replacement = None
+        if pieces is not None and not (
+            len(pieces) == 1 and pieces[0].node is node
+        ):
+
+            replacement = self._build(pieces, node)
+
+        if replacement is None:
+
+            self.generic_visit(node)
+            return node
+
+        self._folded += 1
+        self.generic_visit(replacement)
+        return replacement
+
+    def visit_BinOp(self, node):
+        """Fold a concatenation or printf style format of strings."""
+        if not isinstance(node.op, (ast.Add, ast.Mod)):
+
+            self.generic_visit(node)
+            return node
+
+        return self._fold(node)
+
+    def visit_Call(self, node):
+        """Fold a str.format call on a literal template."""
+        if not (
+            isinstance(node.func, ast.Attribute) and
+            node.func.attr == 'format'
+        ):
+
+            self.generic_visit(node)
+            return node
+
+        return self._fold(node)
+
+
+def optimize(node):
+    """Optimize an AST by folding string formatting and concatenation.
+
+    Literal values given to printf style formatting or str.format on a
+    literal template are formatted into the template. Concatenations of
+    literal strings, calls to the builtin 'str', and other formats are
+    merged. The result is a literal if every part is known, otherwise an
+    f-string or, before PY36, a call to str.join. Modules which rebind
+    'str' or access namespaces dynamically keep their calls to it.
+
+    Only PY3 code is changed since PY2 has two string types.
+
+    Returns a StringResult whose 'folded' value is the number of expressions
+    which were replaced.
+    """
+    if pycompat.PY2:
+
+        return StringResult(folded=0)
+
+    folder = StringFolder(node, localize.ModuleNames(node))
+    folder.visit()
+    return StringResult(folded=folder.folded)
@@ -0,0 +1,203 @@
+"""Optimizer for unrolling loops over small constant sequences."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import collections
+
+from .. import pycompat
+from ..asttools import clone
+from ..asttools import literal
+from ..asttools import name as nametools
+from ..asttools import scope
+from ..asttools import visitor
+from . import localize
+
+# Default limits on the loops which are unrolled.
+MAX_TRIPS = 8
+MAX_SIZE = 40
+
+RANGE_NAMES = frozenset(('range', 'xrange'))
+
+UnrollResult = collections.namedtuple('UnrollResult', ('unrolled',))
+
+
+def _size(statements):
+    """Get the number of nodes in a list of statements."""
+    return sum(1 for stmt in statements for n in ast.walk(stmt))
+
+
+def _jumps(statements):
+    """Determine if a break or continue applies to the loop of statements.
+
+    Jumps within nested loops apply to those loops unless they are in the
+    'else' clause of the nested loop.
+    """
+    nodes = list(statements)
+    while len(nodes) > 0:
+
+        current = nodes.pop()
+        if isinstance(current, (ast.Break, ast.Continue)):
+
+            return True
+
+        if isinstance(current, scope.NAMESPACE_NODES):
+
+            continue
+
+        if isinstance(current, localize.LOOP_NODES):
+
+            nodes.extend(current.orelse)
+            continue
+
+        nodes.extend(ast.iter_child_nodes(current))
+
+    return False
+
+
+class LoopUnroller(visitor.NodeTransformer):
+
+    """NodeTransformer which unrolls loops over small constant sequences.
+
+    A 'for' loop is unrolled if it iterates over a tuple or list of literals,
+    or a call to the builtin 'range' with literal arguments, which produces
+    at most 'max_trips' values, and its body has at most 'max_size' nodes and
+    never uses 'break' or 'continue'. Each iteration becomes an assignment
+    of the value to the loop target followed by a copy of the body.
+
+    Each function is processed once, from its innermost loops outward.
+    """
+
+    # Only functions are visited so expressions are never walked.
+    interesting_nodes = (ast.stmt,)
+
+    def __init__(self, node, names, max_trips=MAX_TRIPS, max_size=MAX_SIZE):
+        """Initialize the unroller with the ModuleNames of the tree."""
+        super(LoopUnroller, self).__init__(node)
+        self._names = names
+        self._max_trips = max_trips
+        self._max_size = max_size
+        self._unrolled = 0
+
+    @property
+    def unrolled(self):
+        """Get the number of loops which were unrolled."""
+        return self._unrolled
+
+    def _values(self, node):
+        """Get the tuple of values produced by an iterable or None."""
+        if (
+            isinstance(node, (ast.Tuple, ast.List)) and
+            all(literal.is_literal(elt) for elt in node.elts)
+        ):
+
+            return tuple(literal.evaluate(elt) for elt in node.elts)
+
+        if not (
+            isinstance(node, ast.Call) and
+            isinstance(node.func, ast.Name) and
+            node.func.id in RANGE_NAMES and
+            not self._names.dynamic and
+            nametools.name_source(node.func) is
+            nametools.NAME_SOURCE.BUILTIN and
+            localize.is_module_name(node.func, self._names) and
+            not node.keywords and
+            0 < len(node.args) <= 3 and
+            all(literal.is_literal(arg) for arg in node.args)
+        ):
+
+            return None
+
+        args = tuple(literal.evaluate(arg) for arg in node.args)
+        if (
+            not all(isinstance(arg, (int, pycompat.long)) for arg in args) or
+            (len(args) == 3 and args[2] == 0)
+        ):
+
+            return None
+
+        bounds = pycompat.range(*args)
+        if len(bounds) > self._max_trips:
+
+            return None
+
+        return tuple(bounds)
+
+    def _unroll(self, node):
+        """Unroll a single loop if it meets the limits."""
+        if (
+            not isinstance(node, ast.For) or
+            _size(node.body) > self._max_size or
+            _jumps(node.body)
+        ):
+
+            return None
+
+        # Loops which never run are left for dead code elimination. Values
+        # which cannot be built again as literals keep the loop.
+        values = self._values(node.iter)
+        if (
+            not values or
+            len(values) > self._max_trips or
+            not all(literal.is_buildable(value) for value in values)
+        ):
+
+            return None
+
+        statements = []
+        for value in values:
+
+            statements.append(
+                ast.copy_location(
+                    ast.Assign(
+                        targets=[clone.clone(node.target)],
+                        value=literal.build(value),
+                    ),
+                    node,
+                ),
+            )
+            statements.extend(clone.clone(stmt) for stmt in node.body)
+
+        # Without a break the 'else' clause always runs after the loop.
+        statements.extend(node.orelse)
+        self._unrolled += 1
+        self._replace(statements, node)
+
+    def visit_FunctionDef(self, node):
+        """Unroll the loops of a function."""
+        self.generic_visit(node)
+        loops = [
+            n for n in scope.walk(node)
+            if isinstance(n, ast.For)
+        ]
+        for loop in reversed(loops):
+
+            self._unroll(loop)
+
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
+def optimize(node, max_trips=MAX_TRIPS, max_size=MAX_SIZE):
+    """Optimize an AST by unrolling loops over small constant sequences.
+
+    Only loops within functions are unrolled. Loops over 'range' are left
+    alone in modules which rebind it or access namespaces dynamically. See
+    LoopUnroller for the loops which are unrolled.
+
+    Returns an UnrollResult whose 'unrolled' value is the number of loops
+    which were replaced.
+    """
+    names = localize.ModuleNames(node)
+    unroller = LoopUnroller(
+        node,
+        names,
+        max_trips=max_trips,
+        max_size=max_size,
+    )
+    unroller.visit()
+    return UnrollResult(unrolled=unroller.unrolled)
@@ -31,10 +31,16 @@ PY34 = PY3 and VERSION.minor == 4
 try:
     range = xrange
 except NameError:
-    pass
+    range = range
 
 # Provide a long type for py3.
 try:
     long = long
 except NameError:
     long = int
+
+# Provide the string types for isinstance checks.
+try:
+    string_types = (basestring,)
+except NameError:
+    string_types = (str,)
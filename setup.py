@@ -29,6 +29,15 @@ setup(
         ],
         'pycc.optimizers': [
             'pycc_constant_inliner = pycc.cli.extensions.constants:ConstantInlineExtension',
+            'pycc_localize = pycc.cli.extensions.localize:LocalizeExtension',
+            'pycc_licm = pycc.cli.extensions.licm:LoopInvariantExtension',
+            'pycc_deadcode = pycc.cli.extensions.deadcode:DeadCodeExtension',
+            'pycc_inline = pycc.cli.extensions.inline:InlineExtension',
+            'pycc_unroll = pycc.cli.extensions.unroll:UnrollExtension',
+            'pycc_membership = pycc.cli.extensions.membership:MembershipExtension',
+            'pycc_attrcache = pycc.cli.extensions.attrcache:AttributeCacheExtension',
+            'pycc_fusion = pycc.cli.extensions.fusion:FusionExtension',
+            'pycc_strings = pycc.cli.extensions.strings:StringExtension',
         ],
     },
 )
@@ -0,0 +1,42 @@
+"""Test suite for asttools.clone."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+from pycc.asttools import clone
+from pycc.asttools import parse
+
+
+def test_clone_copies_without_references():
+    """Ensure that a clone is equal to the original but shares no nodes."""
+    node = parse.parse('def f(a):\n    return a + 1\n')
+    function = node.body[0]
+    copy = clone.clone(function)
+
+    assert ast.dump(copy) == ast.dump(function)
+    assert copy.lineno == function.lineno
+    assert not hasattr(copy, 'parent')
+    originals = set(id(n) for n in ast.walk(function))
+    assert not any(id(n) in originals for n in ast.walk(copy))
+
+
+def test_clone_substitutes_nodes():
+    """Ensure that substituted nodes are used in place of copies."""
+    node = parse.parse('a + a * b')
+    value = node.body[0].value
+    replacement = ast.Name(id='c', ctx=ast.Load())
+
+    copy = clone.clone(
+        value,
+        lambda n: replacement if getattr(n, 'id', None) == 'a' else None,
+        node.body[0],
+    )
+
+    assert copy.left is replacement
+    assert copy.right.left is replacement
+    assert copy.right.right.id == 'b'
+    assert copy.right.right.col_offset == node.body[0].col_offset
@@ -5,6 +5,10 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import ast
+import os
+import sys
+
 import pytest
 
 from pycc import pycompat
@@ -29,6 +33,72 @@ def test_bytecode_compiler(node):
     compiler.ByteCodeCompiler()(node)
 
 
+def test_bytecode_is_deterministic(node, tmpdir):
+    """Ensure that compiling the same module twice gives the same bytes."""
+    path = tmpdir.join('module.py')
+    path.write(source)
+    first = compiler.ByteCodeCompiler()(node, location=str(path))
+    second = compiler.ByteCodeCompiler()(node, location=str(path))
+    assert first == second
+    assert first.startswith(compiler.magic_number())
+
+
+MODES = [compiler.INVALIDATION_MODE.TIMESTAMP]
+if pycompat.PY3 and pycompat.VERSION.minor > 6:
+
+    MODES.extend((
+        compiler.INVALIDATION_MODE.CHECKED_HASH,
+        compiler.INVALIDATION_MODE.UNCHECKED_HASH,
+    ))
+
+
+@pytest.mark.skipif(
+    pycompat.PY2 or pycompat.VERSION.minor < 4,
+    reason="the importlib loader APIs require >=PY34",
+)
+@pytest.mark.parametrize('mode', MODES)
+def test_bytecode_accepted_by_interpreter(mode, tmpdir, monkeypatch):
+    """Ensure that the interpreter loads bytecode instead of the source."""
+    import importlib.util
+
+    monkeypatch.setattr(sys, 'dont_write_bytecode', True)
+    path = tmpdir.join('pycc_compiled_module.py')
+    path.write('value = 1\n')
+    # The bytecode sets a different value so the test can tell which was run.
+    bytecode = compiler.ByteCodeCompiler(mode)(
+        ast.parse('value = 2\n'),
+        location=str(path),
+        source=b'value = 1\n',
+    )
+    cached = importlib.util.cache_from_source(str(path))
+    os.makedirs(os.path.dirname(cached))
+    with open(cached, 'wb') as cached_file:
+
+        cached_file.write(bytecode)
+
+    spec = importlib.util.spec_from_file_location(
+        'pycc_compiled_module',
+        str(path),
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module.value == 2
+
+
+@pytest.mark.skipif(
+    pycompat.PY3 and pycompat.VERSION.minor > 6,
+    reason="hash based bytecode is supported in >=PY37",
+)
+def test_hash_bytecode_unsupported(node):
+    """Ensure that hash based bytecode is refused by old interpreters."""
+    with pytest.raises(ValueError):
+
+        compiler.ByteCodeCompiler(compiler.INVALIDATION_MODE.CHECKED_HASH)(
+            node,
+            source=source.encode('utf-8'),
+        )
+
+
 @pytest.mark.skipif(
     pycompat.PY3 and pycompat.VERSION.minor > 3,
     reason="astkit does not yet support >=PY34",
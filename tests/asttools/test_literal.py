@@ -0,0 +1,61 @@
+"""Test suite for asttools.literal."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import pytest
+
+from pycc.asttools import literal
+from pycc.asttools import parse
+
+
+@pytest.mark.parametrize('value', (
+    1,
+    -1,
+    2.5,
+    -0.0,
+    1j,
+    'text',
+    b'bytes',
+    True,
+    None,
+    (1, (-2, 'three')),
+))
+def test_build_round_trip(value):
+    """Ensure that built nodes evaluate to the value they were built from."""
+    node = literal.build(value)
+
+    assert literal.is_literal(node)
+    assert literal.evaluate(node) == value
+    assert type(literal.evaluate(node)) is type(value)
+
+
+def test_parsed_literals():
+    """Ensure that literals written in source are recognized."""
+    node = parse.parse('(1, -2, "three")\nx\n(1, x)\n-x\n')
+
+    assert literal.evaluate(node.body[0].value) == (1, -2, 'three')
+    assert not literal.is_literal(node.body[1].value)
+    assert not literal.is_literal(node.body[2].value)
+    assert not literal.is_literal(node.body[3].value)
+    with pytest.raises(ValueError):
+
+        literal.evaluate(node.body[1].value)
+
+
+@pytest.mark.parametrize('value', (
+    float('inf'),
+    float('nan'),
+    2 ** (literal.MAX_INT_SIZE + 1),
+    'x' * (literal.MAX_STR_SIZE + 1),
+    (0,) * (literal.MAX_COLLECTION_SIZE + 1),
+    object(),
+))
+def test_build_rejects_values(value):
+    """Ensure that values without a small literal form are not built."""
+    assert not literal.is_buildable(value)
+    with pytest.raises(ValueError):
+
+        literal.build(value)
@@ -0,0 +1,55 @@
+"""Test suite for asttools.pragma."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pycc.asttools import parse
+from pycc.asttools import pragma
+
+source = """
+def marked(x):  # pycc: first, second
+    return x
+
+
+def body():
+    '''Docstring.'''
+    # pycc:third
+    return 1
+
+
+def unmarked():
+    # pycc: first
+    '''Docstring.'''
+    value = '# pycc: fourth'
+    return value  # pycc: fifth
+"""
+
+
+def test_scan_finds_comments():
+    """Ensure that only comment markers are found, by line."""
+    assert pragma.scan(source) == {
+        2: frozenset(('first', 'second')),
+        8: frozenset(('third',)),
+        13: frozenset(('first',)),
+        16: frozenset(('fifth',)),
+    }
+    assert pragma.scan(b'x = 1  # pycc: bytes\n') == {
+        1: frozenset(('bytes',)),
+    }
+    assert pragma.scan('def broken(:\n') == {}
+
+
+def test_has_pragma_checks_definition_lines():
+    """Ensure that markers apply from the definition to the first statement."""
+    node = parse.parse(source)
+    pragmas = pragma.get_pragmas(node)
+    marked, body, unmarked = node.body
+
+    assert pragma.has_pragma(marked, 'second', pragmas)
+    assert not pragma.has_pragma(marked, 'third', pragmas)
+    assert pragma.has_pragma(body, 'third', pragmas)
+    assert pragma.has_pragma(unmarked, 'first', pragmas)
+    assert not pragma.has_pragma(unmarked, 'fifth', pragmas)
+    assert not pragma.has_pragma(marked, 'first', {})
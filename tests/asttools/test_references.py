@@ -9,7 +9,9 @@ import ast
 
 import pytest
 
+from pycc.asttools import parse
 from pycc.asttools import references
+from pycc.asttools import visitor
 
 
 @pytest.fixture
@@ -62,3 +64,121 @@ def test_get_top_node(node):
 
     assert references.get_top_node(node) is node
     assert references.get_top_node(node.targets[0]) is node
+
+
+def test_add_references(node):
+    """Test that one traversal adds both parent and sibling references."""
+    references.add_references(node)
+
+    assert node.parent is None
+    assert node.targets[0].parent is node
+    assert node.targets[0].previous is None
+    assert node.targets[0].next is node.value
+    assert node.value.previous is node.targets[0]
+    assert node.value.next is None
+
+
+def test_reference_table(node):
+    """Test that a ReferenceTable holds references without changing nodes."""
+    table = references.ReferenceTable(node)
+
+    assert node.targets[0] in table
+    assert not hasattr(node.targets[0], 'parent')
+    assert references.get_parent(node) is None
+    assert references.get_parent(node.value) is node
+    assert references.get_previous(node.value) is node.targets[0]
+    assert references.get_next(node.targets[0]) is node.value
+    assert references.get_top_node(node.value) is node
+
+
+def test_reference_table_copy_location(node):
+    """Test that copy_location stores new references in the table."""
+    table = references.ReferenceTable(node)
+
+    original = node.targets[0]
+    dupe = references.copy_location(
+        ast.Name(id='y', ctx=ast.Store()),
+        original,
+    )
+
+    assert dupe in table
+    assert not hasattr(dupe, 'parent')
+    assert references.get_parent(dupe) is node
+    assert references.get_next(dupe) is node.value
+
+
+def test_lazy_reference_table():
+    """Test that a LazyReferenceTable only adds the nodes it is asked for."""
+    node = ast.parse('x = 1\ny = [2, 3]\n')
+    table = references.LazyReferenceTable(node)
+
+    assert len(table) == 1
+    assert references.get_parent(node.body[1]) is node
+    assert references.get_next(node.body[0]) is node.body[1]
+    assert len(table) == 3
+
+    item = node.body[1].value.elts[1]
+    assert references.get_parent(item) is node.body[1].value
+    assert references.get_previous(item) is node.body[1].value.elts[0]
+    assert references.get_top_node(item) is node
+    assert not hasattr(item, 'parent')
+    assert table.pending > 0
+
+
+def test_reference_table_is_found_by_node_id(node):
+    """Test that nodes are found in their own table without changing them."""
+    fields = [sorted(vars(n)) for n in ast.walk(node)]
+    table = references.ReferenceTable(node)
+    other = ast.parse('y = [2]\n')
+    other_table = references.ReferenceTable(other)
+    lazy = references.LazyReferenceTable(ast.parse('z = [3]\n'))
+    attributes = ast.parse('w = 4\n')
+    references.add_references(attributes)
+
+    assert references.get_table(node.value) is table
+    assert references.get_table(other.body[0].value.elts[0]) is other_table
+    assert references.get_table(attributes.body[0]) is None
+    assert references.get_parent(attributes.body[0]) is attributes
+    assert references.get_parent(other.body[0]) is other
+    assert len(lazy) == 1
+    assert [sorted(vars(n)) for n in ast.walk(node)] == fields
+
+
+def test_lazy_reference_table_ignores_other_trees():
+    """Test that nodes of other trees add no nodes to a lazy table."""
+    node = parse.parse('x = [1, 2]\n' * 100, lazy=True)
+    for mode in ({}, {'side_table': True}, {'lazy': True}):
+
+        other = parse.parse('y = [3, 4]\n', **mode)
+        for child in ast.walk(other):
+
+            assert references.has_references(child)
+            if not isinstance(child, ast.expr_context):
+
+                references.get_parent(child)
+
+        if mode:
+
+            # The shared Load context is already held by the first table.
+            assert len(other.reference_table) >= 7
+
+    assert not references.has_references(ast.Name(id='z', ctx=ast.Load()))
+    assert len(node.reference_table) == 1
+
+
+def test_visitors_expand_lazy_reference_tables():
+    """Test that a visitor adds the children of the nodes it visits."""
+    node = parse.parse('x = 1\ndef f():\n    return [2, 3]\n', lazy=True)
+
+    class Statements(visitor.NodeVisitor):
+
+        interesting_nodes = (ast.stmt,)
+
+    Statements(node).visit()
+    returned = node.body[1].body[0]
+    assert returned.value in node.reference_table._slots
+    assert returned.value.elts[1] not in node.reference_table._slots
+    assert references.get_parent(returned.value.elts[1]) is returned.value
+    assert references.get_previous(returned.value.elts[1]) is (
+        returned.value.elts[0]
+    )
@@ -77,3 +77,13 @@ def test_child_scopes(node, func_node, cls_node, method_node):
     assert cls_node in scope.child_scopes(node)
     assert method_node not in scope.child_scopes(node)
     assert method_node in scope.child_scopes(cls_node)
+
+
+def test_walk(node, func_node, cls_node, method_node):
+    """Test that walking a scope does not enter nested namespaces."""
+    nodes = list(scope.walk(node))
+    assert func_node in nodes
+    assert cls_node in nodes
+    assert func_node.body[0] not in nodes
+    assert method_node not in nodes
+    assert method_node in list(scope.walk(cls_node))
@@ -0,0 +1,136 @@
+"""Test suite for asttools.symbols."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+import pytest
+
+from pycc.asttools import parse
+from pycc.asttools import name
+from pycc.asttools import symbols
+from pycc.asttools import visitor
+
+
+source = """
+import os
+from sys import path as search_path
+
+first = 1
+first = 2
+left, right = 1, 2
+
+
+def function(arg, *args, **kwargs):
+
+    local = arg
+    return local
+
+
+class SomeClass(object):
+
+    attribute = True
+"""
+
+
+@pytest.fixture(params=(False, True), ids=('eager', 'lazy'))
+def node(request):
+    """Get as AST node from the source."""
+    return parse.parse(source, lazy=request.param)
+
+
+def test_table_attached(node):
+    """Test that parse attaches a symbol table to the tree."""
+    assert isinstance(node.symbol_table, symbols.SymbolTable)
+    assert symbols.get_symbol_table(node.body[5].body[0]) is node.symbol_table
+
+
+def test_declared_names(node):
+    """Test that declared names are found for each declaring node."""
+    assert tuple(symbols.declared_names(node.body[0])) == ('os',)
+    assert tuple(symbols.declared_names(node.body[1])) == ('search_path',)
+    assert tuple(symbols.declared_names(node.body[4])) == ('left', 'right')
+    assert tuple(symbols.declared_names(node.body[5])) == ('function',)
+    assert set(symbols.declared_names(node.body[5].args)) == set((
+        'arg',
+        'args',
+        'kwargs',
+    ))
+
+
+def test_bound_names():
+    """Test that every kind of binding is found."""
+    node = parse.parse(
+        "import a.b as c, d.e\n"
+        "for i, j in x:\n"
+        "    del k\n"
+        "def f(p, *q, **r):\n"
+        "    global g\n"
+        "    y += 1\n"
+        "try:\n"
+        "    pass\n"
+        "except E as h:\n"
+        "    pass\n"
+    )
+    bound = set(
+        token
+        for child in ast.walk(node)
+        for token in symbols.bound_names(child)
+    )
+    assert bound == set('c d f g h i j k p q r y'.split())
+
+
+def test_declarations(node):
+    """Test that all declarations of a name are recorded in order."""
+    table = node.symbol_table
+    assert table.declarations(node, 'first') == (node.body[2], node.body[3])
+    assert table.declaration(node, 'first') is node.body[2]
+    assert table.declaration(node, 'local') is None
+    assert table.declaration(node.body[5], 'local') is node.body[5].body[0]
+    assert table.declaration(node.body[5], 'arg') is node.body[5].args
+
+
+def test_matches_scan(node):
+    """Test that table lookups match a scan of the tree."""
+    names = [n for n in ast.walk(node) if isinstance(n, ast.Name)]
+    with_table = [name.declaration(n) for n in names]
+
+    del node.symbol_table
+    without_table = [name.declaration(n) for n in names]
+
+    assert len(names) > 0
+    assert all(a is b for a, b in zip(with_table, without_table))
+
+
+def test_updated_by_transformer(node):
+    """Test that replacements made by a NodeTransformer update the table."""
+    updates = []
+    node.symbol_table.subscribe(
+        lambda old, new, rebound: updates.append(rebound),
+    )
+
+    class Renamer(visitor.NodeTransformer):
+
+        def visit_Assign(self, node):
+
+            if isinstance(node.targets[0], ast.Name):
+
+                return ast.Assign(
+                    targets=[ast.Name(id='renamed', ctx=ast.Store())],
+                    value=node.value,
+                )
+
+            return node
+
+    Renamer(node).visit()
+
+    table = node.symbol_table
+    assert table.declaration(node, 'first') is None
+    assert table.declaration(node, 'renamed') is node.body[2]
+    assert table.declaration(node.body[5], 'local') is None
+    assert table.declaration(node.body[5], 'renamed') is node.body[5].body[0]
+    assert len(updates) > 0
+    assert all(updates)
@@ -13,6 +13,7 @@ import os
 import pytest
 
 from pycc.asttools import parse
+from pycc.asttools import references
 from pycc.asttools import visitor
 
 
@@ -63,3 +64,170 @@ def test_visitor_out_performs_original(big_ast):
     pct_diff = (diff_time / avg_time) * 100
 
     assert pct_diff > 100
+
+
+def test_transformer_splices_lists():
+    """Ensure statements can be replaced by lists of statements or removed."""
+    node = parse.parse('a = 1\nb = 2\nc = 3\n')
+
+    class Splicer(visitor.NodeTransformer):
+
+        def visit_Assign(self, node):
+
+            if node.targets[0].id == 'a':
+
+                return None
+
+            if node.targets[0].id == 'b':
+
+                return [
+                    ast.Assign(
+                        targets=[ast.Name(id='before', ctx=ast.Store())],
+                        value=ast.Name(id='c', ctx=ast.Load()),
+                    ),
+                    node,
+                ]
+
+            return node
+
+    transformer = Splicer(node)
+    transformer.visit()
+
+    assert [n.targets[0].id for n in node.body] == ['before', 'b', 'c']
+    assert transformer.replaced == 2
+    assert node.body[0].previous is None
+    assert node.body[0].next is node.body[1]
+    assert node.body[1].next is node.body[2]
+    assert node.body[0].value.parent is node.body[0]
+    assert node.symbol_table.declaration(node, 'before') is node.body[0]
+    assert node.symbol_table.declaration(node, 'a') is None
+
+
+@pytest.mark.parametrize('mode', ('side_table', 'lazy'))
+def test_transformer_uses_reference_table(mode):
+    """Ensure replacements update a side table rather than the nodes."""
+    node = parse.parse('a = 1\nb = 2\n', **{mode: True})
+
+    class Renamer(visitor.NodeTransformer):
+
+        def visit_Name(self, node):
+
+            return ast.Name(id=node.id * 2, ctx=node.ctx)
+
+    Renamer(node).visit()
+
+    assert [n.targets[0].id for n in node.body] == ['aa', 'bb']
+    assert not any(
+        hasattr(n, 'parent') for n in ast.walk(node)
+        if not isinstance(n, ast.expr_context)
+    )
+    target = node.body[1].targets[0]
+    assert references.get_parent(target) is node.body[1]
+    assert references.get_next(target) is node.body[1].value
+    assert references.get_previous(node.body[1]) is node.body[0]
+
+
+def test_visitor_skips_uninteresting_subtrees():
+    """Ensure expressions are not walked when only statements are needed."""
+    node = parse.parse('def f(a):\n    return [a + 1 for a in a]\n')
+
+    class Functions(visitor.NodeVisitorIter):
+
+        interesting_nodes = (ast.stmt,)
+
+        def visit_FunctionDef(self, node):
+
+            self.generic_visit(node)
+            return node.name
+
+        def visit_Name(self, node):
+
+            return node.id
+
+    functions = Functions(node)
+    assert list(functions.visit()) == ['f']
+
+    # Module, FunctionDef, arguments, Return, and the ListComp.
+    assert functions.visited == 5
+    assert visitor.dispatch_table(Functions)[ast.FunctionDef] is not None
+
+
+def test_transformer_replaces_after_splices():
+    """Ensure nodes are found after earlier siblings were added or removed."""
+    node = parse.parse(''.join(
+        'x{0} = {0}\nx{0}\n'.format(idx) for idx in range(20)
+    ))
+
+    class Mover(visitor.NodeTransformer):
+
+        def visit_Expr(self, node):
+
+            return []
+
+        def visit_Assign(self, node):
+
+            return [node, ast.Pass()]
+
+    transformer = Mover(node)
+    transformer.visit()
+
+    assert transformer.replaced == 40
+    assert [n.__class__ for n in node.body] == [ast.Assign, ast.Pass] * 20
+    for previous, current in zip(node.body, node.body[1:]):
+
+        assert previous.next is current
+        assert current.previous is previous
+        assert current.parent is node
+
+    assert node.body[-1].next is None
+    assert node.symbol_table.declaration(node, 'x19') is node.body[-2]
+
+
+def test_fused_transformer_passes_replacements():
+    """Ensure fused transformers see the replacements made before them."""
+    node = parse.parse('x = a + b\ny = [a]\n')
+
+    class Renamer(visitor.NodeTransformer):
+
+        def visit_Name(self, node):
+
+            if node.id == 'a':
+
+                return ast.Name(id='c', ctx=node.ctx)
+
+            return node
+
+        def visit_List(self, node):
+
+            self.generic_visit(node)
+            return ast.Tuple(elts=node.elts, ctx=node.ctx)
+
+    class Collector(visitor.NodeTransformer):
+
+        def __init__(self, node):
+
+            super(Collector, self).__init__(node)
+            self.names = []
+
+        def visit_Name(self, node):
+
+            self.names.append(node.id)
+            return node
+
+        def visit_Tuple(self, node):
+
+            self.generic_visit(node)
+            return node
+
+    renamer = Renamer(node)
+    collector = Collector(node)
+    fused = visitor.FusedTransformer(node, (renamer, collector))
+    fused.visit()
+
+    assert sorted(collector.names) == ['b', 'c', 'c', 'x', 'y']
+    assert fused.replaced == 3
+    assert isinstance(node.body[1].value, ast.Tuple)
+    assert references.get_parent(node.body[1].value.elts[0]) is (
+        node.body[1].value
+    )
+    assert renamer.visited == collector.visited == 0
@@ -5,11 +5,13 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import ast
 import functools
 
 import pytest
 
 from pycc.asttools import parse
+from pycc.asttools import visitor
 from pycc.astwrappers import name
 
 
@@ -111,3 +113,62 @@ def test_detects_constants(node):
     assert len(tuple(name_wrap.uses)) > 1
     assert len(tuple(name_wrap.assignments)) == 1
     assert name_wrap.constant is True
+
+
+def test_use_chains_shared(node):
+    """Test that all names in a tree share one use chain cache."""
+    chains = name.use_chains(node)
+    assert chains is not None
+    assert name.use_chains(node.body[-1]) is chains
+
+
+def test_use_chains_follow_replacements(node):
+    """Test that cached uses are updated when the tree is transformed."""
+    name_wrap = functools.reduce(
+        lambda p, n: n if n.token == 'reference_somewhere' else p,
+        name.NameGenerator(node).visit(),
+        None,
+    )
+    assert len(tuple(name_wrap.uses)) == 2
+
+    class Inliner(visitor.NodeTransformer):
+
+        def visit_Name(self, node):
+
+            if node.id == 'reference_somewhere':
+
+                if isinstance(node.ctx, ast.Load):
+
+                    return ast.Num(n=123)
+
+            return node
+
+    Inliner(node).visit()
+    assert len(tuple(name_wrap.uses)) == 1
+    assert len(tuple(name_wrap.assignments)) == 1
+
+
+def test_use_chains_invalidated_by_assignment(node):
+    """Test that new assignments discard the cached uses."""
+    name_wrap = functools.reduce(
+        lambda p, n: n if n.token == 'assign_once' else p,
+        name.NameGenerator(node).visit(),
+        None,
+    )
+    assert name_wrap.constant is True
+
+    class Reassign(visitor.NodeTransformer):
+
+        def visit_Assign(self, node):
+
+            if node.targets[0].id != 'reference_somewhere':
+
+                return node
+
+            return ast.Assign(
+                targets=[ast.Name(id='assign_once', ctx=ast.Store())],
+                value=ast.Num(n=1),
+            )
+
+    Reassign(node).visit()
+    assert name_wrap.constant is False
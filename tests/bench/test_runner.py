@@ -0,0 +1,60 @@
+"""Test suite for bench.runner."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+
+from pycc.bench import corpus
+from pycc.bench import runner
+from pycc.cli.extensions import constants
+
+
+class BrokenExtension(constants.ConstantInlineExtension):
+
+    name = 'broken'
+
+    @staticmethod
+    def optimize(node):
+
+        raise ValueError('broken')
+
+
+def test_run_reports_each_stage():
+    """Test that each stage and the run time of the module are measured."""
+    module = corpus.Module('small', corpus.constant_chain(5), True)
+    extension = constants.ConstantInlineExtension
+    report = runner.run((module,), ((extension, {}),), repeat=1)
+
+    json.dumps(report)
+    assert len(report['results']) == 1
+    result = report['results'][0]
+    assert result['error'] is None
+    assert result['module'] == 'small'
+    assert result['extension'] == extension.name
+    assert set(result['stages']) == set(runner.STAGES)
+    assert all(s['seconds'] >= 0 for s in result['stages'].values())
+    assert result['execution']['original'] > 0
+    assert result['execution']['optimized'] > 0
+
+
+def test_run_combines_extensions_and_reports_errors():
+    """Test that extensions are also run together and errors are captured."""
+    module = corpus.Module('small', 'x = 1\n', False)
+    report = runner.run(
+        (module,),
+        (
+            (constants.ConstantInlineExtension, {}),
+            (BrokenExtension, {}),
+        ),
+        repeat=1,
+    )
+
+    results = dict((r['extension'], r) for r in report['results'])
+    assert set(results) == set(('constants', 'broken', 'all'))
+    assert results['constants']['execution'] is None
+    assert results['broken']['error'] == 'ValueError: broken'
+    assert results['all']['error'] == 'ValueError: broken'
+    assert 'ValueError: broken' in runner.format_table(report)
@@ -0,0 +1,31 @@
+"""Test suite for bench.visitor."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+from pycc.bench import corpus
+from pycc.bench import visitor
+
+
+def test_visitors_agree():
+    """Test that every visitor counts the same functions."""
+    node = ast.parse(corpus.FUNCTION_CALLS)
+    seconds, counts = visitor.measure(node, repeat=1, number=1)
+
+    assert set(seconds) == set(visitor.VISITORS)
+    assert all(s > 0 for s in seconds.values())
+    assert len(set(counts)) == 1
+    assert counts[0] > 0
+
+
+def test_format_table():
+    """Test that each module gets a row with a speedup for each visitor."""
+    module = corpus.Module('small', 'def f():\n    pass\n', False)
+    table = visitor.format_table(visitor.run((module,), repeat=1))
+
+    assert table.splitlines()[1].startswith('small')
+    assert table.count('x') == len(visitor.VISITORS) - 1
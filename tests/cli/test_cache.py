@@ -0,0 +1,79 @@
+"""Test suite for cli.cache."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import time
+
+import pytest
+
+from pycc.cli import cache
+
+
+@pytest.fixture
+def build_cache(tmpdir):
+    """Get a BuildCache which holds up to 100 bytes."""
+    return cache.BuildCache(str(tmpdir), 100)
+
+
+def test_key_covers_inputs(build_cache):
+    """Test that keys change with both the source and the options."""
+    key = build_cache.key(b'x = 1', 'options')
+    assert key == build_cache.key(b'x = 1', 'options')
+    assert key != build_cache.key(b'x = 2', 'options')
+    assert key != build_cache.key(b'x = 1', 'other options')
+
+
+def test_get_and_put(build_cache):
+    """Test that stored bodies can be retrieved by key."""
+    key = build_cache.key(b'x = 1', '')
+    assert build_cache.get(key) is None
+
+    build_cache.put(key, b'body')
+    assert build_cache.get(key) == b'body'
+
+
+def test_evicts_least_recently_used(build_cache):
+    """Test that the oldest entries are removed first."""
+    keys = [build_cache.key(str(x).encode('utf-8'), '') for x in range(3)]
+    for age, key in enumerate(keys):
+
+        build_cache.put(key, b'x' * 40)
+        entry = os.path.join(
+            build_cache.path,
+            cache.ENTRY_DIR,
+            key[:2],
+            key[2:],
+        )
+        stamp = time.time() - 100 + age
+        os.utime(entry, (stamp, stamp))
+
+    # Reading the first entry marks it as the most recently used.
+    build_cache.get(keys[0])
+
+    assert build_cache.evict() == 1
+    assert build_cache.get(keys[0]) is not None
+    assert build_cache.get(keys[1]) is None
+    assert build_cache.get(keys[2]) is not None
+
+
+def test_evicts_only_entries(tmpdir):
+    """Test that files other than entries are never counted or removed."""
+    build_cache = cache.BuildCache(str(tmpdir), 0)
+    key = build_cache.key(b'x = 1', '')
+    build_cache.put(key, b'body')
+    tmpdir.join('notes.txt').write('x' * 100)
+    bucket = tmpdir.join(cache.ENTRY_DIR, key[:2])
+    bucket.join('.tmp-partial').write('x' * 100)
+    bucket.join('README').write('x' * 100)
+
+    assert build_cache.evict() == 1
+    assert build_cache.get(key) is None
+    assert sorted(f.basename for f in bucket.listdir()) == [
+        '.tmp-partial',
+        'README',
+    ]
+    assert tmpdir.join('notes.txt').check()
@@ -0,0 +1,246 @@
+"""Test suite for cli.common."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import ast
+import gc
+import marshal
+import weakref
+
+import pytest
+
+from pycc.cli import common
+from pycc.cli import compile as compiletool
+
+
+def build_repr(module):
+    """Build a module by dumping its tree."""
+    return ast.dump(module.node)
+
+
+def test_process_file_collects_reports(tmpdir):
+    """Test that the reports of each extension which ran are returned."""
+    source = tmpdir.join('module.py')
+    source.write('def double(x):\n    return x * 2\n\nvalue = double(2)\n')
+    parser = argparse.ArgumentParser()
+    common.register_arguments(parser)
+    args = parser.parse_args([
+        '--source', str(source),
+        '--destination', 'stdout',
+        '--inline',
+    ])
+
+    result = common.process_file(
+        args,
+        build_repr,
+        None,
+        None,
+        common.build_options(args, build_repr),
+        str(source),
+    )
+
+    assert result.error is None
+    assert result.reports == ('inline: 1 call sites inlined',)
+
+
+def test_process_file_follows_pragmas(tmpdir):
+    """Test that the pycc comment markers of a module are honoured."""
+    source = tmpdir.join('module.py')
+    source.write(
+        'def copy(rows):\n'
+        '    out = []\n'
+        '    for row in rows:\n'
+        '        out.append(row)\n'
+        '    return out\n'
+        '\n'
+        '\n'
+        'def skipped(rows):\n'
+        '    # pycc: no-attr-cache\n'
+        '    out = []\n'
+        '    for row in rows:\n'
+        '        out.append(row)\n'
+        '    return out\n'
+    )
+    parser = argparse.ArgumentParser()
+    common.register_arguments(parser)
+    args = parser.parse_args([
+        '--source', str(source),
+        '--destination', 'stdout',
+        '--attrcache',
+    ])
+
+    result = common.process_file(
+        args,
+        build_repr,
+        None,
+        None,
+        common.build_options(args, build_repr),
+        str(source),
+    )
+
+    assert result.error is None
+    assert result.reports == ('attrcache: 1 method calls cached',)
+
+
+def parse_args(argv):
+    """Get the arguments shared by the CLI tools."""
+    parser = argparse.ArgumentParser()
+    common.register_arguments(parser)
+    return parser.parse_args(argv)
+
+
+@pytest.mark.parametrize('jobs', (1, 3))
+def test_process_reports_in_order(tmpdir, capsys, jobs):
+    """Test that results follow the order modules were found in."""
+    for idx in range(6):
+
+        tmpdir.join('module{0}.py'.format(idx)).write(
+            'VALUE = {0}\n'.format(idx) if idx != 2 else 'def broken(:\n',
+        )
+
+    args = parse_args([
+        '--source', str(tmpdir),
+        '--destination', str(tmpdir.join('out')),
+        '--jobs', str(jobs),
+        '--verbose',
+    ])
+
+    failures = common.process(
+        args,
+        compiletool.BytecodeBuilder('unchecked-hash'),
+        compiletool.output_path,
+    )
+    _, err = capsys.readouterr()
+
+    assert [f.path for f in failures] == [str(tmpdir.join('module2.py'))]
+    assert failures[0].error.startswith('SyntaxError')
+    assert [line.split(':')[0] for line in err.splitlines()[:6]] == [
+        str(tmpdir.join('module{0}.py'.format(idx))) for idx in range(6)
+    ]
+    assert 'module2.py: SyntaxError' in err
+    assert sorted(f.basename for f in tmpdir.join('out').listdir()) == [
+        'module{0}.pyc'.format(idx) for idx in (0, 1, 3, 4, 5)
+    ]
+
+
+@pytest.mark.parametrize('jobs', (1, 2))
+def test_process_keeps_relative_paths(tmpdir, jobs):
+    """Test that modules with the same name are written to their own path."""
+    source = tmpdir.mkdir('pkg')
+    source.mkdir('a').join('__init__.py').write('A = 1\n')
+    source.mkdir('b').join('__init__.py').write('B = 2\n')
+    destination = tmpdir.join('out')
+    args = parse_args([
+        '--source', str(source),
+        '--destination', str(destination),
+        '--jobs', str(jobs),
+    ])
+
+    failures = common.process(
+        args,
+        compiletool.BytecodeBuilder('unchecked-hash'),
+        compiletool.output_path,
+    )
+
+    assert failures == ()
+    first = destination.join('a', '__init__.pyc').read_binary()
+    second = destination.join('b', '__init__.pyc').read_binary()
+    assert first != second
+
+
+@pytest.mark.parametrize('available', (True, False))
+def test_process_reports_peak_memory(tmpdir, capsys, monkeypatch, available):
+    """Test that verbose runs end with a summary of the peak memory use."""
+    tmpdir.join('module.py').write('VALUE = 1\n')
+    if not available:
+
+        monkeypatch.setattr(common, 'resource', None)
+        assert common.peak_rss() is None
+
+    args = parse_args([
+        '--source', str(tmpdir),
+        '--destination', str(tmpdir.join('out')),
+        '--verbose',
+    ])
+
+    common.process(
+        args,
+        compiletool.BytecodeBuilder('unchecked-hash'),
+        compiletool.output_path,
+    )
+    summary = capsys.readouterr()[1].splitlines()[-1]
+
+    assert summary.startswith(
+        'Processed 1 modules with 0 failures. Peak RSS: ',
+    )
+    if available:
+
+        assert summary.endswith(' MiB')
+        assert float(summary.split(': ')[1].split()[0]) > 0
+
+    else:
+
+        assert summary.endswith(': unknown')
+
+
+class TreeRecorder(object):
+
+    """Build callable which records whether earlier trees were released."""
+
+    def __init__(self):
+        """Initialize the recorder with no trees."""
+        self.trees = []
+        self.alive = []
+
+    def __call__(self, module):
+        """Count the earlier trees still alive and dump the tree."""
+        gc.collect()
+        self.alive.append(sum(1 for tree in self.trees if tree() is not None))
+        self.trees.append(weakref.ref(module.node))
+        return ast.dump(module.node)
+
+
+def test_process_streams_modules(tmpdir):
+    """Test that each tree is released before the next module is built."""
+    for idx in range(4):
+
+        tmpdir.join('module{0}.py'.format(idx)).write('VALUE = 1\n')
+
+    args = parse_args([
+        '--source', str(tmpdir),
+        '--destination', str(tmpdir.join('out')),
+    ])
+    recorder = TreeRecorder()
+
+    assert common.process(args, recorder, compiletool.output_path) == ()
+    assert recorder.alive == [0, 0, 0, 0]
+
+
+def test_cache_keeps_files_with_the_same_source_apart(tmpdir):
+    """Test that bytecode is never shared between files at other paths."""
+    source = tmpdir.mkdir('pkg')
+    source.mkdir('a').join('__init__.py').write('')
+    source.mkdir('b').join('__init__.py').write('')
+    args = parse_args([
+        '--source', str(source),
+        '--destination', str(tmpdir.join('out')),
+        '--cache-dir', str(tmpdir.join('cache')),
+    ])
+
+    failures = common.process(
+        args,
+        compiletool.BytecodeBuilder('unchecked-hash'),
+        compiletool.output_path,
+    )
+
+    assert failures == ()
+    for package in ('a', 'b'):
+
+        body = tmpdir.join('out', package, '__init__.pyc').read_binary()
+        assert marshal.loads(body[16:]).co_filename == (
+            common.abspath(str(source.join(package, '__init__.py')))
+        )
@@ -0,0 +1,164 @@
+"""Test suite for cli.extensions.passes."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+import pytest
+
+from pycc import pycompat
+from pycc.asttools import parse
+from pycc.cli.extensions import constants
+from pycc.cli.extensions import deadcode
+from pycc.cli.extensions import fusion
+from pycc.cli.extensions import interfaces
+from pycc.cli.extensions import membership
+from pycc.cli.extensions import passes
+from pycc.cli.extensions import strings
+from pycc.cli.extensions import unroll
+
+
+def renamer(name, old, new, after=()):
+    """Build an extension which renames every use of a name."""
+
+    class Renamer(interfaces.CliExtension):
+
+        arguments = ()
+
+        @staticmethod
+        def optimize(node):
+
+            renamed = 0
+            for child in ast.walk(node):
+
+                if isinstance(child, ast.Name) and child.id == old:
+
+                    child.id = new
+                    renamed += 1
+
+            return renamed
+
+        @staticmethod
+        def changed(result):
+
+            return result > 0
+
+    Renamer.name = name
+    Renamer.after = after
+    return Renamer
+
+
+def test_order_runs_dependencies_first():
+    """Test that extensions run after those they name in 'after'."""
+    first = renamer('first', 'a', 'b', after=('second', 'missing'))
+    second = renamer('second', 'b', 'c')
+    third = renamer('third', 'c', 'd')
+
+    ordered = passes.order(((first, {}), (third, {}), (second, {})))
+
+    assert [ext.name for ext, _ in ordered] == ['third', 'second', 'first']
+
+    second.after = ('first',)
+    with pytest.raises(ValueError):
+
+        passes.order(((first, {}), (second, {})))
+
+
+def test_order_folds_strings_after_constants():
+    """Test that strings are folded once constants are in-lined."""
+    ordered = passes.order((
+        (strings.StringExtension, {}),
+        (constants.ConstantInlineExtension, {}),
+    ))
+
+    assert [ext.name for ext, _ in ordered] == ['constants', 'strings']
+
+
+def test_group_fuses_transformers():
+    """Test that consecutive extensions with transformers share a group."""
+    groups = passes.group((
+        (unroll.UnrollExtension, {}),
+        (membership.MembershipExtension, {}),
+        (fusion.FusionExtension, {}),
+        (strings.StringExtension, {}),
+        (unroll.UnrollExtension, {}),
+    ))
+
+    assert [[ext.name for ext, _ in members] for members in groups] == [
+        ['unroll'],
+        ['membership', 'fusion', 'strings'],
+        ['unroll'],
+    ]
+
+
+@pytest.mark.skipif(pycompat.PY2, reason="Strings are only folded on PY3.")
+def test_fused_extensions_match_optimize():
+    """Test that a fused group rewrites a tree as the extensions do alone."""
+    source = (
+        'def f(values):\n'
+        '    total = sum([v * 2 for v in map(lambda x: x + 1, values)])\n'
+        '    if total in [1, 2, 3]:\n'
+        '        return "%s-%d" % ("total", 4)\n'
+        '    return str(total) + "!"\n'
+    )
+    extensions = (
+        (membership.MembershipExtension, {}),
+        (fusion.FusionExtension, {}),
+        (strings.StringExtension, {}),
+    )
+    expected = parse.parse(source)
+    for ext, kwargs in extensions:
+
+        ext.optimize(expected, **kwargs)
+
+    node = parse.parse(source)
+    results = passes.PassManager(extensions).run(node)
+
+    assert ast.dump(node) == ast.dump(expected)
+    assert [(ext.name, tuple(result)) for ext, result in results] == [
+        ('membership', (1,)),
+        ('fusion', (1,)),
+        ('strings', (2,)),
+    ]
+
+
+def test_rounds_rerun_changed_inputs():
+    """Test that extensions run again only when others changed the tree."""
+    first = renamer('first', 'y', 'z')
+    second = renamer('second', 'x', 'y')
+    extensions = ((first, {}), (second, {}))
+
+    node = parse.parse('x\n')
+    results = passes.PassManager(extensions).run(node)
+    assert [ext.name for ext, _ in results] == ['first', 'second']
+    assert node.body[0].value.id == 'y'
+
+    node = parse.parse('x\n')
+    results = passes.PassManager(extensions, rounds=5).run(node)
+    assert [ext.name for ext, _ in results] == [
+        'first', 'second', 'first', 'second',
+    ]
+    assert node.body[0].value.id == 'z'
+
+
+def test_rounds_count_replaced_nodes():
+    """Test that nodes replaced by a transformer count as a change."""
+    extensions = (
+        (deadcode.DeadCodeExtension, {}),
+        (constants.ConstantInlineExtension, {}),
+    )
+    node = parse.parse(
+        'if False:\n'
+        '    X = 2\n'
+        'X = 1\n'
+        'print(X)\n'
+    )
+    results = passes.PassManager(extensions, rounds=5).run(node)
+
+    assert [ext.name for ext, _ in results] == [
+        'constants', 'deadcode', 'constants', 'deadcode',
+    ]
+    assert not isinstance(node.body[-1].value.args[0], ast.Name)
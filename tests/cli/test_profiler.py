@@ -0,0 +1,92 @@
+"""Test suite for cli.profiler."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import ast
+import json
+
+from pycc.asttools import parse
+from pycc.asttools import visitor
+from pycc.cli import common
+from pycc.cli import profiler
+
+
+class Renamer(visitor.NodeTransformer):
+
+    def visit_Name(self, node):
+
+        return ast.Name(id='renamed', ctx=node.ctx)
+
+
+def test_stage_counts_nodes():
+    """Test that a stage records the nodes visited and replaced."""
+    prof = profiler.Profiler()
+    node = parse.parse('x = y + z\n')
+    with prof.stage('module.py', 'rename'):
+
+        Renamer(node).visit()
+
+    event, = prof.events
+    assert event.path == 'module.py'
+    assert event.stage == 'rename'
+    assert event.duration >= 0
+    # The contexts of the replaced names are never visited.
+    assert event.visited == len(list(ast.walk(node))) - 3
+    assert event.replaced == 3
+
+
+def test_summary_and_trace():
+    """Test that the reports cover every stage and the slowest files."""
+    prof = profiler.Profiler()
+    for path in ('a.py', 'b.py', 'c.py'):
+
+        for stage in ('parse', 'build'):
+
+            with prof.stage(path, stage):
+
+                pass
+
+    summary = prof.summary(limit=2)
+    assert 'parse' in summary and 'build' in summary
+    assert len(summary.splitlines()) == 3 + 2 + 2
+
+    trace = json.loads(json.dumps(prof.trace(limit=2)))
+    complete = [e for e in trace['traceEvents'] if e['ph'] == 'X']
+    assert len(complete) == 4
+    assert set(e['name'] for e in complete) == set(('parse', 'build'))
+
+
+def build_repr(module):
+    """Build a module by dumping its tree."""
+    return ast.dump(module.node)
+
+
+def test_process_file_reports_events(tmpdir):
+    """Test that each stage of processing a file is profiled."""
+    source = tmpdir.join('module.py')
+    source.write('x = 1\n')
+    parser = argparse.ArgumentParser()
+    common.register_arguments(parser)
+    args = parser.parse_args([
+        '--source', str(source),
+        '--destination', 'stdout',
+        '--profile',
+    ])
+
+    result = common.process_file(
+        args,
+        build_repr,
+        None,
+        None,
+        common.build_options(args, build_repr),
+        str(source),
+    )
+
+    assert result.error is None
+    stages = [e.stage for e in result.events]
+    assert stages[:2] == ['parse', 'references']
+    assert stages[-1] == 'build'
@@ -0,0 +1,174 @@
+"""Test suite for optimizers.attrcache."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import os
+
+from pycc.asttools import parse
+from pycc.optimizers import attrcache
+from pycc.optimizers import localize
+
+source = """
+import os
+
+
+class Buffer(object):
+
+    def __init__(self):
+        self._buf = []
+
+    def fill(self, items):
+        for item in items:
+            self._buf.append(os.path.join('a', item))
+        return self._buf
+
+    def flush(self):
+        self._buf = []
+
+    def drain(self, items):
+        for item in items:
+            self.flush()
+            self._buf.append(item)
+        return self._buf
+
+
+def gather(rows):
+    result = []
+    for row in rows:
+        seen = []
+        for cell in row:
+            result.append(cell)
+            seen.append(cell)
+        result.extend(seen)
+    return result
+
+
+def rebinds(rows):
+    out = []
+    for row in rows:
+        out.append(row)
+        out = list(out)
+        row.sort()
+    return out
+
+
+def patched(rows):
+    out = []
+    for row in rows:
+        out.append(row)
+        out.append = None
+    return out
+
+
+def skipped(rows):
+    # pycc: no-attr-cache
+    out = []
+    for row in rows:
+        out.append(row)
+    return out
+
+
+def late(rows):
+    for row in rows:
+        out.append(row)
+    out = []
+    return out
+
+
+def branch(rows, flag):
+    if flag:
+        out = []
+    for row in rows:
+        out.append(row)
+    return rows
+
+
+def conditional(items, cb):
+    for item in items:
+        if cb is not None:
+            cb.append(item)
+    return items
+"""
+
+
+def run(node):
+    """Compile a module tree and get its namespace."""
+    namespace = {}
+    ast.fix_missing_locations(node)
+    exec(compile(node, '<test>', 'exec', dont_inherit=True), namespace)
+    return namespace
+
+
+def cached(function):
+    """Get the names of the methods a function calls through a cache."""
+    return sorted(
+        ast.dump(n.value) for n in ast.walk(function)
+        if isinstance(n, ast.Assign) and
+        getattr(n.targets[0], 'id', '').startswith(attrcache.TEMP_PREFIX)
+    )
+
+
+def test_caches_methods():
+    """Test that methods called in loops are cached before the loop."""
+    node = parse.parse(source)
+    result = attrcache.optimize(node)
+    namespace = run(node)
+    functions = dict(
+        (n.name, n) for n in ast.walk(node)
+        if isinstance(n, ast.FunctionDef)
+    )
+
+    assert namespace['Buffer']().fill(['b']) == [os.path.join('a', 'b')]
+    assert namespace['gather']([[1, 2], [3]]) == [1, 2, 1, 2, 3, 3]
+    assert len(cached(functions['fill'])) == 2
+    assert len(cached(functions['gather'])) == 2
+    assert result.cached == 5
+
+    # The inner loop does not run on every iteration of the outer loop, so
+    # its calls are cached within the outer loop and 'extend' is not.
+    outer = functions['gather'].body[-2]
+    assert isinstance(outer, ast.For)
+    assert [n.__class__ for n in outer.body] == [
+        ast.Assign,
+        ast.Assign,
+        ast.Assign,
+        ast.For,
+        ast.Expr,
+    ]
+
+    # Calling 'flush' replaces '_buf' so only 'flush' itself is cached.
+    assert namespace['Buffer']().drain([1, 2]) == [2]
+    assert len(cached(functions['drain'])) == 1
+    assert namespace['branch']([], False) == []
+    assert namespace['conditional']([1], None) == [1]
+    for name in (
+        'rebinds',
+        'patched',
+        'skipped',
+        'late',
+        'branch',
+        'conditional',
+    ):
+
+        assert cached(functions[name]) == []
+
+
+def test_caches_methods_of_added_names():
+    """Test that names bound by other optimizers are handled."""
+    node = parse.parse(source)
+    localize.optimize(node)
+    attrcache.optimize(node)
+    namespace = run(node)
+    functions = dict(
+        (n.name, n) for n in ast.walk(node)
+        if isinstance(n, ast.FunctionDef)
+    )
+
+    assert namespace['Buffer']().fill(['b']) == [os.path.join('a', 'b')]
+    assert len(cached(functions['fill'])) == 2
+    assert len(cached(functions['gather'])) == 2
+    assert cached(functions['late']) == []
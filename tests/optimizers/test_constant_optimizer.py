@@ -9,6 +9,7 @@ import ast
 
 import pytest
 
+from pycc.asttools import literal
 from pycc.asttools import parse
 from pycc.optimizers import constant
 
@@ -52,3 +53,113 @@ def test_constant_inliner(node):
     # Check return val of var function.
     assert isinstance(node.body[6].body[0].value, ast.Name)
     assert node.body[6].body[0].value.id == 'FIVE'
+
+
+def test_worklist_matches_fixed_point():
+    """Test that the worklist mode produces the same tree as full passes."""
+    chain = "\n".join(
+        ["C0 = 1"] +
+        ["C{0} = C{1} + 1".format(i, i - 1) for i in range(1, 20)] +
+        ["print(C19)"]
+    )
+    worklist_node = parse.parse(chain)
+    worklist_result = constant.optimize(worklist_node)
+    full_node = parse.parse(chain)
+    full_result = constant.optimize(full_node, worklist=False)
+
+    assert ast.dump(worklist_node) == ast.dump(full_node)
+    assert worklist_node.body[-1].value.args[0].n == 20
+
+    # Only the first iteration should visit the whole tree.
+    assert worklist_result.touched[0] == full_result.touched[0]
+    assert max(worklist_result.touched[1:]) < worklist_result.touched[0]
+    assert sum(worklist_result.touched) < sum(full_result.touched)
+
+
+@pytest.mark.parametrize('expression,expected', (
+    ("'ab' + 'cd'", 'abcd'),
+    ("b'a' * 3", b'aaa'),
+    ('-(3) + ~4', -8),
+    ('not 0', True),
+    ('1 < 2 < 3', True),
+    ('3 in (1, 2, 3)', True),
+    ('None is None', True),
+    ('(1, 2) + (3,)', (1, 2, 3)),
+    ('(1, (2, 3))[1][0]', 2),
+    ("'hello'[1:3]", 'el'),
+    ('0 or "" or 5', 5),
+    ('6 & 3 | 8 ^ 1', 11),
+))
+def test_folds_expressions(expression, expected):
+    """Test that expressions of literals are replaced by their values."""
+    node = parse.parse('VALUE = {0}'.format(expression))
+    constant.optimize(node)
+
+    assert literal.evaluate(node.body[0].value) == expected
+
+
+@pytest.mark.parametrize('expression', (
+    "'x' * 10 ** 9",
+    '2 ** 1000',
+    '1 << 200',
+    '1 / 0',
+    '1e308 * 10',
+    '1 is 1',
+    "'%s' % 1",
+    'x and 0',
+))
+def test_skips_expressions(expression):
+    """Test that large, failing, or unpredictable expressions are kept."""
+    node = parse.parse('VALUE = {0}'.format(expression))
+    constant.optimize(node)
+
+    assert not literal.is_literal(node.body[0].value)
+
+
+def test_folds_partial_boolean_operations():
+    """Test that literals which do not decide the result are removed."""
+    node = parse.parse('VALUE = 1 and x\nOTHER = 1 and x and y')
+    constant.optimize(node)
+
+    assert isinstance(node.body[0].value, ast.Name)
+    assert len(node.body[1].value.values) == 2
+
+
+@pytest.mark.parametrize('worklist', (True, False))
+def test_keeps_class_attributes_which_alias_themselves(worklist):
+    """Test that 'X = X' in a class body is left alone and terminates."""
+    node = parse.parse('X = 1\nclass A:\n    X = X\n')
+    result = constant.optimize(node, worklist=worklist)
+
+    assert node.body[1].body[0].value.id == 'X'
+    assert len(result.touched) == 1
+
+
+def test_skips_values_too_large_to_build():
+    """Test that names of values too large to build again are kept."""
+    node = parse.parse(
+        'TEXT = {0!r}\nBIG = {1}\nSIZE = len(TEXT) + BIG\n'.format(
+            'x' * (literal.MAX_STR_SIZE + 1),
+            2 ** (literal.MAX_INT_SIZE + 1),
+        )
+    )
+    constant.optimize(node)
+
+    value = node.body[2].value
+    assert value.left.args[0].id == 'TEXT'
+    assert value.right.id == 'BIG'
+
+
+def test_skips_names_rebound_by_global_statements():
+    """Test that module names rebound in a function are not in-lined."""
+    node = parse.parse(
+        'FLAG = False\n'
+        'def enable():\n'
+        '    global FLAG\n'
+        '    FLAG = True\n'
+        'def check():\n'
+        '    return FLAG\n'
+    )
+    constant.optimize(node)
+
+    assert isinstance(node.body[2].body[0].value, ast.Name)
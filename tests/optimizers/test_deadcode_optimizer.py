@@ -0,0 +1,147 @@
+"""Test suite for optimizers.deadcode."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import types
+
+from pycc.asttools import parse
+from pycc.optimizers import deadcode
+
+source = """
+_DEBUG = False
+_EXPORTED = 1
+_USED = 2
+__all__ = ['_EXPORTED']
+
+
+def flagged(x):
+    if _DEBUG:
+        x = -x
+    if 0:
+        y = 1
+    else:
+        y = 2
+    while False:
+        pass
+    else:
+        y += 1
+    return x + y + _USED
+    x = 0
+
+
+def first(values):
+    for value in values:
+        if 1:
+            break
+            value = None
+    return value if True else None
+"""
+
+
+def run(node):
+    """Compile a module tree and get its namespace."""
+    namespace = {}
+    ast.fix_missing_locations(node)
+    exec(compile(node, '<test>', 'exec', dont_inherit=True), namespace)
+    return namespace
+
+
+def test_removes_dead_code():
+    """Test that code which never runs is removed without changing results."""
+    node = parse.parse(source)
+    result = deadcode.optimize(node)
+    namespace = run(node)
+
+    assert namespace['flagged'](1) == 6
+    assert namespace['first']([3, 4]) == 3
+    assert result.unused == ('_DEBUG',)
+    assert '_DEBUG' not in namespace
+    assert '_EXPORTED' in namespace
+
+    flagged = next(n for n in node.body if getattr(n, 'name', '') == 'flagged')
+    assert [n.__class__ for n in flagged.body] == [
+        ast.Assign,
+        ast.AugAssign,
+        ast.Return,
+    ]
+
+    # Branches, the loop, and the statements after return and break.
+    assert result.pruned == 7
+
+
+def test_keeps_code_which_changes_the_namespace():
+    """Test that dead code the compiler relies on is kept."""
+    node = parse.parse(
+        "def generator():\n"
+        "    return\n"
+        "    yield\n"
+        "def unbound():\n"
+        "    if 0:\n"
+        "        name = 1\n"
+        "    return name\n"
+        "def empty():\n"
+        "    if 0:\n"
+        "        pass\n"
+    )
+    result = deadcode.optimize(node)
+    namespace = run(node)
+
+    assert isinstance(namespace['generator'](), types.GeneratorType)
+    assert isinstance(node.body[1].body[0], ast.If)
+    assert isinstance(node.body[2].body[0], ast.Pass)
+    assert result.pruned == 1
+
+
+def test_skips_statements_removed_after_a_jump():
+    """Test that removed statements are not visited or counted again."""
+    node = parse.parse(
+        "def f(x):\n"
+        "    return x\n"
+        "    if False:\n"
+        "        print(x)\n"
+        "    while 0:\n"
+        "        pass\n"
+        "    print(x if True else 0)\n"
+    )
+    result = deadcode.optimize(node)
+
+    assert [n.__class__ for n in node.body[0].body] == [ast.Return]
+    assert result.pruned == 3
+
+
+def test_keeps_private_names_used_in_other_scopes():
+    """Test that private names read by a class body assignment are kept."""
+    node = parse.parse(
+        "_template = 'x'\n"
+        "class Diff(object):\n"
+        "    _template = _template\n"
+    )
+    result = deadcode.optimize(node)
+    namespace = run(node)
+
+    assert result.unused == ()
+    assert namespace['Diff']._template == 'x'
+
+
+def test_keeps_branches_of_names_rebound_globally():
+    """Test that tests of names a function rebinds are not pruned."""
+    node = parse.parse(
+        "FLAG = False\n"
+        "def enable():\n"
+        "    global FLAG\n"
+        "    FLAG = True\n"
+        "def check():\n"
+        "    if FLAG:\n"
+        "        return 1\n"
+        "    return 0\n"
+    )
+    result = deadcode.optimize(node)
+    namespace = run(node)
+    namespace['enable']()
+
+    assert result.pruned == 0
+    assert namespace['check']() == 1
@@ -0,0 +1,92 @@
+"""Test suite for optimizers.fusion."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+import pytest
+
+from pycc import pycompat
+from pycc.asttools import parse
+from pycc.optimizers import fusion
+
+pytestmark = pytest.mark.skipif(
+    pycompat.PY2,
+    reason="PY2 list comprehensions are not fused",
+)
+
+source = """
+def transform(xs, ys, log):
+    a = list(map(lambda x: x * 2, xs))
+    b = set(filter(lambda x: x > 1, xs))
+    c = sum([x * x for x in xs], 10)
+    d = any([x > 2 for x in xs])
+    e = any([log(x) for x in xs])
+    f = [x + 1 for x in [y * 2 for y in xs if y] if x > 2]
+    g = [x + x for x in (y for y in xs)]
+    h = {x: z for x in [y for y in xs] for z in ys}
+    i = max([x for x in xs], key=abs)
+    j = max([x for x in xs], [0])
+    k = list([x for x in [x * 2 for x in xs]])
+    m = (x for x in [y for y in xs])
+    n = [x * y for x in (y + 1 for y in xs) for y in ys]
+    return a, b, c, d, e, f, g, h, i, j, k, list(m), n
+"""
+
+
+def run(node):
+    """Compile a module tree and get its namespace."""
+    namespace = {}
+    ast.fix_missing_locations(node)
+    exec(compile(node, '<test>', 'exec', dont_inherit=True), namespace)
+    return namespace
+
+
+def values(node):
+    """Get the values of the assignments in the function."""
+    return [stmt.value for stmt in node.body[0].body[:-1]]
+
+
+def test_results_are_unchanged():
+    """Test that fused expressions produce the same results."""
+    node = parse.parse(source)
+    result = fusion.optimize(node)
+    logged = []
+
+    assert run(node)['transform']([-3, 1, 2], [5], logged.append) == (
+        run(parse.parse(source))['transform']([-3, 1, 2], [5], logged.append)
+    )
+    assert logged == [-3, 1, 2] * 2
+    assert result.fused == 9
+
+
+def test_fuses_comprehensions():
+    """Test that only the expressions which are safe to fuse are fused."""
+    node = parse.parse(source)
+    fusion.optimize(node)
+    a, b, c, d, e, f, g, h, i, j, k, m, n = values(node)
+
+    assert isinstance(a, ast.ListComp)
+    assert isinstance(b, ast.SetComp) and len(b.generators[0].ifs) == 1
+    assert isinstance(c.args[0], ast.GeneratorExp) and len(c.args) == 2
+    assert isinstance(d.args[0], ast.GeneratorExp)
+    assert isinstance(e.args[0], ast.ListComp)
+    assert isinstance(f.generators[0].iter, ast.ListComp)
+    assert isinstance(g.generators[0].iter, ast.Name)
+    assert isinstance(h.generators[0].iter, ast.Name)
+    assert isinstance(i.args[0], ast.GeneratorExp)
+    assert isinstance(j.args[0], ast.ListComp)
+    assert isinstance(k, ast.ListComp) and len(k.generators) == 1
+    assert isinstance(m.generators[0].iter, ast.ListComp)
+    assert isinstance(n.generators[0].iter, ast.GeneratorExp)
+
+
+def test_respects_shadowed_builtins():
+    """Test that calls to names other than the builtins are kept."""
+    node = parse.parse(source + "\nsum = min\n")
+    fusion.optimize(node)
+
+    assert isinstance(values(node)[2].args[0], ast.ListComp)
@@ -0,0 +1,121 @@
+"""Test suite for optimizers.inline."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+from pycc.asttools import parse
+from pycc.optimizers import inline
+
+source = """
+SCALE = 3
+
+
+def double(x):
+    \"\"\"Double a value.\"\"\"
+    return x * 2
+
+
+def scaled(value, offset):
+    return value * SCALE + offset
+
+
+def subtract(a, b):
+    return b - a
+
+
+def pick(a, b):
+    return b if a else a
+
+
+def handle(items):
+    total = 0
+    for item in items:
+
+        total += double(item) + scaled(item + 1, offset=2)
+
+    return (
+        total,
+        double(double(total)),
+        subtract(len(items), total),
+        pick(total, len(items)),
+    )
+
+
+def shadowed(SCALE):
+    return scaled(1, 2)
+
+
+try:
+
+    EARLY = late(1)
+
+except NameError:
+
+    EARLY = None
+
+
+def late(x):
+    return x
+
+
+def recursive(n):
+    return n * recursive(n - 1) if n else 1
+
+
+RESULT = handle([1, 2, 3]), shadowed(10), late(EARLY), recursive(3)
+"""
+
+
+def run(node):
+    """Compile a module tree and get its namespace."""
+    namespace = {}
+    ast.fix_missing_locations(node)
+    exec(compile(node, '<test>', 'exec', dont_inherit=True), namespace)
+    return namespace
+
+
+def calls(node):
+    """Get the names called within a function definition."""
+    return sorted(
+        n.func.id for n in ast.walk(node)
+        if isinstance(n, ast.Call) and isinstance(n.func, ast.Name)
+    )
+
+
+def test_inlines_small_functions():
+    """Test that calls are replaced without changing the results."""
+    node = parse.parse(source)
+    expected = run(parse.parse(source))['RESULT']
+    result = inline.optimize(node)
+    functions = dict(
+        (n.name, n) for n in node.body if isinstance(n, ast.FunctionDef)
+    )
+
+    assert run(node)['RESULT'] == expected
+
+    # The call to pick is kept since len(items) is only evaluated when the
+    # total is zero.
+    assert calls(functions['handle']) == ['len', 'len', 'pick']
+
+    # SCALE is a local of shadowed and late is not yet defined when the
+    # first module level statement which calls it runs.
+    assert calls(functions['shadowed']) == ['scaled']
+    assert calls(node.body[7]) == ['late']
+    assert calls(functions['recursive']) == ['recursive']
+
+    # Three calls to double, scaled, subtract, and shadowed and late in the
+    # last statement.
+    assert result.inlined == 7
+
+
+def test_respects_size_and_rebinding():
+    """Test that large or rebound functions are not inlined."""
+    node = parse.parse(source + "\nsubtract = pick\n")
+    inline.optimize(node, max_size=4)
+    handle = next(n for n in node.body if getattr(n, 'name', '') == 'handle')
+
+    assert calls(handle) == ['len', 'len', 'pick', 'scaled', 'subtract']
@@ -0,0 +1,149 @@
+"""Test suite for optimizers.licm."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+from pycc.asttools import parse
+from pycc.optimizers import licm
+
+source = """
+SCALE = 3
+
+
+class Thing(object):
+
+    def __init__(self):
+        self.offset = 4
+
+    def run(self, values, n):
+        out = []
+        total = 0
+        values = list(values)
+        while values:
+
+            value = values.pop()
+            out.append(value * (n * SCALE) + self.offset)
+            total += value + (n + 1) * 2
+            if value > n:
+
+                total -= n ** 2
+
+            for other in (1, 2):
+
+                total += other * (n - 1)
+
+        return out, total
+"""
+
+
+def run(node):
+    """Compile a module tree and call Thing.run."""
+    namespace = {}
+    ast.fix_missing_locations(node)
+    exec(compile(node, '<test>', 'exec', dont_inherit=True), namespace)
+    return namespace['Thing']().run([1, 2, 3], 2)
+
+
+def temporaries(node):
+    """Get the values assigned to temporaries as source like dumps."""
+    return dict(
+        (n.targets[0].id, n.value)
+        for n in ast.walk(node)
+        if isinstance(n, ast.Assign) and
+        isinstance(n.targets[0], ast.Name) and
+        n.targets[0].id.startswith(licm.TEMP_PREFIX)
+    )
+
+
+def test_hoists_invariant_operators():
+    """Test that invariant operators are hoisted without attributes."""
+    expected = run(parse.parse(source))
+    node = parse.parse(source)
+    result = licm.optimize(node)
+
+    # The inner loop follows a conditional so its temporary for n - 1 stays
+    # within the outer loop. The others are guarded by the outer loop test.
+    assert result.hoisted == 3
+    method = node.body[1].body[1]
+    loop = method.body[4]
+    assert isinstance(loop, ast.While)
+    guard = method.body[3]
+    assert isinstance(guard, ast.If)
+    assert [n.targets[0].id for n in guard.body] == [
+        licm.TEMP_PREFIX + '1',
+        licm.TEMP_PREFIX + '2',
+    ]
+    # The conditional power is left in the loop.
+    assert any(
+        isinstance(n, ast.BinOp) and isinstance(n.op, ast.Pow)
+        for n in ast.walk(loop)
+    )
+    assert not any(
+        isinstance(n, ast.Attribute) and n.attr == 'append'
+        for n in temporaries(node).values()
+    )
+    assert run(node) == expected
+
+
+def test_hoists_attributes_when_allowed():
+    """Test that attribute loads are only hoisted when allowed."""
+    expected = run(parse.parse(source))
+    node = parse.parse(source)
+    licm.optimize(node, allow_attributes=True)
+
+    values = temporaries(node).values()
+    assert set(
+        n.attr for n in values if isinstance(n, ast.Attribute)
+    ) == set(('append', 'offset', 'pop'))
+    assert run(node) == expected
+
+
+def test_skips_rebound_and_kept_values():
+    """Test that values which change or are kept are left in the loop."""
+    node = parse.parse(
+        "def f(values, n):\n"
+        "    for value in values:\n"
+        "        kept = n + 1\n"
+        "        n = value * (n + 2)\n"
+        "    return kept\n"
+    )
+    assert licm.optimize(node).hoisted == 0
+
+
+def test_skips_values_changed_in_place():
+    """Test that tests of values the loop changes are left in the loop."""
+    node = parse.parse(
+        "def f(items):\n"
+        "    out = []\n"
+        "    for x in items:\n"
+        "        if not out:\n"
+        "            out.append(x)\n"
+        "    return out\n"
+    )
+    assert licm.optimize(node).hoisted == 0
+    namespace = {}
+    ast.fix_missing_locations(node)
+    exec(compile(node, '<test>', 'exec', dont_inherit=True), namespace)
+    assert namespace['f']([1, 2]) == [1]
+
+
+def test_skips_raising_values_of_loops_which_may_not_run():
+    """Test that values which may raise stay in loops which may not run."""
+    node = parse.parse(
+        "def safe_div(items, a, b):\n"
+        "    out = []\n"
+        "    for x in items:\n"
+        "        out.append(x + a / b)\n"
+        "    for x in (1, 2):\n"
+        "        out.append(x + (a is None))\n"
+        "    return out\n"
+    )
+    assert licm.optimize(node).hoisted == 1
+    namespace = {}
+    ast.fix_missing_locations(node)
+    exec(compile(node, '<test>', 'exec', dont_inherit=True), namespace)
+    assert namespace['safe_div']([], 1, 0) == [1, 2]
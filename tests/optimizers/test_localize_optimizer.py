@@ -0,0 +1,125 @@
+"""Test suite for optimizers.localize."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+import pytest
+
+from pycc.asttools import parse
+from pycc.optimizers import localize
+
+source = """
+import math
+LIMIT = 3
+
+
+def helper(value):
+    return value + LIMIT
+
+
+def hot(items):
+    \"\"\"Sum some values.\"\"\"
+    total = 0
+    for item in items:
+
+        total += len(item) + helper(int(math.sqrt(4)))
+
+    return isinstance(total, int), total
+
+
+def cold(items):
+    return len(items)
+
+
+def shadowed(items):
+    for len in items:
+
+        pass
+
+    for item in items:
+
+        helper(item)
+"""
+
+
+@pytest.fixture
+def node():
+    """Get as AST node from the source."""
+    return parse.parse(source)
+
+
+def run(node):
+    """Compile and run a module tree and get its namespace."""
+    namespace = {}
+    ast.fix_missing_locations(node)
+    exec(compile(node, '<test>', 'exec', dont_inherit=True), namespace)
+    return namespace
+
+
+def test_binds_names_used_in_loops(node):
+    """Test that builtins and module names in loops become locals."""
+    expected = run(parse.parse(source))['hot'](['a', 'bc'])
+    result = localize.optimize(node)
+
+    assert result.bound == (
+        ('hot', 'helper'),
+        ('hot', 'int'),
+        ('hot', 'len'),
+        ('hot', 'math'),
+        ('shadowed', 'helper'),
+    )
+    hot = node.body[3]
+    assert localize.is_docstring(hot.body[0])
+    # The aliases are assigned immediately before the loop.
+    assert [stmt.targets[0].id for stmt in hot.body[1:6]] == [
+        'total',
+        '_pycc_helper',
+        '_pycc_int',
+        '_pycc_len',
+        '_pycc_math',
+    ]
+    assert isinstance(hot.body[6], ast.For)
+    # Names only used outside of loops are left alone.
+    assert hot.body[-1].value.elts[0].func.id == 'isinstance'
+    assert run(node)['hot'](['a', 'bc']) == expected
+
+
+def test_skips_rebound_names():
+    """Test that names which are rebound anywhere are not bound."""
+    node = parse.parse(source + "\nhelper = None\n")
+    result = localize.optimize(node)
+    assert ('hot', 'helper') not in result.bound
+    assert ('shadowed', 'helper') not in result.bound
+    assert ('hot', 'len') in result.bound
+
+    node = parse.parse(source + "\ndef rebind():\n    global len\n")
+    assert ('hot', 'len') not in localize.optimize(node).bound
+
+
+def test_skips_dynamic_modules():
+    """Test that modules which use namespaces dynamically are skipped."""
+    for extra in ("\nfrom os import *\n", "\nglobals()['helper'] = None\n"):
+
+        assert localize.optimize(parse.parse(source + extra)).bound == ()
+
+
+def test_binds_names_when_loops_are_reached():
+    """Test that names bound after a function starts are still found."""
+    node = parse.parse(
+        'def numbers(items):\n'
+        '    yield 0\n'
+        '    for item in items:\n'
+        '        yield item + OFFSET\n'
+        '\n'
+        'STARTED = numbers([1, 2])\n'
+        'FIRST = next(STARTED)\n'
+        'OFFSET = 10\n'
+        'REST = list(STARTED)\n'
+    )
+
+    assert localize.optimize(node).bound == (('numbers', 'OFFSET'),)
+    assert run(node)['REST'] == [11, 12]
@@ -0,0 +1,76 @@
+"""Test suite for optimizers.membership."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+import pytest
+
+from pycc.asttools import parse
+from pycc.optimizers import membership
+
+source = """
+def check(x, ys):
+    a = x in [1, 2, 3]
+    b = x not in set(['GET', 'HEAD'])
+    c = x in frozenset((1, 2))
+    d = x in [1] == ys
+    e = [y for y in [x, 2]]
+    f = x in set([len(ys)])
+    g = [x] in [[1], [2]]
+    for z in [1, 2]:
+        a = a or z
+    return a, b, c, d, e, f, g
+"""
+
+
+def run(node):
+    """Compile a module tree and get its namespace."""
+    namespace = {}
+    ast.fix_missing_locations(node)
+    exec(compile(node, '<test>', 'exec', dont_inherit=True), namespace)
+    return namespace
+
+
+def values(node):
+    """Get the values of the assignments which begin the function."""
+    return [stmt.value for stmt in node.body[0].body[:7]]
+
+
+@pytest.mark.parametrize('args', ((1, [1]), ('GET', ['GET']), (3, [])))
+def test_results_are_unchanged(args):
+    """Test that rewritten tests produce the same results."""
+    expected = run(parse.parse(source))['check'](*args)
+    node = parse.parse(source)
+    membership.optimize(node)
+
+    assert run(node)['check'](*args) == expected
+
+
+def test_rewrites_displays():
+    """Test that only the displays which are safe to change are rewritten."""
+    node = parse.parse(source)
+    result = membership.optimize(node)
+    a, b, c, d, e, f, g = values(node)
+
+    assert isinstance(a.comparators[0], ast.Tuple)
+    assert isinstance(b.comparators[0], ast.Set)
+    assert isinstance(c.comparators[0], ast.Set)
+    assert isinstance(d.comparators[0], ast.List)
+    assert isinstance(e.generators[0].iter, ast.Tuple)
+    assert isinstance(f.comparators[0], ast.Call)
+    assert isinstance(g.comparators[0], ast.Tuple)
+    assert isinstance(g.comparators[0].elts[0], ast.List)
+    assert isinstance(node.body[0].body[-2].iter, ast.Tuple)
+    assert result.rewritten == 6
+
+
+def test_respects_rebound_builtins():
+    """Test that calls to names other than the builtins are kept."""
+    node = parse.parse(source + "\nset = list\n")
+    membership.optimize(node)
+
+    assert isinstance(values(node)[1].comparators[0], ast.Call)
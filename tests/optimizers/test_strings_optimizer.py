@@ -0,0 +1,78 @@
+"""Test suite for optimizers.strings."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+import pytest
+
+from pycc import pycompat
+from pycc.asttools import literal
+from pycc.asttools import parse
+from pycc.optimizers import strings
+
+pytestmark = pytest.mark.skipif(
+    pycompat.PY2,
+    reason="PY2 strings are not folded",
+)
+
+source = """
+def build(x, y, log):
+    return [
+        'prefix' + 'abc' + str(x),
+        '%s:%s' % ('a', x),
+        '%s:%d%%' % ('a', 3),
+        '%5s|%s|%r' % (x, 'q', y),
+        '{}-{}'.format('k', x),
+        '{0}{0}{name!r:>5}'.format(x, name=y),
+        '{}{}'.format(log(1), log(2)),
+        '{1}{0}'.format(log(1), log(2)),
+        'a' + '%s' % (x,) + '{:>3}'.format(y) + str(x),
+        x + 'a' + 'b',
+        '%s' % x,
+        '%(key)s' % {'key': x},
+        '{0.__class__}'.format(x),
+    ]
+"""
+
+
+def run(node):
+    """Compile a module tree and get its namespace."""
+    namespace = {}
+    ast.fix_missing_locations(node)
+    exec(compile(node, '<test>', 'exec', dont_inherit=True), namespace)
+    return namespace
+
+
+def test_results_are_unchanged():
+    """Test that folded strings have the same values and side effects."""
+    node = parse.parse(source)
+    result = strings.optimize(node)
+    logged = []
+    expected = []
+
+    assert run(node)['build']('s', 't', logged.append) == (
+        run(parse.parse(source))['build']('s', 't', expected.append)
+    )
+    assert logged == expected
+    assert result.folded == 8
+
+
+def test_folds_strings():
+    """Test that only the expressions which are safe to fold are folded."""
+    node = parse.parse(source)
+    strings.optimize(node)
+    values = node.body[0].body[0].value.elts
+    joined = ast.JoinedStr if strings.JOINED else ast.Call
+
+    assert isinstance(values[0], joined)
+    assert isinstance(values[1], joined)
+    assert literal.evaluate(values[2]) == 'a:3%'
+    assert literal.evaluate(values[3].left) == '%5s|q|%r'
+    assert isinstance(values[4], joined)
+    for idx in (7, 9, 10, 11, 12):
+
+        assert isinstance(values[idx], (ast.BinOp, ast.Call))
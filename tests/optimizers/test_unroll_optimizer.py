@@ -0,0 +1,116 @@
+"""Test suite for optimizers.unroll."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+
+from pycc.asttools import parse
+from pycc.optimizers import unroll
+
+source = """
+def serialize(obj):
+    out = []
+    for key in ('a', 'b'):
+
+        out.append((key, getattr(obj, key)))
+
+    for i in range(1, 3):
+
+        for j in [10, 20]:
+
+            out.append(i * j)
+
+    for a, b in ((1, 2), (3, 4)):
+
+        out.append(a + b)
+
+    else:
+
+        out.append(a)
+
+    for skipped in range(3):
+
+        if skipped:
+
+            continue
+
+        out.append(skipped)
+
+    for large in range(100):
+
+        out.append(large)
+
+    return out[:12]
+
+
+class Thing(object):
+    a = 1
+    b = 2
+
+
+RESULT = serialize(Thing())
+"""
+
+
+def run(node):
+    """Compile a module tree and get its namespace."""
+    namespace = {}
+    ast.fix_missing_locations(node)
+    exec(compile(node, '<test>', 'exec', dont_inherit=True), namespace)
+    return namespace
+
+
+def loops(node):
+    """Get the names of the first targets of the loops left in a tree."""
+    return [
+        next(t.id for t in ast.walk(n.target) if isinstance(t, ast.Name))
+        for n in ast.walk(node)
+        if isinstance(n, ast.For)
+    ]
+
+
+def test_unrolls_constant_loops():
+    """Test that small loops are unrolled without changing the results."""
+    node = parse.parse(source)
+    expected = run(parse.parse(source))['RESULT']
+    result = unroll.optimize(node)
+
+    assert run(node)['RESULT'] == expected
+    assert loops(node) == ['skipped', 'large']
+
+    # Both loops over i and j are counted along with key and the tuples.
+    assert result.unrolled == 4
+
+
+def test_respects_limits():
+    """Test that loops over the limits or over a rebound range are kept."""
+    node = parse.parse(source)
+    unroll.optimize(node, max_trips=1)
+
+    assert loops(node) == ['key', 'i', 'a', 'skipped', 'large', 'j']
+
+    node = parse.parse(source)
+    unroll.optimize(node, max_size=5)
+
+    assert loops(node) == ['key', 'i', 'a', 'skipped', 'large', 'j']
+
+    node = parse.parse(source + "\nrange = list\n")
+    unroll.optimize(node)
+
+    assert loops(node) == ['i', 'skipped', 'large']
+
+
+def test_skips_values_too_large_to_build():
+    """Test that loops over values which cannot be built again are kept."""
+    node = parse.parse(
+        "def f(out):\n"
+        "    for text in ('a', {0!r}):\n"
+        "        out.append(text)\n".format('x' * 5000)
+    )
+    result = unroll.optimize(node)
+
+    assert result.unrolled == 0
+    assert loops(node) == ['text']
@@ -0,0 +1,113 @@
+"""Test suite for importer."""
+
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import sys
+
+import pytest
+
+from pycc import importer
+from pycc import pycompat
+from pycc.cli.extensions import utils
+from pycc.optimizers import constant
+
+
+pytestmark = pytest.mark.skipif(
+    pycompat.PY2 or pycompat.VERSION.minor < 4,
+    reason="The import hook requires >=PY34",
+)
+
+source = """
+LIMIT = 10
+
+
+def get_limit():
+    return LIMIT
+"""
+
+
+class CountingExtension(object):
+
+    """Extension which in-lines constants and counts its runs."""
+
+    name = 'counting'
+    description = 'Counts runs.'
+    arguments = ()
+    runs = 0
+
+    @classmethod
+    def optimize(cls, node):
+        """Count the run and in-line constants."""
+        cls.runs += 1
+        constant.optimize(node)
+
+
+class BrokenExtension(object):
+
+    """Extension which always fails."""
+
+    name = 'broken'
+    description = 'Always fails.'
+    arguments = ()
+
+    @staticmethod
+    def optimize(node):
+        """Raise an error."""
+        raise RuntimeError('broken')
+
+
+@pytest.fixture
+def module_dir(tmpdir, monkeypatch):
+    """Get a directory on the import path which contains a module."""
+    tmpdir.join('pycc_hooked.py').write(source)
+    monkeypatch.syspath_prepend(str(tmpdir))
+    monkeypatch.setattr(sys, 'dont_write_bytecode', False)
+    monkeypatch.setattr(CountingExtension, 'runs', 0)
+    monkeypatch.setattr(
+        utils,
+        'iter_extensions',
+        lambda: iter((CountingExtension, BrokenExtension)),
+    )
+    yield tmpdir
+    importer.uninstall()
+    sys.modules.pop('pycc_hooked', None)
+
+
+def test_optimizes_on_import(module_dir):
+    """Test that imported modules are optimized and cached."""
+    finder = importer.install(('counting',), paths=(str(module_dir),))
+    import pycc_hooked
+
+    assert 'LIMIT' not in pycc_hooked.get_limit.__code__.co_names
+    assert pycc_hooked.get_limit() == 10
+    assert pycc_hooked.__cached__.endswith(
+        'opt-{0}.pyc'.format(finder._tag),
+    )
+    assert os.path.exists(pycc_hooked.__cached__)
+
+    # A second import is served from the cached bytecode.
+    del sys.modules['pycc_hooked']
+    import pycc_hooked
+
+    assert 'LIMIT' not in pycc_hooked.get_limit.__code__.co_names
+    assert CountingExtension.runs == 1
+
+
+def test_falls_back_on_error(module_dir):
+    """Test that modules still load when an extension fails."""
+    importer.install(('broken',))
+    import pycc_hooked
+
+    assert 'LIMIT' in pycc_hooked.get_limit.__code__.co_names
+    assert pycc_hooked.get_limit() == 10
+
+
+def test_unknown_extension():
+    """Test that unknown extensions are rejected."""
+    with pytest.raises(ValueError):
+
+        importer.install(('not-an-extension',))